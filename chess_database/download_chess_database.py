@@ -1,7 +1,8 @@
+import csv
+import io
 import json
-import numpy as np
 import os
-import pandas as pd
+import struct
 import wget
 import zstandard
 
@@ -12,85 +13,180 @@ min_rating = 500        # Remove ratings under this
 max_rating = 2200       # Remove ratings about this
 threshold_plays = 100   # Remove puzzles with fewer plays than this
 step_size = 100         # Batch the database according to this elo range.
-
-main_db_filename = bdd_name + ".csv"  # Filename for the DB. Will only be stored locally.
-
-if not os.path.exists(main_db_filename):
-    # Download and uncompress the database
+checkpoint_every = 100_000  # Number of rows read between two saves of the progress
+
+compressed_filename = bdd_name + ".csv.zst"  # Compressed DB. Will only be stored locally.
+progress_filename = bdd_name + "_build.progress"  # Progress of an unfinished build, to resume it (not a .json, which would be taken for the mapping)
+mapping_filename = bdd_name + "_ratingmapping.json"
+
+# Each split database comes with an index containing the byte offset of each row (header excluded) and the size of the file,
+# as little-endian unsigned 64 bits integers (see `chess_utils.INDEX_ENTRY`)
+index_entry = struct.Struct("<Q")
+
+
+def get_split_db_filename(rating):
+    """
+    Returns the name of the split database of a rating range
+
+    Parameters
+    ----------
+    rating (int):
+        the lowest rating of the range
+
+    Returns
+    -------
+    res (str)
+    """
+    return f"{bdd_name}_Rating{rating}.csv"
+
+
+def get_index_filename(rating):
+    """
+    Returns the name of the index of a split database
+
+    Parameters
+    ----------
+    rating (int):
+        the lowest rating of the range
+
+    Returns
+    -------
+    res (str)
+    """
+    return f"{bdd_name}_Rating{rating}.idx"
+
+
+def save_progress(rows_read, buckets):
+    """
+    Saves the progress of the build, after flushing the split databases and their indexes
+    The progress file is replaced atomically, so that it always describes data which is on disk
+
+    Parameters
+    ----------
+    rows_read (int):
+        number of rows of the full database already processed
+    buckets (dict):
+        rating -> [number of rows, csv file, index file]
+    """
+    progress = {"rows_read": rows_read, "buckets": {}}
+    for rating, (count, csv_file, index_file) in buckets.items():
+        csv_file.flush()
+        index_file.flush()
+        os.fsync(csv_file.fileno())
+        os.fsync(index_file.fileno())
+        progress["buckets"][rating] = (count, csv_file.tell())
+
+    with open(progress_filename + ".tmp", "w") as fd:
+        json.dump(progress, fd)
+    os.replace(progress_filename + ".tmp", progress_filename)
+
+
+def open_buckets(header, progress):
+    """
+    Opens the split databases and their indexes, either from scratch or where a previous build stopped
+
+    Parameters
+    ----------
+    header (bytes):
+        header line of the full database
+    progress (dict):
+        the saved progress (see `save_progress`), or None to start from scratch
+
+    Returns
+    -------
+    res (dict):
+        rating -> [number of rows, csv file, index file]
+    """
+    buckets = {}
+    for rating in range(min_rating, max_rating, step_size):
+        if progress is None:
+            csv_file = open(get_split_db_filename(rating), "wb")
+            csv_file.write(header)
+            index_file = open(get_index_filename(rating), "wb")
+            count = 0
+        else:
+            # Anything written after the last save is dropped, and will be written again
+            count, size = progress["buckets"][str(rating)]
+            csv_file = open(get_split_db_filename(rating), "r+b")
+            csv_file.truncate(size)
+            csv_file.seek(size)
+            index_file = open(get_index_filename(rating), "r+b")
+            index_file.truncate(count * index_entry.size)
+            index_file.seek(count * index_entry.size)
+        buckets[rating] = [count, csv_file, index_file]
+    return buckets
+
+
+if not os.path.exists(compressed_filename):
+    # The database is read directly from the archive, without uncompressing it on disk
     url = "https://database.lichess.org/lichess_db_puzzle.csv.zst"
     print(f"Downloading chess puzzles database from {url}")
-    compressed_filename = wget.download(url)
-    with open(compressed_filename, 'rb') as compressed:
-        decomp = zstandard.ZstdDecompressor()
-        with open(main_db_filename, "wb") as destination:
-            print(f"\nUnpacking database to {main_db_filename}, removing archive.")
-            decomp.copy_stream(compressed, destination)
-    os.remove(compressed_filename)
-
-df = pd.read_csv(main_db_filename)
-
-source_df = df  # To be able to access the full df at some point if needed.
-removed_items = pd.DataFrame({})
-
-print("Base database is downloaded and ready to go.")
-df.info()
-
-
-###### Filter ratings within a bound
-print(f"{'-' * 5}Filtering out some ratings{'-' * 5}")
-
-
-rating_indexes = (df["Rating"] <= max_rating) & (df["Rating"] >= min_rating)
-removed_indexes = (df["Rating"] > max_rating) | (df["Rating"] < min_rating)
-
-to_remove = df[removed_indexes]
-removed_items = pd.concat([removed_items, to_remove])
-df = df[rating_indexes]
-
-print(f"{len(df)} problems left")
+    wget.download(url, out=compressed_filename)  # The file is only renamed to its final name once fully downloaded
+    print()
 
-print(f"Removed {len(to_remove)} items with this operation.")
+progress = None
+if os.path.exists(progress_filename):
+    with open(progress_filename, "r") as fd:
+        progress = json.load(fd)
+    print(f"Resuming the previous build after {progress['rows_read']} rows")
 
-##### Filter out problems that have less than a certain number of plays
-print(f"{'-' * 5}Filtering out low played problems{'-' * 5}")
 
+##### Filter the problems and split the database by ratings, one row at a time
+# Only the current row is kept in memory: the rows are appended to their split database as they are read
+print(f"Rating range: {min_rating}-{max_rating}, removing problems with less than {threshold_plays} plays")
 
-removed_indexes = df["NbPlays"] < threshold_plays
-plays_indexes = df["NbPlays"] >= threshold_plays
+with open(compressed_filename, "rb") as compressed:
+    stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(compressed))
+    header = stream.readline()
+    columns = next(csv.reader([header.decode()]))
+    rating_column = columns.index("Rating")
+    plays_column = columns.index("NbPlays")
 
-to_remove = df[removed_indexes]
-removed_items = pd.concat([removed_items, to_remove])
-df = df[plays_indexes]
+    buckets = open_buckets(header, progress)
+    rows_read = 0
 
-print(f"{len(df)} problems left.")
-print(f"Removed {len(to_remove)} items with this operation.")
+    if progress is not None:
+        for _ in range(progress["rows_read"]):
+            stream.readline()
+        rows_read = progress["rows_read"]
 
+    for line in stream:
+        rows_read += 1
+        if not line.endswith(b"\n"):
+            line += b"\n"
 
-##### Split the database by ratings
-print(f"Rating range: {min_rating}-{max_rating}")
+        row = next(csv.reader([line.decode()]))
+        rating = int(row[rating_column])
+        bucket = min_rating + (rating - min_rating) // step_size * step_size
 
+        if min_rating <= rating and bucket < max_rating and int(row[plays_column]) >= threshold_plays:
+            entry = buckets[bucket]
+            entry[2].write(index_entry.pack(entry[1].tell()))
+            entry[1].write(line)
+            entry[0] += 1
 
-split_ratings = np.arange(min_rating, max_rating, step_size)
+        if rows_read % checkpoint_every == 0:
+            save_progress(rows_read, buckets)
+            print(f"{rows_read} rows processed")
 
-split_dfs = {}
-for rating in split_ratings:
-    top_rating = rating + step_size - 1
-    current_rating_pbs = df[(df["Rating"] <= top_rating) & (df["Rating"] >= rating)]
-    print(f"{rating}-{top_rating}: {len(current_rating_pbs)}")
-    split_dfs[rating] = current_rating_pbs
+nb_kept = sum(count for count, _, _ in buckets.values())
+print(f"Kept {nb_kept} problems, removed {rows_read - nb_kept} problems")
 
 # Save the split databases and a mapping to the correct lengths,
 # so that it does not need to recompute the lengths at runtime.
 mapping = {}
-for rating, batch in split_dfs.items():
-    batch: pd.DataFrame
-    split_db_filename = f"{bdd_name}_Rating{rating}.csv"
-    batch.to_csv(split_db_filename)
-    mapping[int(rating)] = (int(len(batch)), split_db_filename)
-with open(f"{bdd_name}_ratingmapping.json", "w") as fd:
+for rating, (count, csv_file, index_file) in buckets.items():
+    print(f"{rating}-{rating + step_size - 1}: {count}")
+    index_file.write(index_entry.pack(csv_file.tell()))  # End of the last row
+    csv_file.close()
+    index_file.close()
+    mapping[rating] = (count, get_split_db_filename(rating))
+
+with open(mapping_filename, "w") as fd:
     json.dump(mapping, fd)
+if os.path.exists(progress_filename): os.remove(progress_filename)
 
 
 # Delete the downloaded database
-# print(f"Cleaning up {main_db_filename}")
-# os.remove(main_db_filename)
+# print(f"Cleaning up {compressed_filename}")
+# os.remove(compressed_filename)
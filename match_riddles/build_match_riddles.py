@@ -0,0 +1,86 @@
+import argparse
+from functools import partial
+from itertools import product
+import multiprocessing
+import os
+import sys
+import time
+
+
+# The generator is run as a script from the root of the repository, so the modules of the events have to be made importable
+# They are imported directly, without the `events` package which needs the whole bot
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "events"))
+from match_riddle_bank import BANK_FOLDER, write_bank  # noqa: E402
+from matches_challenge import MatchesExpression, evaluate_term, get_all_riddles, get_all_solutions  # noqa: E402
+
+
+def iter_equations(max_digits):
+    """
+    Yields all the equations with the same shape as the ones of `gen_equality(2, 2)`, with numbers of up to `max_digits` digits
+    The number before the "=" sign is the one computed to make the equation correct, it can have more digits
+
+    Parameters
+    ----------
+    max_digits (int)
+
+    Yields
+    ------
+    res (str)
+    """
+    numbers = range(10 ** max_digits)
+    for a, op1, b, op2, d in product(numbers, "+-", numbers, "+-", numbers):
+        res_left = evaluate_term(f"{a}{op1}{b}")
+        res_right = evaluate_term(f"{op2}{d}")
+        pref = "-" if res_left < res_right else ""
+        yield f"{a}{op1}{b}={pref}{abs(res_left - res_right)}{op2}{d}"
+
+
+def explore_equation(eq, max_solutions):
+    """
+    Finds all the riddles of an equation with few solutions
+
+    Parameters
+    ----------
+    eq (str)
+    max_solutions (int):
+        the riddles with more solutions are ignored
+
+    Returns
+    -------
+    res (List[(str, str, List[str])]):
+        riddle, main solution (the equation) and all the solutions of each riddle
+    """
+    res = []
+    for riddle in get_all_riddles(MatchesExpression(s=eq)):
+        sols = get_all_solutions(riddle, max_nb=max_solutions)
+        if len(sols) <= max_solutions:
+            res.append((riddle.str, eq, sols))
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates the bank of riddles of the match event, by exploring all the equations up to a given size")
+    parser.add_argument("--max-digits", type=int, default=1, help="maximum number of digits of the numbers chosen in the equations")
+    parser.add_argument("--max-solutions", type=int, default=3, help="the riddles with more solutions are not kept")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes exploring the equations")
+    parser.add_argument("--output", default=BANK_FOLDER, help="folder where the bank is written")
+    parser.add_argument("--seed", type=int, default=0, help="seed used to shuffle the riddles")
+    args = parser.parse_args()
+
+    equations = list(iter_equations(args.max_digits))
+    print(f"Exploring {len(equations)} equations with {args.workers} workers")
+
+    start = time.perf_counter()
+    riddles = dict()  # riddle -> (main solution, all the solutions), a riddle can be reached from several equations
+    with multiprocessing.Pool(args.workers) as pool:
+        explore = partial(explore_equation, max_solutions=args.max_solutions)
+        for i, found in enumerate(pool.imap_unordered(explore, equations, chunksize=8), 1):
+            for riddle, main_sol, all_sols in found:
+                riddles.setdefault(riddle, (main_sol, all_sols))
+            if i % 100 == 0:
+                print(f"{i}/{len(equations)} equations explored, {len(riddles)} riddles found ({time.perf_counter() - start:.0f}s)")
+
+    groups = write_bank([(riddle, main_sol, all_sols) for riddle, (main_sol, all_sols) in riddles.items()], args.output, args.seed)
+    for nb_solutions, nb_digits, _, nb_lines in groups:
+        print(f"{nb_solutions} solution(s), {nb_digits} digits: {nb_lines}")
+    print(f"Wrote {len(riddles)} riddles to {args.output} in {time.perf_counter() - start:.0f}s")
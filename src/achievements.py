@@ -228,8 +228,8 @@ class AchievementFullMiner(Achievement):
     async def check(self, user_id, *args, **kwargs):
         profile = user_profile.get_profile(user_id)
         for powerup in profile["powerups"]:
-            p = eval(powerup)
-            if isinstance(p, powerups.Miner_powerup) and p.qty == p.max_qty:
+            p = powerups.parse_powerup(powerup)
+            if isinstance(p, powerups.MinerPowerup) and p.qty == p.max_qty:
                 self.validate(user_id)
 
 
@@ -243,7 +243,7 @@ class Achievement2TemporaryPowerupsActive(Achievement):
         count = 0
         profile = user_profile.get_profile(user_id)
         for powerup in profile["powerups"]:
-            if isinstance(eval(powerup), powerups.PowerupsNonPermanent):
+            if isinstance(powerups.parse_powerup(powerup), powerups.PowerupsNonPermanent):
                 count += 1
             if count == 2:
                 self.validate(user_id)
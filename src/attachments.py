@@ -0,0 +1,83 @@
+from interactions import File
+from io import BytesIO
+import os
+import tempfile
+from uuid import uuid4
+
+
+# Large GIFs are written to this folder instead of being kept in memory until they are sent
+SPILL_FOLDER = os.path.join(tempfile.gettempdir(), "piflouz_attachments")
+SPILL_THRESHOLD = 4 * 1024 * 1024  # bytes
+SPILL_MAX_SIZE = 64 * 1024 * 1024  # bytes, the oldest files are removed above this size
+
+
+def get_unique_filename(prefix, extension):
+    """
+    Returns a file name which is different for each call, so that concurrent requests never share a file
+
+    Parameters
+    ----------
+    prefix (str)
+    extension (str):
+        without the dot
+
+    Returns
+    -------
+    res (str)
+    """
+    return f"{prefix}_{uuid4().hex}.{extension}"
+
+
+def make_file(data, prefix, extension):
+    """
+    Returns an attachment containing the given data, with a unique name
+    The data is sent from memory, except for large GIFs which are spilled to disk (see `SPILL_FOLDER`)
+
+    Parameters
+    ----------
+    data (bytes or BytesIO):
+        content of the file
+    prefix (str):
+        beginning of the file name
+    extension (str):
+        without the dot
+
+    Returns
+    -------
+    res (interactions.File)
+    """
+    if isinstance(data, BytesIO): data = data.getvalue()
+    file_name = get_unique_filename(prefix, extension)
+
+    if extension == "gif" and len(data) > SPILL_THRESHOLD:
+        return File(spill(data, file_name), file_name=file_name)
+    return File(BytesIO(data), file_name=file_name)
+
+
+def spill(data, file_name):
+    """
+    Writes data to the spill folder, and removes the oldest spilled files if the folder gets too big
+
+    Parameters
+    ----------
+    data (bytes)
+    file_name (str)
+
+    Returns
+    -------
+    res (str):
+        path to the written file
+    """
+    os.makedirs(SPILL_FOLDER, exist_ok=True)
+    path = os.path.join(SPILL_FOLDER, file_name)
+    with open(path, "wb") as f:
+        f.write(data)
+
+    entries = sorted(os.scandir(SPILL_FOLDER), key=lambda entry: entry.stat().st_mtime)
+    total_size = sum(entry.stat().st_size for entry in entries)
+    for entry in entries:
+        if total_size <= SPILL_MAX_SIZE or entry.path == path: break
+
+        total_size -= entry.stat().st_size
+        os.remove(entry.path)
+    return path
@@ -2,16 +2,68 @@ import cairosvg
 import chess
 import chess.pgn
 import chess.svg
+import csv
 import imageio
 import json
 import os
-import pandas as pd
 import random
+import struct
+
+
+# Each shard of the database has an index file, containing the byte offset of the start of each row (header excluded) in the shard
+# The offsets are stored as little-endian unsigned 64 bits integers, followed by the size of the shard
+# This allows to read any row of the shard directly, without reading the rows before it
+INDEX_ENTRY = struct.Struct("<Q")
+PROBLEM_KEYS = ["PuzzleId", "FEN", "Moves", "Rating", "RatingDeviation", "Popularity", "NbPlays", "Themes", "GameUrl", "OpeningTags"]
+INT_KEYS = ["Rating", "RatingDeviation", "Popularity", "NbPlays"]
+
+
+def get_index_filename(shard_filename):
+    """
+    Returns the name of the index file of a shard
+
+    Parameters
+    ----------
+    shard_filename (str)
+
+    Returns
+    -------
+    res (str)
+    """
+    return os.path.splitext(shard_filename)[0] + ".idx"
+
+
+def write_index(shard_filename):
+    """
+    Creates the index file of a shard (see `INDEX_ENTRY`)
+
+    Parameters
+    ----------
+    shard_filename (str)
+
+    Returns
+    -------
+    res (int):
+        the number of rows in the shard
+    """
+    offsets = []
+    with open(shard_filename, "rb") as f:
+        f.readline()  # Header
+        offset = f.tell()
+        for line in f:
+            offsets.append(offset)
+            offset += len(line)
+    offsets.append(offset)
+
+    with open(get_index_filename(shard_filename), "wb") as f:
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+    return len(offsets) - 1
 
 
 def load_chess_database(db_path="chess_database/"):
     """
     Get the mapping dictionnary to load databases paths.
+    The index of the shards that do not have one yet are created.
 
     Parameters
     ----------
@@ -34,6 +86,10 @@ def load_chess_database(db_path="chess_database/"):
     with open(map_path, "r") as fd:
         mapping = json.load(fd)
     int_mapping = {int(key): (value[0], os.path.join(db_path, value[1])) for key, value in mapping.items()}
+
+    for _, filename in int_mapping.values():
+        if not os.path.exists(get_index_filename(filename)):
+            write_index(filename)
     return int_mapping
 
 
@@ -56,13 +112,23 @@ def lookup_problem(mapping, rating=1500):
     rating = rating // 100 * 100  # rating r contains problems from r to r + 99
     nb_problems, filename = mapping[rating]
 
-    random_problem_index = random.randint(0, nb_problems)
-    full_problem_db = pd.read_csv(filename, skiprows=range(1, random_problem_index + 1), nrows=1)
+    random_problem_index = random.randrange(nb_problems)
+    with open(get_index_filename(filename), "rb") as f:
+        f.seek(random_problem_index * INDEX_ENTRY.size)
+        start, end = struct.unpack("<2Q", f.read(2 * INDEX_ENTRY.size))
+
+    with open(filename, "rb") as f:
+        header = f.readline()
+        f.seek(start)
+        row = f.read(end - start)
+
+    # Shards written by older versions of the download script have an additional first column, for the index of the rows
+    keys, values = csv.reader([header.decode(), row.decode()])
+    full_problem = dict(zip(keys, values))
 
-    full_problem = full_problem_db.iloc[0]
     full_problem_dic = {}
-    for key in ["PuzzleId", "FEN", "Moves", "Rating", "RatingDeviation", "Popularity", "NbPlays", "Themes", "GameUrl", "OpeningTags"]:
-        full_problem_dic[key] = full_problem[key]
+    for key in PROBLEM_KEYS:
+        full_problem_dic[key] = int(full_problem[key]) if key in INT_KEYS else full_problem[key]
     return full_problem_dic
 
 
@@ -70,7 +136,6 @@ if __name__ == "__main__":
 
     mapping = load_chess_database()
     print(mapping)
-    temp_filename = "board.png"
 
     rating = 2000
     import time
@@ -91,9 +156,7 @@ if __name__ == "__main__":
         board.push(chess.Move.from_uci(move))
 
         svg_board = chess.svg.board(board=board, size=400, lastmove=chess.Move.from_uci(move))
-        cairosvg.svg2png(bytestring=svg_board, write_to=temp_filename)
-        board_images.append(imageio.imread(temp_filename))
+        board_images.append(imageio.imread(cairosvg.svg2png(bytestring=svg_board)))
 
-    os.remove(temp_filename)
     print(f"{i} moves to do: {moves}")
     imageio.mimsave("solution.gif", board_images, duration=2000)
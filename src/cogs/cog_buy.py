@@ -1,12 +1,10 @@
 import copy
-import functools
 from interactions import Extension, auto_defer, component_callback, slash_command
 from math import ceil
 
 from constant import Constants
 from database import db
 import embed_messages
-from events import EventType, get_event_object
 import piflouz_handlers
 import user_profile
 import utils
@@ -205,7 +203,4 @@ class CogBuy(Extension):
         -------
         res (float)
         """
-        current_event = get_event_object(EventType.PASSIVE)
-        if current_event is not None:
-            return functools.reduce(lambda accu, powerup: accu * powerup.get_store_price_multiplier(), current_event.get_powerups(), 1)
-        return 1
+        return user_profile.get_event_modifiers().store_price
@@ -3,15 +3,16 @@ from interactions import Extension, OptionType, auto_defer, slash_command, slash
 from io import BytesIO
 from math import sqrt
 import matplotlib.pyplot as plt
-import os
 from PIL import Image
 import requests
 from time import time
 
+from attachments import make_file
 from constant import Constants
+from leaderboard import get_leaderboard
 from markdown import escape_markdown
 import piflouz_handlers
-import powerups  # Used for eval  # noqa: F401
+import powerups
 from seasons import bonus_ranking, reward_balance, reward_piflex
 import socials
 import user_profile
@@ -67,21 +68,23 @@ class CogStatusCheck(Extension):
         user (interactions.Member)
         """
         member = user or ctx.author
-        path = f"profile_{member.id}.png"
-        await asyncio.to_thread(self.save_profile_image, member, path, self.bot.user.id)
-        await ctx.send(file=path, ephemeral=True)
-        os.remove(path)
+        img = await asyncio.to_thread(self.get_profile_image, member, self.bot.user.id)
+        await ctx.send(file=make_file(img, f"profile_{member.id}", "png"), ephemeral=True)
 
     @staticmethod
-    def save_profile_image(member, path, bot_id):
+    def get_profile_image(member, bot_id):
         """
-        Generates and saves the profile image of a member
+        Generates the profile image of a member
 
         Parameters
         ----------
         member (interactions.Member)
-        path (str)
         bot_id (str/int)
+
+        Returns
+        -------
+        res (BytesIO):
+            the image, in PNG format
         """
         ### Creating the background
         background = Image.open("src/cogs/assets/profile.png")
@@ -166,42 +169,42 @@ class CogStatusCheck(Extension):
         ax.text(*daily_bonus_left_pos, daily_bonus_msg, fontsize=7, color="white", verticalalignment="center", horizontalalignment="left")
 
         ### Ranking & Roles
-        d_piflouz = dict(user_profile.get_inverted("piflouz_balance"))
-        d_piflex = dict(user_profile.get_inverted("discovered_piflex"))
-        d_donations = dict(user_profile.get_inverted("donation_balance"))
+        leaderboard_piflouz = get_leaderboard("piflouz_balance")
+        leaderboard_piflex = get_leaderboard("discovered_piflex")
+        leaderboard_donations = get_leaderboard("donation_balance")
 
         msg_piflouz = msg_piflex = msg_donations = ""
         rank_piflouz = rank_piflex = rank_donations = -1
 
-        if user_id in d_piflouz.keys():
-            amount_user = d_piflouz[user_id]
+        amount_user = leaderboard_piflouz.get_score(user_id)
+        if amount_user is not None:
             if amount_user <= 0:
                 msg_piflouz = "Piflouz ranking: N/A\n"
             else:
-                rank_piflouz = len([val for val in d_piflouz.values() if val > amount_user]) + 1
+                rank_piflouz = leaderboard_piflouz.get_rank(user_id)
                 rank_piflouz_str = str(rank_piflouz) if rank_piflouz <= 10 else "10+"
                 msg_piflouz = f"Piflouz ranking: {rank_piflouz_str}\n"
-                if rank_piflouz != 1: msg_piflouz += f"{max(d_piflouz.values()) - amount_user} below #1"
+                if rank_piflouz != 1: msg_piflouz += f"{leaderboard_piflouz.get_gap_to_first(user_id)} below #1"
 
-        if user_id in d_piflex.keys():
-            amount_user = len(d_piflex[user_id])
+        amount_user = leaderboard_piflex.get_score(user_id)
+        if amount_user is not None:
             if amount_user <= 0:
                 msg_piflex = "Piflex ranking: N/A\n"
             else:
-                rank_piflex = len([val for val in d_piflex.values() if len(val) > amount_user]) + 1
+                rank_piflex = leaderboard_piflex.get_rank(user_id)
                 rank_piflex_str = str(rank_piflex) if rank_piflex <= 10 else "10+"
                 msg_piflex = f"Piflex ranking: {rank_piflex_str}\n"
-                if rank_piflex != 1: msg_piflex += f"{max(len(val) for val in d_piflex.values()) - amount_user} below #1"
+                if rank_piflex != 1: msg_piflex += f"{leaderboard_piflex.get_gap_to_first(user_id)} below #1"
 
-        if user_id in d_donations.keys():
-            amount_user = d_donations[user_id]
+        amount_user = leaderboard_donations.get_score(user_id)
+        if amount_user is not None:
             if amount_user <= 0:
                 msg_donations = "Donation ranking: N/A\n"
             else:
-                rank_donations = len([val for val in d_donations.values() if val > amount_user]) + 1
+                rank_donations = leaderboard_donations.get_rank(user_id)
                 rank_donations_str = str(rank_donations) if rank_donations <= 10 else "10+"
                 msg_donations += f"Donation ranking: {rank_donations_str}\n"
-                if rank_donations != 1: msg_donations += f"{max(d_donations.values()) - amount_user} below #1"
+                if rank_donations != 1: msg_donations += f"{leaderboard_donations.get_gap_to_first(user_id)} below #1"
 
         piflouz_left_pos = (410, 430)
         piflex_left_pos = (785, 430)
@@ -218,7 +221,7 @@ class CogStatusCheck(Extension):
         ax.text(*piflex_left_pos, piflex_message, fontsize=7, color="white", verticalalignment="center", horizontalalignment="left")
 
         # Expected reward this season
-        tot_reward = reward_balance(profile["piflouz_balance"]) + reward_piflex(len(profile["discovered_piflex"]))
+        tot_reward = int(reward_balance(profile["piflouz_balance"])) + int(reward_piflex(len(profile["discovered_piflex"])))
         if 1 <= rank_piflouz <= len(bonus_ranking): tot_reward += bonus_ranking[rank_piflouz - 1]
         if 1 <= rank_piflex <= len(bonus_ranking): tot_reward += bonus_ranking[rank_piflex - 1]
         if 1 <= rank_donations <= len(bonus_ranking): tot_reward += bonus_ranking[rank_donations - 1]
@@ -257,7 +260,7 @@ class CogStatusCheck(Extension):
         ### Powerups
         content = ""
         for powerup_str in profile["powerups"]:
-            powerup = eval(powerup_str)
+            powerup = powerups.parse_powerup(powerup_str)
             info = powerup.get_info_str()
             if info != "":
                 data = info.split("\n")
@@ -269,5 +272,7 @@ class CogStatusCheck(Extension):
         content_left_pos = (955, 760)
         ax.text(*content_left_pos, content, fontsize=7, color="white", verticalalignment="center", horizontalalignment="left")
 
-        plt.savefig(path, bbox_inches="tight", pad_inches=0, dpi=300)
+        res = BytesIO()
+        plt.savefig(res, format="png", bbox_inches="tight", pad_inches=0, dpi=300)
         plt.close(fig)
+        return res
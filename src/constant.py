@@ -74,6 +74,10 @@ class Constants:
     TIMEZONE = timezone(os.getenv("TIMEZONE"))
     BOT_BIRTHDAY = os.getenv("BOT_BIRTHDAY")
     PROFILE_PICTURE_UPDATE_TIME = eval(os.getenv("PROFILE_PICTURE_UPDATE_TIME"))
+    PIFLOUZ_MESSAGE_RENDER_INTERVAL = int(os.getenv("PIFLOUZ_MESSAGE_RENDER_INTERVAL", 5))  # Minimum number of seconds between two edits of the piflouz message
+    PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", 2))  # Number of processes running the CPU-heavy jobs (see `process_pool`)
+    MATCH_RIDDLE_MIN_DIGITS = int(os.getenv("MATCH_RIDDLE_MIN_DIGITS", 0))  # Difficulty of the riddles drawn from the match riddle bank
+    MATCH_RIDDLE_MAX_DIGITS = int(os.getenv("MATCH_RIDDLE_MAX_DIGITS", 12))
 
     ### Costs
     PIFLEX_COST = int(os.getenv("PIFLEX_COST"))
@@ -0,0 +1,322 @@
+from functools import partial
+import os
+import pickle
+from shutil import rmtree
+import sqlite3
+import threading
+import time
+
+from .storage import UnloadedFolder, get_location, load_folder, recover_folder, remove_value, write_value
+from .wal import WriteAheadLog
+
+
+class StorageBackend:
+    """
+    Place where the raw values of the database are stored
+    Dictionaries may be read lazily: they are then returned as `UnloadedFolder` placeholders, which are read when accessed
+    """
+
+    supports_wal = False  # whether the write-ahead log of the database (see `WriteAheadLog`) can be used with the backend
+
+    def load(self, on_load=None):
+        """
+        Reads the root of the database, after cleaning the storage from interrupted writes
+
+        Parameters
+        ----------
+        on_load (function):
+            called with the path of each value read (keys separated by "/", "" for the root) and its loading time (in seconds)
+
+        Returns
+        -------
+        res (dict)
+        """
+        raise NotImplementedError
+
+    def read_all(self):
+        """
+        Reads the whole database, without any placeholder
+
+        Returns
+        -------
+        res (dict)
+        """
+        res = self.load()
+        to_visit = [res]
+        while len(to_visit) > 0:
+            content = to_visit.pop()
+            for key, value in content.items():
+                if type(value) is UnloadedFolder:
+                    value = value.load()
+                    content[key] = value
+                if type(value) is dict:
+                    to_visit.append(value)
+        return res
+
+    def write(self, changes):
+        """
+        Applies a batch of changes, in order
+
+        Parameters
+        ----------
+        changes (List[(str, tuple, any)]):
+            (op, path, value) where op is "set" or "del", path the keys leading from the root of the database to the value, and value the new value (only for "set")
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Removes everything from the storage
+        """
+        raise NotImplementedError
+
+    def make_backup(self, store, name):
+        """
+        Adds the current content of the storage to a backup store
+
+        Parameters
+        ----------
+        store (BackupStore)
+        name (str):
+            the name of the backup
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources used by the backend
+        """
+        pass
+
+
+class FolderBackend(StorageBackend):
+    """
+    Stores the database as a folder of pickles (see `storage`)
+    """
+
+    supports_wal = True
+
+    def __init__(self, folder):
+        """
+        Parameters
+        ----------
+        folder (str):
+            the folder where the database is stored
+        """
+        self.folder = folder
+        self.wal_folder = f"{folder}.wal"
+
+    def load(self, on_load=None):
+        if on_load is not None:
+            on_load = partial(self._on_load, on_load)
+
+        # The whole folder is cleaned from interrupted writes here, before the writer thread and the write-ahead log start
+        # Cleaning the subfolders when they are lazily loaded could undo writes happening at the same time
+        os.makedirs(self.folder, exist_ok=True)
+        recover_folder(self.folder)
+
+        # Changes logged but not yet folded into the database folder (e.g. after a crash)
+        if len(WriteAheadLog.get_segments(self.wal_folder)) > 0:
+            WriteAheadLog.replay(self.wal_folder, self.folder)
+
+        return load_folder(self.folder, on_load=on_load)
+
+    def write(self, changes):
+        for op, path, value in changes:
+            if op == "set":
+                write_value(get_location(self.folder, path), value)
+            else:
+                remove_value(get_location(self.folder, path))
+
+    def clear(self):
+        if os.path.isdir(self.folder):
+            rmtree(self.folder)
+        os.mkdir(self.folder)
+
+    def make_backup(self, store, name):
+        store.create(self.folder, name)
+
+    def _on_load(self, on_load, location, duration):
+        """
+        Converts a location of the folder to a database path before calling `on_load`
+
+        Parameters
+        ----------
+        on_load (function)
+        location (str)
+        duration (float)
+        """
+        path = os.path.relpath(location, self.folder).replace(os.sep, "/")
+        on_load("" if path == "." else path, duration)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Stores the database in a single SQLite file, with one row per value that is not a dictionary
+    Dictionaries have their own (empty) row, so that empty dictionaries are kept and that each of them can be read separately
+    Rows are indexed by their parent, so reading a dictionary only reads its direct children
+
+    The file uses SQLite's write-ahead journal, and each batch of changes is written in a single transaction
+    """
+
+    SEPARATOR = "/"
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path (str):
+            the file where the database is stored
+        """
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()  # The connection is shared by the main thread, the writer thread and the prefetching thread
+
+    def load(self, on_load=None):
+        return self._load_children("", on_load)
+
+    def write(self, changes):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("BEGIN")
+            try:
+                for op, path, value in changes:
+                    key = SQLiteBackend.SEPARATOR.join(str(k) for k in path)
+                    self._delete(connection, key)
+                    if op == "set":
+                        connection.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?)", SQLiteBackend._get_rows(key, value))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._get_connection().execute("DELETE FROM nodes")
+
+    def make_backup(self, store, name):
+        with self._lock:
+            rows = self._get_connection().execute("SELECT path, is_dict, value FROM nodes").fetchall()
+
+        folders = [path for path, is_dict, _ in rows if is_dict]
+        values = [(path, value) for path, is_dict, value in rows if not is_dict]
+        store.create_from_values(folders, values, name)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _get_connection(self):
+        """
+        Returns the connection to the database file, opening it the first time
+        Should be called while holding `self._lock`
+
+        Returns
+        -------
+        res (sqlite3.Connection)
+        """
+        if self._connection is None:
+            # Transactions are handled explicitly, to group each batch of changes
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable enough with the WAL journal, and much faster
+            connection.execute("CREATE TABLE IF NOT EXISTS nodes (path TEXT PRIMARY KEY, parent TEXT NOT NULL, is_dict INTEGER NOT NULL, value BLOB)")
+            connection.execute("CREATE INDEX IF NOT EXISTS nodes_parent ON nodes (parent)")
+            self._connection = connection
+        return self._connection
+
+    def _load_children(self, parent, on_load=None):
+        """
+        Reads a dictionary, its sub-dictionaries being `UnloadedFolder` placeholders
+
+        Parameters
+        ----------
+        parent (str):
+            path of the dictionary ("" for the root)
+        on_load (function):
+            see `StorageBackend.load`
+
+        Returns
+        -------
+        res (dict)
+        """
+        start = time.perf_counter()
+        with self._lock:
+            rows = self._get_connection().execute("SELECT path, is_dict, value FROM nodes WHERE parent = ?", (parent,)).fetchall()
+
+        res = dict()
+        for path, is_dict, value in rows:
+            name = path.rsplit(SQLiteBackend.SEPARATOR, 1)[-1]
+            if is_dict:
+                res[name] = UnloadedFolder(path, partial(self._load_children, on_load=on_load))
+            else:
+                res[name] = pickle.loads(value)
+
+        if on_load is not None:
+            on_load(parent, time.perf_counter() - start)
+        return res
+
+    @staticmethod
+    def _delete(connection, key):
+        """
+        Removes the row at a given path, along with all the rows below it
+
+        Parameters
+        ----------
+        connection (sqlite3.Connection)
+        key (str):
+            the path, with keys separated by `SQLiteBackend.SEPARATOR`
+        """
+        # "0" comes right after "/", so the paths below the key are exactly the ones in [key + "/", key + "0")
+        connection.execute("DELETE FROM nodes WHERE path = ? OR (path >= ? AND path < ?)", (key, key + SQLiteBackend.SEPARATOR, key + "0"))
+
+    @staticmethod
+    def _get_rows(key, value):
+        """
+        Returns the rows storing a value
+
+        Parameters
+        ----------
+        key (str):
+            the path of the value
+        value (any)
+
+        Returns
+        -------
+        res (List[(str, str, int, bytes)]):
+            (path, parent, is_dict, pickled value)
+        """
+        rows = []
+        to_visit = [(key, value)]
+        while len(to_visit) > 0:
+            path, val = to_visit.pop()
+            parent = path.rpartition(SQLiteBackend.SEPARATOR)[0]
+
+            if type(val) is dict:
+                rows.append((path, parent, 1, None))
+                to_visit.extend((f"{path}{SQLiteBackend.SEPARATOR}{k}", v) for k, v in val.items())
+            else:
+                rows.append((path, parent, 0, pickle.dumps(val)))
+        return rows
+
+
+def open_backend(kind, location):
+    """
+    Returns the backend of a given kind
+
+    Parameters
+    ----------
+    kind (str):
+        "folder" or "sqlite"
+    location (str):
+        the folder or file where the database is stored
+
+    Returns
+    -------
+    res (StorageBackend)
+    """
+    backends = {"folder": FolderBackend, "sqlite": SQLiteBackend}
+    assert kind in backends, f"Unknown database backend: {kind}"
+    return backends[kind](location)
@@ -0,0 +1,358 @@
+import datetime
+import hashlib
+import json
+import os
+import pickle
+from shutil import copyfile, rmtree
+
+from .storage import DELETED_SUFFIX, OLD_SUFFIX, TMP_SUFFIX
+
+
+class BackupStore:
+    """
+    Content-addressed store of database backups
+    Each `.dumped` file is stored once in `objects/`, named after the hash of its content
+    A backup is a manifest (in `manifests/`) associating each path of the database with the hash of its value
+    Each backup is also available as a regular database folder, made of hard links to the stored objects
+
+    Database files are never modified in place (see `storage.write_value`), so unchanged files are hard linked instead of copied
+    Hashes are cached using the inode, size and modification time of the files, so only the modified files are read
+    """
+
+    HASH_CACHE_FILE = "hash_cache.json"
+
+    def __init__(self, folder, keep_last=3, keep_daily=7, keep_weekly=4, keep_monthly=12):
+        """
+        Parameters
+        ----------
+        folder (str):
+            the folder where the backups are stored
+        keep_last (int):
+            number of most recent backups that are always kept
+        keep_daily (int):
+            number of days for which the last backup is kept
+        keep_weekly (int):
+            number of weeks for which the last backup is kept
+        keep_monthly (int):
+            number of months for which the last backup is kept
+        """
+        self.folder = folder
+        self.objects_folder = f"{folder}/objects"
+        self.manifests_folder = f"{folder}/manifests"
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+        self.keep_monthly = keep_monthly
+
+    def create(self, db_folder, name):
+        """
+        Creates a backup of a database folder
+
+        Parameters
+        ----------
+        db_folder (str):
+            the folder where the database is stored
+        name (str):
+            the name of the backup
+
+        Returns
+        -------
+        manifest (dict)
+        """
+        os.makedirs(self.objects_folder, exist_ok=True)
+        os.makedirs(self.manifests_folder, exist_ok=True)
+
+        hash_cache = self._load_hash_cache()
+        new_hash_cache = dict()
+        manifest = {"name": name, "created": datetime.datetime.now().timestamp(), "folders": [], "files": dict()}
+
+        for root, dirs, files in os.walk(db_folder):
+            dirs[:] = [d for d in dirs if not d.endswith((TMP_SUFFIX, OLD_SUFFIX, DELETED_SUFFIX))]
+            rel_root = os.path.relpath(root, db_folder).replace(os.sep, "/")
+            if rel_root != ".":
+                manifest["folders"].append(rel_root)
+
+            for file in files:
+                if not file.endswith(".dumped"): continue
+
+                path = f"{root}/{file}"
+                rel_path = file[:-7] if rel_root == "." else f"{rel_root}/{file[:-7]}"
+                stat = os.stat(path)
+                signature = [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+                cached = hash_cache.get(rel_path)
+                if cached is not None and cached[:3] == signature and os.path.exists(self._get_object_path(cached[3])):
+                    file_hash = cached[3]
+                else:
+                    file_hash = self._store_object(path)
+
+                new_hash_cache[rel_path] = signature + [file_hash]
+                manifest["files"][rel_path] = file_hash
+
+        self._write_json(f"{self.manifests_folder}/{name}.json", manifest)
+        self._write_json(f"{self.folder}/{BackupStore.HASH_CACHE_FILE}", new_hash_cache)
+        self._make_snapshot(manifest)
+        return manifest
+
+    def create_from_values(self, folders, values, name):
+        """
+        Creates a backup from already pickled values, for databases which are not stored as folders
+
+        Parameters
+        ----------
+        folders (List[str]):
+            paths of the dictionaries, with keys separated by "/"
+        values (List[(str, bytes)]):
+            path and pickled content of every other value
+        name (str):
+            the name of the backup
+
+        Returns
+        -------
+        manifest (dict)
+        """
+        os.makedirs(self.objects_folder, exist_ok=True)
+        os.makedirs(self.manifests_folder, exist_ok=True)
+
+        manifest = {"name": name, "created": datetime.datetime.now().timestamp(), "folders": list(folders), "files": dict()}
+        for rel_path, data in values:
+            file_hash = hashlib.sha256(data).hexdigest()
+            object_path = self._get_object_path(file_hash)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                with open(object_path + TMP_SUFFIX, "wb") as f:
+                    f.write(data)
+                os.replace(object_path + TMP_SUFFIX, object_path)
+
+            manifest["files"][rel_path] = file_hash
+
+        self._write_json(f"{self.manifests_folder}/{name}.json", manifest)
+        self._make_snapshot(manifest)
+        return manifest
+
+    def list_backups(self):
+        """
+        Returns the manifests of all the backups, from the oldest to the most recent
+
+        Returns
+        -------
+        res (List[dict])
+        """
+        if not os.path.isdir(self.manifests_folder): return []
+
+        manifests = [self._read_json(f"{self.manifests_folder}/{name}") for name in os.listdir(self.manifests_folder) if name.endswith(".json")]
+        return sorted(manifests, key=lambda manifest: manifest["created"])
+
+    def load(self, name):
+        """
+        Reads the content of a backup
+
+        Parameters
+        ----------
+        name (str):
+            the name of the backup
+
+        Returns
+        -------
+        res (dict)
+        """
+        manifest = self._read_json(f"{self.manifests_folder}/{name}.json")
+        res = dict()
+
+        for folder in manifest["folders"]:
+            BackupStore._get_parent(res, folder.split("/") + [None])
+
+        for path, file_hash in manifest["files"].items():
+            keys = path.split("/")
+            with open(self._get_object_path(file_hash), "rb") as f:
+                BackupStore._get_parent(res, keys)[keys[-1]] = pickle.load(f)
+
+        return res
+
+    def apply_retention(self):
+        """
+        Removes the backups that are not needed anymore, keeping the most recent ones and the last backup of the last days, weeks and months
+        The objects that are not used by any backup are removed as well
+
+        Returns
+        -------
+        removed (List[str]):
+            the names of the removed backups
+        """
+        manifests = self.list_backups()
+
+        periods = [
+            (self.keep_daily, lambda date: date.date()),
+            (self.keep_weekly, lambda date: date.isocalendar()[:2]),
+            (self.keep_monthly, lambda date: (date.year, date.month))
+        ]
+
+        kept = set(manifest["name"] for manifest in manifests[max(0, len(manifests) - self.keep_last):])
+        for nb_periods, get_period in periods:
+            seen_periods = set()
+            for manifest in reversed(manifests):
+                period = get_period(datetime.datetime.fromtimestamp(manifest["created"]))
+                if period in seen_periods: continue
+                if len(seen_periods) == nb_periods: break
+
+                seen_periods.add(period)
+                kept.add(manifest["name"])
+
+        removed = []
+        for manifest in manifests:
+            if manifest["name"] in kept: continue
+
+            os.remove(f"{self.manifests_folder}/{manifest['name']}.json")
+            if os.path.isdir(f"{self.folder}/{manifest['name']}"):
+                rmtree(f"{self.folder}/{manifest['name']}")
+            removed.append(manifest["name"])
+
+        if len(removed) > 0:
+            self._collect_garbage()
+        return removed
+
+    def _store_object(self, path):
+        """
+        Hashes a file and adds it to the objects if needed
+
+        Parameters
+        ----------
+        path (str)
+
+        Returns
+        -------
+        res (str):
+            the hash of the file
+        """
+        with open(path, "rb") as f:
+            file_hash = hashlib.file_digest(f, "sha256").hexdigest()
+
+        object_path = self._get_object_path(file_hash)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            BackupStore._link_or_copy(path, object_path)
+
+        return file_hash
+
+    def _make_snapshot(self, manifest):
+        """
+        Creates a regular database folder for a backup, using hard links to the objects
+
+        Parameters
+        ----------
+        manifest (dict)
+        """
+        snapshot = f"{self.folder}/{manifest['name']}"
+        if os.path.isdir(snapshot):
+            rmtree(snapshot)
+        os.makedirs(snapshot)
+
+        for folder in manifest["folders"]:
+            os.makedirs(f"{snapshot}/{folder}", exist_ok=True)
+
+        for path, file_hash in manifest["files"].items():
+            BackupStore._link_or_copy(self._get_object_path(file_hash), f"{snapshot}/{path}.dumped")
+
+    def _collect_garbage(self):
+        """
+        Removes the objects which are not used by any backup
+        """
+        used = set()
+        for manifest in self.list_backups():
+            used.update(manifest["files"].values())
+
+        for prefix in os.listdir(self.objects_folder):
+            for name in os.listdir(f"{self.objects_folder}/{prefix}"):
+                if name[:-7] not in used:
+                    os.remove(f"{self.objects_folder}/{prefix}/{name}")
+
+    def _get_object_path(self, file_hash):
+        """
+        Returns the path of the object with a given hash
+
+        Parameters
+        ----------
+        file_hash (str)
+
+        Returns
+        -------
+        res (str)
+        """
+        return f"{self.objects_folder}/{file_hash[:2]}/{file_hash}.dumped"
+
+    def _load_hash_cache(self):
+        """
+        Returns the hashes computed during the last backup
+
+        Returns
+        -------
+        res (dict):
+            path -> [inode, size, modification time, hash]
+        """
+        path = f"{self.folder}/{BackupStore.HASH_CACHE_FILE}"
+        if not os.path.exists(path): return dict()
+
+        return self._read_json(path)
+
+    @staticmethod
+    def _get_parent(root, keys):
+        """
+        Returns the dictionary containing the value at a given path, creating the missing dictionaries
+
+        Parameters
+        ----------
+        root (dict)
+        keys (List[str])
+
+        Returns
+        -------
+        res (dict)
+        """
+        for key in keys[:-1]:
+            root = root.setdefault(key, dict())
+        return root
+
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """
+        Creates a hard link to a file, or copies it if links are not supported
+
+        Parameters
+        ----------
+        src (str)
+        dst (str)
+        """
+        try:
+            os.link(src, dst)
+        except OSError:
+            copyfile(src, dst)
+
+    @staticmethod
+    def _read_json(path):
+        """
+        Parameters
+        ----------
+        path (str)
+
+        Returns
+        -------
+        res (any)
+        """
+        with open(path, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(path, value):
+        """
+        Writes a json file atomically
+
+        Parameters
+        ----------
+        path (str)
+        value (any)
+        """
+        with open(path + TMP_SUFFIX, "w") as f:
+            json.dump(value, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + TMP_SUFFIX, path)
@@ -1,4 +1,4 @@
-from my_database import ElementDict, ElementList, db
+import os
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QAction, QIcon, QKeyEvent
 from PyQt6.QtWidgets import QApplication, QDialog, QMenu, QTreeWidgetItem
@@ -6,6 +6,11 @@ from PyQt6.uic import loadUi
 import sys
 
 
+# The editor is run as a script, so the `database` package has to be made importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.my_database import ElementDict, ElementList, db  # noqa: E402
+
+
 class ItemType:
     DICT = 1
     LIST = 2
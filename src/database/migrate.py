@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+
+# The migration tool is run as a script, so the `database` package has to be made importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.backends import open_backend  # noqa: E402
+
+
+def migrate(source, target):
+    """
+    Copies the whole content of a storage backend to another one, replacing everything stored in the target
+
+    Parameters
+    ----------
+    source (StorageBackend)
+    target (StorageBackend)
+
+    Returns
+    -------
+    res (int):
+        the number of top-level keys copied
+    """
+    content = source.read_all()
+    target.clear()
+    target.write([("set", (key,), value) for key, value in content.items()])
+
+    assert target.read_all() == content, "The migrated database differs from the original one"
+    return len(content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copies the database from one storage backend to another. The bot should not be running.")
+    parser.add_argument("source_kind", choices=["folder", "sqlite"])
+    parser.add_argument("source", help="folder or file where the database is currently stored")
+    parser.add_argument("target_kind", choices=["folder", "sqlite"])
+    parser.add_argument("target", help="folder or file where the database will be stored")
+    args = parser.parse_args()
+
+    source = open_backend(args.source_kind, args.source)
+    target = open_backend(args.target_kind, args.target)
+
+    start = time.perf_counter()
+    nb_keys = migrate(source, target)
+    print(f"Migrated {nb_keys} top-level keys from {args.source} to {args.target} in {time.perf_counter() - start:.2f}s")
+
+    source.close()
+    target.close()
@@ -1,6 +1,42 @@
+import asyncio
+import atexit
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import copy
+import logging
 import os
-import pickle
-from shutil import rmtree
+import threading
+
+from .backends import FolderBackend, SQLiteBackend
+from .backups import BackupStore
+from .storage import UnloadedFolder, read_folder, write_value
+from .wal import WriteAheadLog
+
+
+logger = logging.getLogger("custom_log")
+
+
+def _get_loaded(container, key):
+    """
+    Returns the value associated with a key in a dictionary of the database, loading it from the disk if it was not loaded yet
+
+    Parameters
+    ----------
+    container (dict)
+    key (str)
+
+    Returns
+    -------
+    res (any)
+    """
+    value = dict.__getitem__(container, key)
+    if type(value) is UnloadedFolder:
+        location = value.location
+        value = value.load()
+        dict.__setitem__(container, key, value)
+        db._check_loaded_folder(value, location)  # Each folder is checked once, when it is first accessed
+    return value
 
 
 # Mutable elements in the database
@@ -10,12 +46,10 @@ class Element:
     Class for mutable elements in the database
     """
 
-    element = None
-
-    parent_dict = None  # parent information to optimize data saving on changes
-    parent_key = ""
-
-    stop_parent_propagation = False  # If a dict is in a list, we have to save the whole list, not a specific dict key, so we don't propagate the parent
+    # element: the actual list or dict
+    # parent_dict, parent_key: parent information to optimize data saving on changes
+    # stop_parent_propagation: if a dict is in a list, we have to save the whole list, not a specific dict key, so we don't propagate the parent
+    __slots__ = ("element", "parent_dict", "parent_key", "stop_parent_propagation")
 
     def __init__(self, parent, parent_key, element, stop_parent_propagation=False):
         self.parent_dict = parent
@@ -56,6 +90,8 @@ class Element:
             return list(Element.convert_from_element(item) for item in item.element)
         elif type(item) is ElementDict:
             return dict((key, Element.convert_from_element(value)) for key, value in item.element.items())
+        elif type(item) is UnloadedFolder:
+            return dict((key, Element.convert_from_element(value)) for key, value in item.load().items())
         else:
             return item
 
@@ -74,25 +110,28 @@ class Element:
         Implements the general clear method
         """
         self.element.clear()
-        self.parent_dict.save_key(self.parent_key, db.folder)
+        self.save_parent()
 
     def __setitem__(self, key, value):
         assert db._check_if_acceptable(value), "Value could not be set because it contains an unacceptable type"
         assert db._check_if_acceptable(key), "Key could not be set because it contains an unacceptable type"
         self.element[key] = Element.convert_from_element(value)
 
-        if self.parent_dict is not None:
-            self.parent_dict.save_key(self.parent_key, db.folder)
-        else:  # if the element is the root of the database, it's necessarily a dict
+        if self.parent_dict is None:  # if the element is the root of the database, it's necessarily a dict
             self.save_key(self.parent_key, db.folder)
+        elif db.wal is not None and self.is_stored_alone() and type(key) is int:
+            # Only the modified item is logged, not the whole list
+            db.mark_dirty(self.get_path() + (key % len(self.element),))
+        else:
+            self.save_parent()
 
     def __delitem__(self, key) -> None:
         del self.element[key]
 
-        if self.parent_dict is not None:
-            self.parent_dict.save_key(self.parent_key, db.folder)
-        else:  # if the element is the root of the database, it's necessarily a dict
+        if self.parent_dict is None:  # if the element is the root of the database, it's necessarily a dict
             self.save_key(self.parent_key, db.folder)
+        else:
+            self.save_parent()
 
     def __getitem__(self, key):
         return Element.convert_to_element(self.element[key], self.parent_dict, self.parent_key, self.stop_parent_propagation)
@@ -130,12 +169,44 @@ class Element:
 
         return self.parent_dict.get_folder_path(root_folder) + f"/{self.parent_key}"
 
+    def get_path(self):
+        """
+        Returns the keys leading from the root of the database to the element
+        For lists and dictionaries inside lists, this is the path of the list stored in the parent dictionary
+
+        Returns
+        -------
+        res (tuple)
+        """
+        if self.parent_dict is None:
+            return ()
+
+        return self.parent_dict.get_path() + (self.parent_key,)
+
+    def is_stored_alone(self):
+        """
+        Checks if the element is the value stored in its parent dictionary, and not an element nested in that value
+
+        Returns
+        -------
+        res (bool)
+        """
+        return self.parent_dict is not None and self.parent_dict.element.get(self.parent_key) is self.element
+
+    def save_parent(self):
+        """
+        Saves the value stored in the parent dictionary, which contains the element
+        """
+        db.mark_dirty(self.get_path())
+
 
 class ElementList(Element):
     """
     Class for mutable lists in the database
     """
 
+    __slots__ = ()
+
     def __init__(self, parent_dict, parent_key, element):
         assert type(element) is list
         super().__init__(parent_dict, parent_key, element, stop_parent_propagation=True)
@@ -152,6 +223,7 @@ class ElementList(Element):
         -------
         res (Element_list)
         """
+        assert db._check_if_acceptable(other), "Value could not be added because it contains an unacceptable type"
         return ElementList(self.parent_dict, self.parent_key, self.element + other)
 
     def append(self, item):
@@ -165,7 +237,11 @@ class ElementList(Element):
         assert db._check_if_acceptable(item), "Value could not be appended because it contains an unacceptable type"
         self.element.append(Element.convert_from_element(item))
 
-        self.parent_dict.save_key(self.parent_key, db.folder)
+        if db.wal is not None and self.is_stored_alone():
+            # Only the new item is logged, not the whole list
+            db.mark_dirty(self.get_path() + (len(self.element) - 1,))
+        else:
+            self.save_parent()
 
 
 class ElementDict(Element):
@@ -173,6 +249,8 @@ class ElementDict(Element):
     Class for mutable dictionaries in the database
     """
 
+    __slots__ = ()
+
     def __init__(self, parent_dict, parent_key, element, stop_parent_propagation=False):
         assert isinstance(element, dict)
         super().__init__(parent_dict, parent_key, element, stop_parent_propagation)
@@ -213,11 +291,15 @@ class ElementDict(Element):
         return ElementDictItems(self.element.items(), self, self.parent_key, self.stop_parent_propagation)
 
     def __setitem__(self, key, value):
+        if self.parent_dict is None:  # The root is handled by the database itself
+            self.element[key] = value
+            return
+
         assert db._check_if_acceptable(value), "Value could not be set because it contains an unacceptable type"
         assert db._check_if_acceptable(key), "Key could not be set because it contains an unacceptable type"
         self.element[key] = Element.convert_from_element(value)
         if self.stop_parent_propagation:
-            self.parent_dict.save_key(self.parent_key, db.folder)
+            self.save_parent()
         else:
             self.save_key(key, db.folder)
 
@@ -225,18 +307,14 @@ class ElementDict(Element):
         del self.element[key]
 
         if self.stop_parent_propagation:  # if the dict is in a list, the key is not saved as it's own file
-            self.parent_dict.save_key(self.parent_key, db.folder)
-        else:
-            path = f"{self.get_folder_path(db.folder)}/{key}"
-            if os.path.exists(path) and os.path.isdir(path):
-                rmtree(path)
-            elif os.path.exists(path + ".dumped"):
-                os.remove(path + ".dumped")
+            self.save_parent()
+        elif self.parent_dict is not None:  # The root is handled by the database itself
+            db.mark_dirty(self.get_path() + (key,))
 
     def __getitem__(self, key):
         if self.stop_parent_propagation:
             return Element.convert_to_element(self.element[key], self.parent_dict, self.parent_key, self.stop_parent_propagation)
-        return Element.convert_to_element(self.element[key], self, key, self.stop_parent_propagation)
+        return Element.convert_to_element(_get_loaded(self.element, key), self, key, self.stop_parent_propagation)
 
     def save(self, root_folder):
         """
@@ -272,43 +350,32 @@ class ElementDict(Element):
         if not db.is_loaded:
             return
 
+        if root_folder == db.folder:  # The actual write is done later, along with the other changes
+            db.mark_dirty(self.get_path() + (key,))
+            return
+
         value = self[key]
         subfolder = self.get_folder_path(root_folder)
 
         if not os.path.exists(subfolder):
             os.mkdir(subfolder)
 
-        # Deletes everything in the subfolder if it's a dict
+        # Replaces everything previously stored with this key
         # This allows the removal of items if e.g. db["a"] = dict() is called, where "a" was previously a dict
-        if os.path.isdir(f"{subfolder}/{key}"):
-            rmtree(f"{subfolder}/{key}")
-
-        if isinstance(value, ElementDict):
-            value.save(root_folder)
-        else:
-            pickle.dump(Element.convert_from_element(value), open(f"{subfolder}/{key}.dumped", "wb"))
+        write_value(f"{subfolder}/{key}", Element.convert_from_element(value))
 
     def load(self, folder):
         """
         Loads the dictionary from the specified folder
+        The values are not checked nor saved again, since they were written by the database itself
+        The subfolders are only loaded when they are accessed
 
         Parameters
         ----------
         folder (str):
             the folder where the dictionary will be loaded from
         """
-        keys = os.listdir(folder)
-
-        if len(keys) == 0:
-            return
-
-        for key in keys:
-            if os.path.isdir(f"{folder}/{key}"):
-                d = ElementDict(self, key, {})
-                d.load(f"{folder}/{key}")
-                self[key] = Element.convert_from_element(d)
-            else:
-                self[key[:-7]] = pickle.load(open(f"{folder}/{key}", "rb"))
+        self.element.update(read_folder(folder, lazy=True))
 
     def __str__(self):
         if len(self.element) == 0:
@@ -329,6 +396,8 @@ class ElementDictIterator:
     Class for the iterators generated from .keys(), .values() and .items() methods of Element_dict
     """
 
+    __slots__ = ("collection", "parent_dict", "parent_key", "iterator", "stop_parent_propagation")
+
     def __init__(self, collection, parent_dict, parent_key, stop_parent_propagation=False):
         self.collection = collection
         self.parent_dict = parent_dict
@@ -354,10 +423,12 @@ class ElementDictIterator:
 
 
 class ElementDictKeys(ElementDictIterator):
-    pass
+    __slots__ = ()
 
 
 class ElementDictValues(ElementDictIterator):
+    __slots__ = ("iterator_keys",)
+
     def __iter__(self):
         self.iterator = iter(self.collection)
         self.iterator_keys = iter(self.parent_dict.element.keys())
@@ -365,6 +436,8 @@ class ElementDictValues(ElementDictIterator):
 
     def __next__(self):
         key, value = next(self.iterator_keys), next(self.iterator)
+        if type(value) is UnloadedFolder:
+            value = _get_loaded(self.parent_dict.element, key)
 
         if self.stop_parent_propagation:
             return Element.convert_to_element(value, self.parent_dict, self.parent_key, self.stop_parent_propagation)
@@ -372,14 +445,121 @@ class ElementDictValues(ElementDictIterator):
 
 
 class ElementDictItems(ElementDictIterator):
+    __slots__ = ()
+
     def __next__(self):
         key, value = next(self.iterator)
+        if type(value) is UnloadedFolder:
+            value = _get_loaded(self.parent_dict.element, key)
         # Here, `parent_dict` is actually the child dict, so the actual parent is `parent_dict.parent_dict`
         if self.stop_parent_propagation:
             return (Element.convert_to_element(key, self.parent_dict.parent_dict, self.parent_key, self.stop_parent_propagation), Element.convert_to_element(value, self.parent_dict.parent_dict, self.parent_key, self.stop_parent_propagation))
         return (Element.convert_to_element(key, self.parent_dict.parent_dict, self.parent_key, self.stop_parent_propagation), Element.convert_to_element(value, self.parent_dict, key, self.stop_parent_propagation))
 
 
+# Read-only views of the database
+# They give access to the stored values without tracking the parents, for code that only reads the database
+class DictView(Mapping):
+    """
+    Read-only view of a dictionary of the database
+    """
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    @staticmethod
+    def wrap(value):
+        """
+        Returns a read-only view of a database value
+        No effect if the value is not a list or a dict
+
+        Parameters
+        ----------
+        value (any)
+
+        Returns
+        -------
+        res (DictView, ListView or any)
+        """
+        value_type = type(value)
+        if value_type is dict or value_type is MyDatabase:
+            return DictView(value)
+        elif value_type is list:
+            return ListView(value)
+        return value
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self._value, key)
+        if type(value) is UnloadedFolder:
+            value = _get_loaded(self._value, key)
+        return DictView.wrap(value)
+
+    def __iter__(self):
+        return iter(self._value)
+
+    def __len__(self):
+        return len(self._value)
+
+    def __contains__(self, key):
+        return key in self._value
+
+    def keys(self):
+        return self._value.keys()
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def items(self):
+        for key, value in dict.items(self._value):
+            if type(value) is UnloadedFolder:
+                value = _get_loaded(self._value, key)
+            yield key, DictView.wrap(value)
+
+    def __str__(self):
+        return str(self._value)
+
+    def __repr__(self):
+        return f"DictView({self._value!r})"
+
+
+class ListView(Sequence):
+    """
+    Read-only view of a list of the database
+    """
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return [DictView.wrap(item) for item in self._value[index]]
+        return DictView.wrap(self._value[index])
+
+    def __iter__(self):
+        return map(DictView.wrap, self._value)
+
+    def __len__(self):
+        return len(self._value)
+
+    def __contains__(self, item):
+        return item in self._value
+
+    def __eq__(self, other):
+        if isinstance(other, ListView):
+            other = other._value
+        return self._value == other
+
+    def __str__(self):
+        return str(self._value)
+
+    def __repr__(self):
+        return f"ListView({self._value!r})"
+
+
 class MyDatabase(dict):
     """
     Dictionary-based database with automatic saving and loading
@@ -388,13 +568,33 @@ class MyDatabase(dict):
     ACCEPTABLE_TYPES_DEFAULT = [int, float, str, bool, type(None)]
     ACCEPTABLE_TYPES_COLLECTION = [list, dict, ElementList, ElementDict]
 
-    folder = None  # folder where the database is stored
+    # Elements and unloaded folders come from the database, so their content was already checked
+    _LEAF_TYPES = frozenset(ACCEPTABLE_TYPES_DEFAULT)
+    _CHECKED_TYPES = frozenset([ElementList, ElementDict, UnloadedFolder])
+
+    folder = None  # folder (or file for the SQLite backend) where the database is stored
+
+    backend = None  # storage backend, `FolderBackend` of `folder` if not set before loading
 
     is_loaded = False  # prevents the database from writing before it is fully loaded
 
+    wal = None  # write-ahead log, if enabled
+
+    flush_interval = None  # delay (in seconds) before writing the changes, None to write them right away
+
+    writer = None  # thread executing the disk writes in order, if enabled
+
     def __init__(self, folder: str = None) -> None:
         self.folder = folder
 
+        self._dirty_paths = dict()  # paths of the values to write, in the order they were modified
+        self._flush_handle = None
+        self.write_stats = {"coalesced": 0, "performed": 0}
+        self.load_timings = dict()  # top-level key -> time (in seconds) spent loading it from the disk
+        self._root_element = None
+        self._trusted_writes = False
+        self._write_hooks = []
+
         if folder is not None:
             self._load(folder)
 
@@ -403,6 +603,8 @@ class MyDatabase(dict):
     def _check_if_acceptable(self, value):
         """
         Verifies if a value has a type acceptable for the database
+        Only the new parts of the value are visited: elements already stored in the database are not checked again
+        Always accepts the value inside a `MyDatabase.trusted_writes` block
 
         Parameters
         ----------
@@ -412,41 +614,333 @@ class MyDatabase(dict):
         -------
         res (bool)
         """
-        if type(value) in self.ACCEPTABLE_TYPES_DEFAULT:
+        if type(value) in self._LEAF_TYPES or self._trusted_writes:
             return True
 
-        if type(value) in self.ACCEPTABLE_TYPES_COLLECTION:
-            return all(self._check_if_acceptable(item) for item in value)
+        to_check = [value]
+        while len(to_check) > 0:
+            item = to_check.pop()
+            item_type = type(item)
+
+            if item_type in self._LEAF_TYPES or item_type in self._CHECKED_TYPES:
+                continue
+            elif item_type is list:
+                to_check.extend(item)
+            elif item_type is dict:
+                to_check.extend(item.keys())
+                to_check.extend(item.values())
+            else:
+                return False
+
+        return True
+
+    @contextmanager
+    def trusted_writes(self):
+        """
+        Context manager disabling the type checks of the values written in the block
+        Only for internal callers writing values which are known to be acceptable
+        """
+        previous = self._trusted_writes
+        self._trusted_writes = True
+        try:
+            yield
+        finally:
+            self._trusted_writes = previous
+
+    def _check_loaded_folder(self, content: dict, location: str) -> None:
+        """
+        Verifies that the values read from a folder of the database are acceptable, and logs the ones that are not
+        The subfolders are checked when they are loaded
 
-        return False
+        Parameters
+        ----------
+        content (dict):
+            the content of the folder
+        location (str):
+            the location of the folder
+        """
+        for key, value in content.items():
+            if not self._check_if_acceptable(value):
+                logger.error(f"The database value at {location}/{key} contains an unacceptable type")
 
     def __getitem__(self, key):
-        return Element.convert_to_element(super().__getitem__(key), self.to_element(), key, stop_parent_propagation=False)
+        return Element.convert_to_element(_get_loaded(self, key), self.to_element(), key, stop_parent_propagation=False)
+
+    def view(self, *keys):
+        """
+        Returns a read-only view of a value of the database
+        Reading through the view is faster than through the usual elements, but the value cannot be modified with it
+
+        Parameters
+        ----------
+        keys (any):
+            keys leading from the root of the database to the value (the whole database if there is none)
+
+        Returns
+        -------
+        res (DictView, ListView or any)
+        """
+        value = self
+        for key in keys:
+            value = _get_loaded(value, key) if isinstance(value, dict) else value[key]
+        return DictView.wrap(value)
 
     # set an item
     def __setitem__(self, key, value):
         assert self._check_if_acceptable(value), "Value could not be set because it contains an unacceptable type"
         assert self._check_if_acceptable(key), "Key could not be set because it contains an unacceptable type"
         super().__setitem__(key, Element.convert_from_element(value))
-        if self.is_loaded:
-            self.to_element().save_key(key, self.folder)
+        self.mark_dirty((key,))
 
     # delete an item
     def __delitem__(self, key):
         super().__delitem__(key)
+        self.mark_dirty((key,))
+
+    ### Write scheduling ###
 
-        if os.path.exists(f"{self.folder}/{key}.dumped"):
-            os.remove(f"{self.folder}/{key}.dumped")
-        elif os.path.exists(f"{self.folder}/{key}"):
-            rmtree(f"{self.folder}/{key}")
+    def enable_delayed_flush(self, interval: float = 0.1) -> None:
+        """
+        Delays the writes of the changes, so that the changes made to the same value in a short time are written only once
+        The writes are only delayed when an event loop is running, and the remaining changes are written when the program exits
+
+        Parameters
+        ----------
+        interval (float):
+            time (in seconds) between a change and its write
+        """
+        if self.flush_interval is None:
+            atexit.register(self.flush)
+
+        self.flush_interval = interval
+
+    def mark_dirty(self, path: tuple) -> None:
+        """
+        Registers that the value at a given path was modified and has to be written
+        If the value or one of its ancestors is already waiting to be written, the writes are coalesced
+
+        Parameters
+        ----------
+        path (tuple):
+            keys leading from the root of the database to the modified value
+        """
+        if not self.is_loaded:
+            return
+
+        for hook in self._write_hooks:
+            hook(path)
+
+        if any(path[:i] in self._dirty_paths for i in range(1, len(path) + 1)):
+            self.write_stats["coalesced"] += 1
+        else:
+            descendants = [dirty_path for dirty_path in self._dirty_paths if dirty_path[:len(path)] == path]
+            for dirty_path in descendants:
+                del self._dirty_paths[dirty_path]
+
+            self.write_stats["coalesced"] += len(descendants)
+            self._dirty_paths[path] = None
+
+        self._schedule_flush()
+
+    def add_write_hook(self, hook) -> None:
+        """
+        Registers a function called with the path of every value modified in the database, right after the change
+        Used to keep data derived from the database up to date
+
+        Parameters
+        ----------
+        hook (function):
+            called with a tuple of keys leading from the root of the database to the modified value
+        """
+        self._write_hooks.append(hook)
+
+    def _schedule_flush(self) -> None:
+        """
+        Writes the changes right away, or schedules the write if it should be delayed
+        """
+        if self._flush_handle is not None:
+            return
+
+        if self.flush_interval is not None:
+            try:
+                loop = asyncio.get_running_loop()
+                self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+                return
+            except RuntimeError:  # No event loop, e.g. in the database editor
+                pass
+
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes all the changes waiting to be written
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        paths, self._dirty_paths = self._dirty_paths, dict()
+        if len(paths) == 0:
+            return
+
+        changes = []
+        for path in paths:
+            try:
+                op, value = "set", self._get_raw_value(path)
+            except (KeyError, IndexError):
+                op, value = "del", None
+
+            if self.wal is not None:
+                self.wal.append(op, path, value)  # The value is serialized right away, and written by the log thread
+            elif self.writer is not None:
+                changes.append((op, path, copy.deepcopy(value)))  # The value is copied so that it can be modified while it is being written
+            else:
+                changes.append((op, path, value))
+
+            self.write_stats["performed"] += 1
+
+        # All the changes of a flush are written as a single batch
+        if len(changes) == 0:
+            return
+        elif self.writer is not None:
+            self.writer.submit(self._write, changes)
+        else:
+            self._write(changes)
+
+    async def flushed(self) -> None:
+        """
+        Waits until all the changes made so far are written on disk
+        """
+        self.flush()
+
+        if self.writer is not None:
+            await asyncio.wrap_future(self.writer.submit(self._sync_wal))
         else:
-            print("something went wrong")
+            self._sync_wal()
+
+    def enable_writer_thread(self) -> None:
+        """
+        Moves the disk writes to a dedicated thread, so that they do not block the event loop
+        The database is still modified right away in memory, and the writes are done in the order of the changes
+        """
+        if self.writer is not None:
+            return
+
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database-writer")
+        atexit.register(self.disable_writer_thread)
+
+    def disable_writer_thread(self) -> None:
+        """
+        Waits for the writer thread to finish its writes and goes back to writing from the calling thread
+        """
+        if self.writer is None:
+            return
+
+        self.writer.shutdown(wait=True)
+        self.writer = None
+        self.flush()
+
+    def _sync_wal(self) -> None:
+        """
+        Makes sure all the records of the write-ahead log are on disk
+        """
+        if self.wal is not None:
+            self.wal.sync()
+
+    def _write(self, changes: list) -> None:
+        """
+        Writes a batch of changes with the storage backend
+
+        Parameters
+        ----------
+        changes (List[(str, tuple, any)]):
+            see `StorageBackend.write`
+        """
+        try:
+            self.backend.write(changes)
+        except Exception:
+            logger.exception(f"Could not write the database changes at {[path for _, path, _ in changes]}")
+            raise
+
+    def _get_raw_value(self, path: tuple):
+        """
+        Returns the value stored at a given path, as stored in the database (not converted to an Element)
+
+        Parameters
+        ----------
+        path (tuple):
+            keys leading from the root of the database to the value
+
+        Returns
+        -------
+        res (any)
+        """
+        value = self
+        for key in path:
+            value = _get_loaded(value, key) if isinstance(value, dict) else value[key]
+        return value
+
+    ### Write-ahead log ###
+
+    def enable_wal(self, sync_interval: float = 0.05, compact_interval: float = 60) -> None:
+        """
+        Switches the database to write-ahead log mode
+        Instead of rewriting the modified files on every change, changes are appended to a log which is fsynced by batches
+        The log is periodically folded into the database folder, and fully folded when the program exits
+
+        Parameters
+        ----------
+        sync_interval (float):
+            time (in seconds) between two writes of the log
+        compact_interval (float):
+            time (in seconds) between two foldings of the log into the database folder
+        """
+        if self.wal is not None:
+            return
+
+        if not self.backend.supports_wal:  # e.g. SQLite, which has its own journal
+            logger.info(f"The write-ahead log is not used with the {type(self.backend).__name__} backend")
+            return
+
+        self.wal = WriteAheadLog(self.backend.wal_folder, self.backend.folder, sync_interval, compact_interval)
+        self.wal.open()
+        atexit.register(self.disable_wal)
+
+    def disable_wal(self) -> None:
+        """
+        Folds the whole write-ahead log into the database folder and goes back to direct writes
+        """
+        if self.wal is None:
+            return
+
+        self.flush()
+        self.wal.close()
+        self.wal = None
 
     ### I/O ###
 
     def make_backup(self, parent_folder: str = "backups", folder: str = "database") -> None:
         """
         Creates a backup of the database in the specified folder
+        The backups are stored in a content-addressed store (see `BackupStore`), and the old ones are removed following its retention policy
+
+        Parameters
+        ----------
+        parent_folder (str):
+            the parent folder where the backup will be stored
+        folder (str):
+            the name of the folder where the backup will be stored
+        """
+        self.flush()
+
+        if self.writer is not None:
+            self.writer.submit(self._write_backup, parent_folder, folder)
+        else:
+            self._write_backup(parent_folder, folder)
+
+    def _write_backup(self, parent_folder: str, folder: str) -> None:
+        """
+        Adds the current content of the database to the backups
 
         Parameters
         ----------
@@ -455,12 +949,16 @@ class MyDatabase(dict):
         folder (str):
             the name of the folder where the backup will be stored
         """
-        if not os.path.exists(parent_folder):
-            os.mkdir(parent_folder)
-        if not os.path.exists(f"{parent_folder}/{folder}"):
-            os.mkdir(f"{parent_folder}/{folder}")
+        try:
+            if self.wal is not None:  # The database folder has to contain all the logged changes
+                self.wal.compact()
 
-        self._save(f"{parent_folder}/{folder}")
+            store = BackupStore(parent_folder)
+            self.backend.make_backup(store, folder)
+            store.apply_retention()
+        except Exception:
+            logger.exception(f"Could not create the backup {folder}")
+            raise
 
     def _save(self, folder: str = None) -> None:
         """
@@ -478,26 +976,106 @@ class MyDatabase(dict):
 
     def _load(self, folder: str = None) -> None:
         """
-        Loads the database from the specified folder
+        Loads the database from its storage backend, or from the specified folder
 
         Parameters
         ----------
         folder (str):
-            the folder where the database will be loaded from
+            the folder where the database will be loaded from (the database backend if None)
         """
-        if folder is None:
-            folder = self.folder
+        if folder is not None:
+            self.folder = folder
+            self.backend = FolderBackend(folder)
+        elif self.backend is None:
+            self.backend = FolderBackend(self.folder)
 
-        d = self.to_element()
-        d.load(folder)
+        if self.wal is not None:  # The database folder has to contain all the logged changes
+            self.wal.compact()
 
-        for key, val in d.items():
-            self[key] = val
+        dict.update(self, self.backend.load(on_load=self._record_load_time))
+        self._check_loaded_folder(self, self.folder)
 
         self.is_loaded = True
 
+    def prefetch(self, paths: list) -> threading.Thread:
+        """
+        Loads some folders of the database in a background thread, so that they are ready when they are accessed
+        The loading times are logged once everything is loaded
+
+        Parameters
+        ----------
+        paths (List[str]):
+            paths of the folders to load, with keys separated by "/" (e.g. "profiles/active")
+
+        Returns
+        -------
+        res (threading.Thread)
+        """
+        thread = threading.Thread(target=self._prefetch, args=(paths,), name="database-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def _prefetch(self, paths: list) -> None:
+        """
+        Loads some folders of the database (see `MyDatabase.prefetch`)
+        The placeholders are only loaded here, they are replaced with their content by the main thread when accessed
+
+        Parameters
+        ----------
+        paths (List[str])
+        """
+        for path in paths:
+            value = self
+            for key in path.split("/"):
+                value = dict.get(value, key) if isinstance(value, dict) else None
+                if type(value) is UnloadedFolder:
+                    value = value.load()
+
+            # Loading the whole subtree
+            to_visit = [value] if isinstance(value, dict) else []
+            while len(to_visit) > 0:
+                for child in list(to_visit.pop().values()):
+                    if type(child) is UnloadedFolder:
+                        to_visit.append(child.load())
+                    elif type(child) is dict:
+                        to_visit.append(child)
+
+        logger.info(self.get_load_report())
+
+    def _record_load_time(self, location: str, duration: float) -> None:
+        """
+        Adds the time spent loading a value from the disk to the loading time of its top-level key
+
+        Parameters
+        ----------
+        location (str):
+            path of the loaded value, with keys separated by "/" ("" for the root)
+        duration (float):
+            time (in seconds)
+        """
+        key = location.split("/")[0]
+        if key == "":
+            key = "(root)"
+
+        self.load_timings[key] = self.load_timings.get(key, 0) + duration
+
+    def get_load_report(self) -> str:
+        """
+        Returns a summary of the time spent loading each top-level key from the disk so far
+
+        Returns
+        -------
+        res (str)
+        """
+        timings = sorted(self.load_timings.items(), key=lambda item: item[1], reverse=True)
+        lines = [f"{key}: {duration * 1000:.1f} ms" for key, duration in timings]
+        return f"Database loading times (total {sum(self.load_timings.values()) * 1000:.1f} ms):\n" + "\n".join(lines)
+
     def to_element(self):
-        return ElementDict(None, "", self)
+        # The root element does not hold any state, so it can be reused
+        if self._root_element is None:
+            self._root_element = ElementDict(None, "", self)
+        return self._root_element
 
     def __str__(self) -> str:
         return self.to_element().__str__()
@@ -508,4 +1086,7 @@ class MyDatabase(dict):
 
 db = MyDatabase()
 db.folder = "my_db"
+if os.getenv("DATABASE_BACKEND", "folder") == "sqlite":
+    db.folder = "my_db.sqlite3"
+    db.backend = SQLiteBackend(db.folder)
 db._load()
@@ -0,0 +1,304 @@
+from functools import partial
+import os
+import pickle
+from shutil import rmtree
+import threading
+import time
+
+
+# Helpers to store raw database values in the folder-of-pickles layout
+# Dictionaries are stored as folders (one entry per key), every other value is pickled in a `.dumped` file
+#
+# Writes are atomic: new values are written in a temporary file or folder, and then renamed to their final location
+# Replaced folders are first renamed with the `.old` suffix, and deleted ones with the `.del` suffix
+# If the program stops in the middle of a write, `recover_folder` puts the folder back in a consistent state
+# As a consequence, database keys should not end with one of these suffixes
+
+TMP_SUFFIX = ".tmp"
+OLD_SUFFIX = ".old"
+DELETED_SUFFIX = ".del"
+
+
+def get_location(folder, path):
+    """
+    Returns the location (without extension) where the value at a given path is stored
+
+    Parameters
+    ----------
+    folder (str):
+        the folder where the whole database is stored
+    path (tuple):
+        keys leading from the root of the database to the value
+
+    Returns
+    -------
+    res (str)
+    """
+    return "/".join([folder] + [str(key) for key in path])
+
+
+def write_value(location, value):
+    """
+    Stores a raw database value, replacing whatever was stored at the same location
+    The value is either fully written or not written at all
+
+    Parameters
+    ----------
+    location (str):
+        location of the value, without the `.dumped` extension
+    value (any)
+    """
+    if type(value) is dict:
+        tmp = location + TMP_SUFFIX
+        _remove_path(tmp)
+        _write_tree(tmp, value)
+
+        # Rename-swap of the folders
+        if os.path.isdir(location):
+            os.rename(location, location + OLD_SUFFIX)
+        os.rename(tmp, location)
+        if os.path.exists(f"{location}.dumped"):
+            os.remove(f"{location}.dumped")
+    else:
+        tmp = f"{location}.dumped{TMP_SUFFIX}"
+        _write_file(tmp, value)
+
+        if os.path.isdir(location):
+            os.rename(location, location + OLD_SUFFIX)
+        os.replace(tmp, f"{location}.dumped")
+
+    _fsync_folder(os.path.dirname(location))
+    _remove_path(location + OLD_SUFFIX)
+
+
+def remove_value(location):
+    """
+    Removes the value stored at a given location, if any
+
+    Parameters
+    ----------
+    location (str):
+        location of the value, without the `.dumped` extension
+    """
+    if os.path.isdir(location):
+        os.rename(location, location + DELETED_SUFFIX)
+        _fsync_folder(os.path.dirname(location))
+        rmtree(location + DELETED_SUFFIX)
+    elif os.path.exists(f"{location}.dumped"):
+        os.remove(f"{location}.dumped")
+        _fsync_folder(os.path.dirname(location))
+
+
+def read_value(location):
+    """
+    Reads the value stored at a given location
+
+    Parameters
+    ----------
+    location (str):
+        location of the value, without the `.dumped` extension
+
+    Returns
+    -------
+    res (any)
+    """
+    if os.path.isdir(location):
+        return read_folder(location)
+
+    with open(f"{location}.dumped", "rb") as f:
+        return pickle.load(f)
+
+
+def read_folder(folder, lazy=False, on_load=None):
+    """
+    Reads a whole folder as a dictionary
+
+    Parameters
+    ----------
+    folder (str)
+    lazy (bool):
+        if True, the subfolders are not read, and are replaced with `UnloadedFolder` placeholders
+    on_load (function):
+        called with the location and the loading time (in seconds) of each value read, including the placeholders once they are loaded
+
+    Returns
+    -------
+    res (dict)
+    """
+    start = time.perf_counter()
+    names = os.listdir(folder)
+    if on_load is not None:
+        on_load(folder, time.perf_counter() - start)
+
+    res = dict()
+    for name in names:
+        if os.path.isdir(f"{folder}/{name}"):
+            if name.endswith((TMP_SUFFIX, OLD_SUFFIX, DELETED_SUFFIX)): continue
+
+            if lazy:
+                res[name] = UnloadedFolder(f"{folder}/{name}", partial(load_folder, on_load=on_load))
+            else:
+                res[name] = read_folder(f"{folder}/{name}")
+        elif name.endswith(".dumped"):
+            start = time.perf_counter()
+            res[name[:-7]] = read_value(f"{folder}/{name[:-7]}")
+            if on_load is not None:
+                on_load(f"{folder}/{name[:-7]}", time.perf_counter() - start)
+    return res
+
+
+def load_folder(folder, on_load=None):
+    """
+    Reads a folder, without its subfolders
+    The folder should have been cleaned from interrupted writes beforehand (see `recover_folder`), this is not done here since the folder may be written at the same time
+
+    Parameters
+    ----------
+    folder (str)
+    on_load (function):
+        see `read_folder`
+
+    Returns
+    -------
+    res (dict):
+        the content of the folder, its subfolders being `UnloadedFolder` placeholders
+    """
+    return read_folder(folder, lazy=True, on_load=on_load)
+
+
+class UnloadedFolder:
+    """
+    Placeholder for a dictionary of the database which has not been read yet
+    The dictionary is read (without its sub-dictionaries) the first time it is loaded, and the result is kept
+    """
+
+    def __init__(self, location, load_function):
+        """
+        Parameters
+        ----------
+        location (str):
+            location of the dictionary in the storage backend
+        load_function (function):
+            called with the location to read the dictionary (see `load_folder`)
+        """
+        self.location = location
+        self.load_function = load_function
+        self.value = None
+        self.lock = threading.Lock()  # The folder may be loaded both by the main thread and by a prefetching thread
+
+    def load(self):
+        """
+        Reads the dictionary if it was not read yet
+
+        Returns
+        -------
+        res (dict):
+            the content of the dictionary, its sub-dictionaries being `UnloadedFolder` placeholders
+        """
+        with self.lock:
+            if self.value is None:
+                self.value = self.load_function(self.location)
+        return self.value
+
+
+def recover_folder(folder, recursive=True):
+    """
+    Cleans a folder after writes were interrupted, keeping for each value either the previous version or the new one
+
+    Parameters
+    ----------
+    folder (str)
+    recursive (bool):
+        whether the subfolders should be cleaned as well
+    """
+    names = os.listdir(folder)
+
+    # Unfinished writes and deletions
+    for name in names:
+        if name.endswith((TMP_SUFFIX, DELETED_SUFFIX)):
+            _remove_path(f"{folder}/{name}")
+
+    for name in names:
+        location = f"{folder}/{name}"
+
+        if name.endswith(OLD_SUFFIX):
+            new_location = location[:-len(OLD_SUFFIX)]
+            if os.path.isdir(new_location) or os.path.exists(f"{new_location}.dumped"):  # The new version was fully written
+                rmtree(location)
+            else:  # Stopped between the two renames
+                os.rename(location, new_location)
+                if recursive:
+                    recover_folder(new_location)
+
+        elif os.path.isdir(location) and not name.endswith((TMP_SUFFIX, DELETED_SUFFIX)):
+            if os.path.exists(f"{location}.dumped"):  # A folder replaced a file, but the file was not removed yet
+                os.remove(f"{location}.dumped")
+            if recursive:
+                recover_folder(location)
+
+
+def _write_tree(location, value):
+    """
+    Writes a value at a location that does not exist yet, without the atomicity guarantees
+    Everything is synced on disk before returning
+
+    Parameters
+    ----------
+    location (str):
+        location of the value, without the `.dumped` extension
+    value (any)
+    """
+    if type(value) is dict:
+        os.mkdir(location)
+        for key, val in value.items():
+            _write_tree(f"{location}/{key}", val)
+        _fsync_folder(location)
+    else:
+        _write_file(f"{location}.dumped", value)
+
+
+def _write_file(path, value):
+    """
+    Pickles a value in a file and syncs it on disk
+
+    Parameters
+    ----------
+    path (str)
+    value (any)
+    """
+    with open(path, "wb") as f:
+        pickle.dump(value, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _remove_path(path):
+    """
+    Removes a file or a folder, if it exists
+
+    Parameters
+    ----------
+    path (str)
+    """
+    if os.path.isdir(path):
+        rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _fsync_folder(folder):
+    """
+    Syncs a folder on disk, so that the renames and deletions of its entries are durable
+
+    Parameters
+    ----------
+    folder (str)
+    """
+    if os.name == "nt":  # Folders cannot be opened on Windows, where renames are already durable
+        return
+
+    fd = os.open(folder or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,359 @@
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from .storage import get_location, read_value, remove_value, write_value
+
+
+logger = logging.getLogger("custom_log")
+
+
+class WriteAheadLog:
+    """
+    Append-only log of the database mutations
+    Each mutation is stored as a small (op, path, value) record instead of rewriting the whole container it belongs to
+    Records are written and fsynced by batches from a background thread, which also periodically folds the log back into the database folder
+
+    The log is split in numbered segments: the last one is the one being written, the previous ones are sealed and waiting to be folded
+    Records only ever set or delete a value at a precise path, so replaying a segment twice gives the same result
+    This allows to replay a segment after a crash even if it was already partially folded
+    """
+
+    HEADER = struct.Struct("<II")  # size and crc32 of the pickled record
+    RETRY_DELAY = 1  # seconds between two attempts of the background thread after an error
+    EXTENSION = ".log"
+
+    def __init__(self, folder, db_folder, sync_interval=0.05, compact_interval=60):
+        """
+        Parameters
+        ----------
+        folder (str):
+            the folder where the log segments are stored
+        db_folder (str):
+            the folder where the database is stored
+        sync_interval (float):
+            time (in seconds) between two writes of the pending records
+        compact_interval (float):
+            time (in seconds) between two foldings of the log into the database folder
+        """
+        self.folder = folder
+        self.db_folder = db_folder
+        self.sync_interval = sync_interval
+        self.compact_interval = compact_interval
+
+        self._pending = []  # encoded records waiting to be written
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._closing = False
+        self._error = None  # last error of the background thread, raised by the next `sync` or `close`
+        self._thread = None
+        self._file = None
+        self._segment = 0
+        self._last_compaction = time.monotonic()
+
+    def open(self):
+        """
+        Starts a new segment and the background thread writing the records
+        Existing segments should have been replayed before (see `WriteAheadLog.replay`)
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        self._segment = max(WriteAheadLog.get_segments(self.folder), default=0) + 1
+        self._file = open(self._get_segment_path(self._segment), "ab", buffering=0)
+
+        self._thread = threading.Thread(target=self._run, name="database-wal", daemon=True)
+        self._thread.start()
+
+    def append(self, op, path, value=None):
+        """
+        Adds a record to the log
+        The value is serialized right away, so that later changes to it do not affect the record
+
+        Parameters
+        ----------
+        op (str):
+            "set" or "del"
+        path (tuple):
+            keys leading from the root of the database to the modified value
+        value (any):
+            the new value (only for "set")
+        """
+        data = pickle.dumps((op, path, value), protocol=pickle.HIGHEST_PROTOCOL)
+        frame = WriteAheadLog.HEADER.pack(len(data), zlib.crc32(data)) + data
+
+        with self._cond:
+            self._pending.append(frame)
+
+    def sync(self):
+        """
+        Writes all the pending records to the current segment, and fsyncs it
+        Can be called from any thread, the records are always written in the order they were added
+        If the background thread failed since the last call, its error is raised once the records are written
+        """
+        self._write_pending()
+        self._raise_error()
+
+    def _write_pending(self):
+        """
+        Writes all the pending records to the current segment, and fsyncs it
+        If the write fails, the segment is truncated back and the records are kept pending, so that they are written by the next attempt
+        """
+        with self._io_lock:
+            with self._cond:
+                frames, self._pending = self._pending, []
+
+            if len(frames) == 0: return
+
+            start = self._file.tell()
+            try:
+                data = memoryview(b"".join(frames))
+                while len(data) > 0:  # The file is not buffered, a write may be partial
+                    data = data[self._file.write(data):]
+                os.fsync(self._file.fileno())
+            except Exception:
+                try:
+                    self._file.truncate(start)
+                    self._file.seek(start)
+                except OSError:
+                    pass
+                with self._cond:
+                    self._pending = frames + self._pending
+                raise
+
+    def _raise_error(self):
+        """
+        Raises the last error of the background thread, if any, and forgets it
+        """
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def compact(self):
+        """
+        Seals the current segment and folds all the sealed segments into the database folder
+        Can be called from any thread, the database folder is up to date with all the records once it returns
+        """
+        with self._compact_lock:
+            self._write_pending()
+
+            with self._io_lock:
+                self._last_compaction = time.monotonic()
+                if self._file.tell() == 0: return  # Nothing was written since the last compaction
+
+                self._file.close()
+                sealed = self._segment
+                self._segment += 1
+                self._file = open(self._get_segment_path(self._segment), "ab", buffering=0)
+
+            WriteAheadLog.replay(self.folder, self.db_folder, last_segment=sealed)
+
+    def close(self):
+        """
+        Stops the background thread and folds everything into the database folder
+        """
+        if self._thread is None: return
+
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+
+        self.compact()
+        self._file.close()
+        os.remove(self._get_segment_path(self._segment))
+        self._raise_error()
+
+    def _run(self):
+        """
+        Main loop of the background thread
+        Errors (e.g. a full disk) do not stop the thread: they are logged and kept to be raised by `sync` or `close`, and the writes are retried
+        """
+        failed = False
+        while True:
+            with self._cond:
+                if not self._closing:
+                    self._cond.wait(max(self.sync_interval, WriteAheadLog.RETRY_DELAY) if failed else self.sync_interval)
+                closing = self._closing
+
+            failed = False
+            try:
+                self._write_pending()
+                if not closing and time.monotonic() - self._last_compaction >= self.compact_interval:
+                    self.compact()
+            except Exception as e:
+                failed = True
+                print(f"Error in the write-ahead log: {e}")
+                logger.exception("Error in the write-ahead log")
+                self._error = e
+                if not closing:
+                    self._last_compaction = time.monotonic()  # Wait for the next interval before trying to compact again
+
+            if closing: return
+
+    def _get_segment_path(self, segment):
+        """
+        Returns the path of the file corresponding to a segment
+
+        Parameters
+        ----------
+        segment (int)
+
+        Returns
+        -------
+        res (str)
+        """
+        return f"{self.folder}/{segment:08d}{WriteAheadLog.EXTENSION}"
+
+    @staticmethod
+    def get_segments(folder):
+        """
+        Returns the numbers of the segments stored in a folder, in increasing order
+
+        Parameters
+        ----------
+        folder (str)
+
+        Returns
+        -------
+        res (List[int])
+        """
+        if not os.path.isdir(folder): return []
+
+        names = [name for name in os.listdir(folder) if name.endswith(WriteAheadLog.EXTENSION)]
+        return sorted(int(name[:-len(WriteAheadLog.EXTENSION)]) for name in names)
+
+    @staticmethod
+    def read_segment(path):
+        """
+        Reads the records stored in a segment
+        Reading stops at the first incomplete or corrupted record (the end of the log when a crash happened while writing)
+
+        Parameters
+        ----------
+        path (str)
+
+        Returns
+        -------
+        res (List[(str, tuple, any)])
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+
+        records = []
+        offset = 0
+        while offset + WriteAheadLog.HEADER.size <= len(data):
+            size, crc = WriteAheadLog.HEADER.unpack_from(data, offset)
+            offset += WriteAheadLog.HEADER.size
+            payload = data[offset:offset + size]
+
+            if len(payload) != size or zlib.crc32(payload) != crc: break
+
+            records.append(pickle.loads(payload))
+            offset += size
+        return records
+
+    @staticmethod
+    def replay(folder, db_folder, last_segment=None):
+        """
+        Folds the segments of a log into the database folder, and removes them
+
+        Parameters
+        ----------
+        folder (str):
+            the folder where the log segments are stored
+        db_folder (str):
+            the folder where the database is stored
+        last_segment (int):
+            the last segment to replay (all the segments if None)
+        """
+        for segment in WriteAheadLog.get_segments(folder):
+            if last_segment is not None and segment > last_segment: break
+
+            path = f"{folder}/{segment:08d}{WriteAheadLog.EXTENSION}"
+            apply_records(db_folder, WriteAheadLog.read_segment(path))
+            os.remove(path)
+
+
+def apply_records(db_folder, records):
+    """
+    Applies a sequence of records to the database folder
+    Dictionaries are folders, so records targeting them (or their direct children) are written directly
+    Records targeting a value inside a `.dumped` file (e.g. an item of a list) are applied on the unpickled file, which is written once at the end
+
+    A record may target a value that does not exist anymore if it is replayed on an already folded database
+    In that case, it was overriden by a later record and it is skipped
+
+    Parameters
+    ----------
+    db_folder (str)
+    records (List[(str, tuple, any)])
+    """
+    loaded_files = dict()  # location -> unpickled value, for files modified in place
+
+    for op, path, value in records:
+        # Looking for the deepest existing folder on the path
+        i = 0
+        location = db_folder
+        while i < len(path) and os.path.isdir(get_location(location, path[i:i + 1])):
+            location = get_location(location, path[i:i + 1])
+            i += 1
+
+        if i >= len(path) - 1:  # The record targets a whole file or folder
+            target = get_location(db_folder, path)
+            for loaded in [loc for loc in loaded_files if loc == target or loc.startswith(target + "/")]:
+                del loaded_files[loaded]
+
+            if op == "set":
+                write_value(target, value)
+            else:
+                remove_value(target)
+            continue
+
+        # The record targets a value inside a file
+        file_location = get_location(location, path[i:i + 1])
+        if file_location not in loaded_files:
+            if not os.path.exists(f"{file_location}.dumped"): continue
+            loaded_files[file_location] = read_value(file_location)
+
+        _apply_record_in_value(loaded_files[file_location], op, path[i + 1:], value)
+
+    for location, value in loaded_files.items():
+        write_value(location, value)
+
+
+def _apply_record_in_value(container, op, path, value):
+    """
+    Applies a record to a value unpickled from a file
+
+    Parameters
+    ----------
+    container (list or dict)
+    op (str)
+    path (tuple):
+        path relative to the container
+    value (any)
+    """
+    try:
+        for key in path[:-1]:
+            container = container[key]
+    except (KeyError, IndexError, TypeError):
+        return
+
+    key = path[-1]
+    if type(container) is list:
+        if op == "set" and key == len(container):
+            container.append(value)
+        elif op == "set" and key < len(container):
+            container[key] = value
+        elif op == "del" and key < len(container):
+            del container[key]
+    elif type(container) is dict:
+        if op == "set":
+            container[key] = value
+        else:
+            container.pop(key, None)
@@ -1,4 +1,3 @@
-import asyncio
 import copy
 from interactions import (
     Button,
@@ -18,16 +17,16 @@ from interactions import (
     UnfurledMediaItem,
 )
 from math import ceil
-import os
 import random
 
 from constant import Constants
 from database import db
 import events
+from leaderboard import get_leaderboard
 from piflouz_generated import get_stat_str
 import seasons
 import socials
-from user_profile import get_active_profiles
+from user_profile import view_active_profiles
 import utils
 from wordle import Wordle
 
@@ -235,11 +234,11 @@ def get_container_piflouz():
     ]
 
     # Rankings & stats
-    profiles = get_active_profiles()
-    if len(profiles) > 0:
-        d_piflouz = [(user_id, profile["piflouz_balance"]) for user_id, profile in profiles.items() if profile["piflouz_balance"] > 0]
-        d_piflex = [(user_id, len(profile["discovered_piflex"])) for user_id, profile in profiles.items() if len(profile["discovered_piflex"]) > 0]
-        d_donations = [(user_id, profile["donation_balance"]) for user_id, profile in profiles.items() if profile["donation_balance"] > 0]
+    if len(view_active_profiles()) > 0:
+        # Only the first users are displayed
+        d_piflouz = [(user_id, val) for user_id, val in get_leaderboard("piflouz_balance").top(10) if val > 0]
+        d_piflex = [(user_id, val) for user_id, val in get_leaderboard("discovered_piflex").top(10) if val > 0]
+        d_donations = [(user_id, val) for user_id, val in get_leaderboard("donation_balance").top(10) if val > 0]
 
         ranking_balance = get_ranking_str(d_piflouz)
         ranking_piflex = get_ranking_str(d_piflex)
@@ -486,10 +485,7 @@ async def get_embed_wordle(solution, guesses, header_str, user_id):
     """
     wordle = Wordle(solution)
 
-    path = f"wordle_tmp_{user_id}.png"
-    await asyncio.to_thread(wordle.generate_image, guesses, path)
-    url = utils.upload_image_to_imgur(path)
-    os.remove(path)
+    url = utils.upload_image_data_to_imgur(wordle.generate_image(guesses))
 
     color = MaterialColors.AMBER
     if len(guesses) > 0 and guesses[-1] == solution:
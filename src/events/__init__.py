@@ -37,6 +37,7 @@ from .events import (
     update_events,
     wait_for_buffer_ready,
 )
+from .match_riddle_bank import draw_riddle, load_bank, mark_riddle_used, write_bank
 from .matches_challenge import (
     MatchesExpression,
     MatchesInterface,
@@ -44,9 +45,11 @@ from .matches_challenge import (
     gen_equality,
     gen_number,
     generate_game,
+    get_all_riddles,
     get_all_solutions,
     get_list,
     get_number,
     get_riddle,
 )
 from .subsequence_challenge import SubseqChallenge
+from .word_lists import WordList, get_word_list
@@ -42,6 +42,7 @@ class ChessProblem:
     def save_all(self, folder):
         """
         Saves all images in the execution + result gif
+        The images are rendered in memory, they are only written once to be used during the event
 
         Parameters
         ----------
@@ -52,11 +53,12 @@ class ChessProblem:
         board_images = []
         for i, move in enumerate(self.moves_list):
             board.push(chess.Move.from_uci(move))
-            image_location = os.path.join(folder, f"board{i}.png")
 
             svg_board = chess.svg.board(board=board, size=400, lastmove=chess.Move.from_uci(move))
-            cairosvg.svg2png(bytestring=svg_board, write_to=image_location)
-            board_images.append(imageio.imread(image_location))
+            png_board = cairosvg.svg2png(bytestring=svg_board)
+            with open(os.path.join(folder, f"board{i}.png"), "wb") as f:
+                f.write(png_board)
+            board_images.append(imageio.imread(png_board))
 
         imageio.mimsave(os.path.join(folder, "chess_puzzle_solution.gif"), board_images, duration=2000, loop=0)
 
@@ -1,5 +1,8 @@
+import ast
 import asyncio
+from copy import deepcopy
 import datetime
+from functools import lru_cache
 from interactions import (
     BrandColors,
     Button,
@@ -34,12 +37,14 @@ import pibox
 from piflouz_generated import PiflouzSource, add_to_stat
 import piflouz_handlers
 import powerups
+from process_pool import process_pool
 from random_pool import RandomPool, RandomPoolTable
 from seasons import get_season_end_date
 import utils
 from wordle import Wordle
 
 from .chess_problem import ChessProblem
+from .match_riddle_bank import draw_riddle, mark_riddle_used
 from .matches_challenge import MatchesInterface
 from .subsequence_challenge import SubseqChallenge
 
@@ -121,9 +126,9 @@ async def update_events(bot):
     elif now.month == 10 and now.day == 31:
         new_event_passive = HalloweenEvent()
     else:
-        new_event_passive = eval(db["events"]["passive"]["buffered_event"])
+        new_event_passive = parse_event(db["events"]["passive"]["buffered_event"])
 
-    new_event_challenge = eval(db["events"]["challenge"]["buffered_event"])
+    new_event_challenge = parse_event(db["events"]["challenge"]["buffered_event"])
 
     id1 = await new_event_passive.on_begin(bot)
     id2_msg, id2_thread = await new_event_challenge.on_begin(bot)
@@ -282,6 +287,7 @@ def reset_event_database(event_type):
 def get_event_object(event):
     """
     Returns the event object of the given type
+    The object is only parsed again when the event stored in the database changes, so it is shared by all the callers
 
     Parameters
     ----------
@@ -293,13 +299,111 @@ def get_event_object(event):
     """
     try:
         match event:
-            case EventType.PASSIVE:
-                return eval(db["events"]["passive"]["current_event"]) if db["events"]["passive"]["current_event"] != "" else None
-            case EventType.CHALLENGE:
-                return eval(db["events"]["challenge"]["current_event"]) if db["events"]["challenge"]["current_event"] != "" else None
-    except Exception: pass
+            case EventType.PASSIVE: event_str = db.view("events", "passive")["current_event"]
+            case EventType.CHALLENGE: event_str = db.view("events", "challenge")["current_event"]
+            case _: return None
+    except Exception:
+        return None
+
+    cached = _current_events.get(event)
+    if cached is not None and cached[0] == event_str:
+        return cached[1]
+
+    try:
+        res = parse_event(event_str) if event_str != "" else None
+    except Exception:
+        res = None
+
+    _current_events[event] = (event_str, res)
+    return res
+
+
+_current_events = dict()  # event type -> (event string stored in the database, event object)
+
+
+def parse_event(event_str):
+    """
+    Recreates an event from the string returned by its `to_str` method, without using eval()
+    The string has to be a call to an event class with literal arguments, or with powerups (see `powerups.parse_powerup`)
+    Only the parsing is cached: each call returns a new event, since events keep state (e.g. their listeners)
+
+    Parameters
+    ----------
+    event_str (str)
 
-    return None
+    Returns
+    -------
+    res (Event)
+    """
+    return _decode_event_node(_parse_event_tree(event_str))
+
+
+@lru_cache(maxsize=32)
+def _parse_event_tree(event_str):
+    """
+    Returns the syntax tree of an event string
+    The tree is shared between calls, so it should not be modified
+
+    Parameters
+    ----------
+    event_str (str)
+
+    Returns
+    -------
+    res (ast.expr)
+    """
+    return ast.parse(event_str, mode="eval").body
+
+
+def _decode_event_node(node):
+    """
+    Recreates the value corresponding to a node of a parsed event string
+
+    Parameters
+    ----------
+    node (ast.expr)
+
+    Returns
+    -------
+    res (Event, Powerups or any literal)
+    """
+    if not isinstance(node, ast.Call):
+        return ast.literal_eval(node)
+
+    func = node.func
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == powerups.__name__:
+        return deepcopy(powerups.parse_powerup(ast.unparse(node)))  # The parsed powerups are shared
+
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "events":  # Old format
+        name = func.attr
+    else:
+        assert isinstance(func, ast.Name), f"Invalid event: {ast.unparse(node)}"
+        name = func.id
+
+    classes = _get_event_classes()
+    assert name in classes, f"Unknown event: {ast.unparse(node)}"
+
+    args = [_decode_event_node(arg) for arg in node.args]
+    kwargs = {keyword.arg: _decode_event_node(keyword.value) for keyword in node.keywords}
+    return classes[name](*args, **kwargs)
+
+
+def _get_event_classes():
+    """
+    Returns all the event classes, which are the only classes that can be created by `parse_event`
+
+    Returns
+    -------
+    res (dict):
+        class name -> class
+    """
+    res = dict()
+    to_visit = [Event]
+    while len(to_visit) > 0:
+        cls = to_visit.pop()
+        res[cls.__name__] = cls
+        to_visit.extend(cls.__subclasses__())
+    return res
 
 
 def get_event_data(e):
@@ -468,7 +572,7 @@ class Event:
 
     def to_str(self):
         """
-        Returns a string used to store in the database, and get back the object with eval
+        Returns a string used to store in the database, and get back the object with `parse_event`
 
         Returns
         -------
@@ -1125,18 +1229,27 @@ class MoveMatchEvent(ChallengeEvent):
         return embed
 
     async def prepare(self, bot):
-        event = await MatchesInterface.new()
-        event.save_all("src/events/")
-        url_riddle = utils.upload_image_to_imgur("src/events/riddle.png")
-        url_sol = utils.upload_image_to_imgur("src/events/solution.png")
+        bank_riddle = draw_riddle(db["match_riddles_used"], max_solutions=1, min_digits=Constants.MATCH_RIDDLE_MIN_DIGITS, max_digits=Constants.MATCH_RIDDLE_MAX_DIGITS)
+        if bank_riddle is None:
+            print("No riddle left in the match riddle bank, generating a new one")
+            logger.warning("No riddle left in the match riddle bank, generating a new one")
+
+        event, riddle_img, solution_img = await process_pool.run(MatchesInterface.generate, bank_riddle, timeout=300)
+        url_riddle = utils.upload_image_data_to_imgur(riddle_img)
+        url_sol = utils.upload_image_data_to_imgur(solution_img)
 
         data = get_buffer_event_data(self)
         data["riddle"] = event.riddle.str
         data["main_solution"] = event.main_sol.str
-        data["all_solutions"] = event.all_sols
+        with db.trusted_writes():  # Only strings, no need to check each of them
+            data["all_solutions"] = event.all_sols
         data["url_riddle"] = url_riddle
         data["url_solution"] = url_sol
 
+        # Only counted once the event is ready, so that the riddle is drawn again if something failed
+        if bank_riddle is not None:
+            mark_riddle_used(db["match_riddles_used"], bank_riddle)
+
     async def on_begin(self, bot):
         if "out_channel" not in db.keys(): return
         out_channel = await bot.fetch_channel(db["out_channel"])
@@ -1176,12 +1289,6 @@ class MoveMatchEvent(ChallengeEvent):
         data["completed"] = dict()
         data["all_solutions"] = []
 
-        try:
-            os.remove("src/events/riddle.png")
-            os.remove("src/events/solution.png")
-        except Exception:
-            print("Could not remove match event files")
-
     def to_str(self):
         return f"{MoveMatchEvent.__name__}({self.reward})"
 
@@ -1216,7 +1323,7 @@ You can earn {Constants.PIFLOUZ_EMOJI} in the following ways:\n\
     async def prepare(self, bot):
         data = get_buffer_event_data(self)
 
-        s, nb_sols, main_sol = await asyncio.to_thread(SubseqChallenge.new, random.randint(3, 6))
+        s, nb_sols, main_sol = await process_pool.run(SubseqChallenge.new, random.randint(3, 6), timeout=300)
         data = get_buffer_event_data(self)
 
         data["subseq"] = s.subseq
@@ -1457,7 +1564,7 @@ class ChessPuzzleEvent(ChallengeEvent):
 
         rating = random.randint(self.rating_min, self.rating_max)
         puzzle = ChessProblem.new_problem(rating=rating)
-        puzzle.save_all("src/events/buffered_files")
+        await process_pool.run(puzzle.save_all, "src/events/buffered_files", timeout=120)
         url_starting_position = utils.upload_image_to_imgur("src/events/buffered_files/board0.png")
 
         data["url_start"] = url_starting_position
@@ -0,0 +1,245 @@
+from functools import lru_cache
+import hashlib
+import json
+from math import inf
+import os
+import random
+import struct
+
+
+# The riddle bank is generated offline by `match_riddles/build_match_riddles.py`, and stored in 3 files:
+# - the riddles, one per line: the riddle, the main solution and all the solutions, separated by spaces
+# - an index containing the byte offset of the start of each line, followed by the size of the file, as little-endian unsigned 64 bits integers
+# - the groups of riddles with the same difficulty, as a list of [number of solutions, number of digits, first line, number of lines]
+# The lines of a group are consecutive and shuffled, so that a group can be used in order
+BANK_FOLDER = "match_riddles/"
+BANK_NAME = "match_riddles"
+INDEX_ENTRY = struct.Struct("<Q")
+FINGERPRINT_KEY = "bank"  # key of the bank fingerprint among the numbers of used riddles (see `draw_riddle`)
+
+
+def get_bank_filenames(folder=BANK_FOLDER):
+    """
+    Returns the names of the files of the riddle bank
+
+    Parameters
+    ----------
+    folder (str)
+
+    Returns
+    -------
+    riddles_filename (str)
+    index_filename (str)
+    groups_filename (str)
+    """
+    base = os.path.join(folder, BANK_NAME)
+    return base + ".txt", base + ".idx", base + "_groups.json"
+
+
+def get_difficulty(riddle, all_sols):
+    """
+    Returns the difficulty of a riddle, used to group the riddles of the bank
+
+    Parameters
+    ----------
+    riddle (str)
+    all_sols (List[str])
+
+    Returns
+    -------
+    nb_solutions (int)
+    nb_digits (int):
+        number of digits in the riddle
+    """
+    return len(all_sols), sum(char.isdigit() for char in riddle)
+
+
+def write_bank(riddles, folder=BANK_FOLDER, seed=0):
+    """
+    Writes the riddle bank, replacing the previous one
+
+    Parameters
+    ----------
+    riddles (List[(str, str, List[str])]):
+        riddle, main solution and all the solutions of each riddle
+    folder (str)
+    seed (int):
+        seed used to shuffle the riddles of each group
+
+    Returns
+    -------
+    groups (List[[int, int, int, int]]):
+        number of solutions, number of digits, first line and number of lines of each group
+    """
+    rng = random.Random(seed)
+    by_difficulty = dict()
+    for riddle, main_sol, all_sols in sorted(riddles):
+        by_difficulty.setdefault(get_difficulty(riddle, all_sols), []).append((riddle, main_sol, all_sols))
+
+    riddles_filename, index_filename, groups_filename = get_bank_filenames(folder)
+    groups = []
+    offsets = []
+    with open(riddles_filename, "wb") as f:
+        for (nb_solutions, nb_digits), group in sorted(by_difficulty.items()):
+            rng.shuffle(group)
+            groups.append([nb_solutions, nb_digits, len(offsets), len(group)])
+            for riddle, main_sol, all_sols in group:
+                offsets.append(f.tell())
+                f.write(" ".join([riddle, main_sol, *all_sols]).encode() + b"\n")
+        offsets.append(f.tell())
+
+    with open(index_filename, "wb") as f:
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+    with open(groups_filename, "w") as f:
+        json.dump(groups, f)
+    return groups
+
+
+@lru_cache(maxsize=None)
+def load_bank(folder=BANK_FOLDER):
+    """
+    Returns the groups of the riddle bank
+    The groups are only read once
+
+    Parameters
+    ----------
+    folder (str)
+
+    Returns
+    -------
+    groups (List[[int, int, int, int]]):
+        number of solutions, number of digits, first line and number of lines of each group, empty if there is no bank
+    """
+    _, _, groups_filename = get_bank_filenames(folder)
+    if not os.path.exists(groups_filename): return []
+
+    with open(groups_filename, "r") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_bank_fingerprint(folder=BANK_FOLDER):
+    """
+    Returns a fingerprint of the riddle bank, which changes when the bank is rebuilt with other riddles
+    The fingerprint is only computed once, like the groups (see `load_bank`)
+
+    Parameters
+    ----------
+    folder (str)
+
+    Returns
+    -------
+    res (str):
+        hash of the groups and of the index, empty if there is no bank
+    """
+    _, index_filename, groups_filename = get_bank_filenames(folder)
+    if not os.path.exists(groups_filename) or not os.path.exists(index_filename): return ""
+
+    res = hashlib.sha256()
+    for filename in [groups_filename, index_filename]:
+        with open(filename, "rb") as f:
+            res.update(hashlib.file_digest(f, "sha256").digest())
+    return res.hexdigest()
+
+
+def get_group_key(nb_solutions, nb_digits):
+    """
+    Returns the key of a group of riddles, used to count the riddles of the group already used
+
+    Parameters
+    ----------
+    nb_solutions (int)
+    nb_digits (int)
+
+    Returns
+    -------
+    res (str)
+    """
+    return f"{nb_solutions}_{nb_digits}"
+
+
+def read_riddle(line_index, folder=BANK_FOLDER):
+    """
+    Reads one riddle of the bank, without reading the other ones
+
+    Parameters
+    ----------
+    line_index (int)
+    folder (str)
+
+    Returns
+    -------
+    riddle (str)
+    main_sol (str)
+    all_sols (List[str])
+    """
+    riddles_filename, index_filename, _ = get_bank_filenames(folder)
+    with open(index_filename, "rb") as f:
+        f.seek(line_index * INDEX_ENTRY.size)
+        start, end = struct.unpack("<2Q", f.read(2 * INDEX_ENTRY.size))
+
+    with open(riddles_filename, "rb") as f:
+        f.seek(start)
+        riddle, main_sol, *all_sols = f.read(end - start).decode().split()
+    return riddle, main_sol, all_sols
+
+
+def draw_riddle(nb_used, max_solutions=1, min_digits=0, max_digits=inf, folder=BANK_FOLDER):
+    """
+    Draws a riddle of the bank which was not used yet, among the riddles of the given difficulty
+    The riddles of each group are used in order, so that the draw does not depend on the size of the bank
+    The riddle is only counted as used by `mark_riddle_used`, so that a riddle which could not be used is drawn again next time
+    The counts are reset when the bank changes, since they refer to the lines of the previous bank
+
+    Parameters
+    ----------
+    nb_used (dict (Element_dict)):
+        "[number of solutions]_[number of digits]" -> number of riddles of the group already used, along with the fingerprint of the bank
+    max_solutions (int):
+        maximum number of solutions of the riddle
+    min_digits (int):
+        minimum number of digits in the riddle
+    max_digits (int):
+        maximum number of digits in the riddle
+    folder (str)
+
+    Returns
+    -------
+    res ((str, str, List[str])):
+        riddle, main solution and all the solutions, None if all the riddles of this difficulty were used
+    """
+    fingerprint = get_bank_fingerprint(folder)
+    if FINGERPRINT_KEY not in nb_used.keys() or nb_used[FINGERPRINT_KEY] != fingerprint:
+        nb_used.clear()
+        nb_used[FINGERPRINT_KEY] = fingerprint
+
+    candidates = []
+    for nb_solutions, nb_digits, first_line, nb_lines in load_bank(folder):
+        if nb_solutions > max_solutions or not min_digits <= nb_digits <= max_digits: continue
+
+        key = get_group_key(nb_solutions, nb_digits)
+        used = nb_used[key] if key in nb_used.keys() else 0
+        if used < nb_lines:
+            candidates.append((first_line + used, nb_lines - used))
+
+    if len(candidates) == 0: return None
+
+    # Each remaining riddle has the same probability to be drawn
+    line_index, _ = random.choices(candidates, weights=[nb_remaining for _, nb_remaining in candidates])[0]
+    return read_riddle(line_index, folder)
+
+
+def mark_riddle_used(nb_used, bank_riddle):
+    """
+    Counts a riddle returned by `draw_riddle` as used, so that the next riddle of its group is drawn next time
+
+    Parameters
+    ----------
+    nb_used (dict (Element_dict)):
+        the counts given to `draw_riddle`
+    bank_riddle ((str, str, List[str])):
+        riddle, main solution and all the solutions
+    """
+    riddle, _, all_sols = bank_riddle
+    key = get_group_key(*get_difficulty(riddle, all_sols))
+    nb_used[key] = (nb_used[key] if key in nb_used.keys() else 0) + 1
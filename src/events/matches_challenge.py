@@ -1,18 +1,56 @@
 import asyncio
 from copy import copy
+from functools import lru_cache
+from io import BytesIO
 from itertools import chain
 from math import inf
-import matplotlib as mpl
-import matplotlib.pyplot as plt
+import os
 from PIL import Image
 from random import choice, randint
 import re
 import time
 
 
+ASSETS_CACHE_FOLDER = "src/events/assets/cache/"
+
+
+def load_resized_asset(path, size):
+    """
+    Returns an image resized to the given size
+    The resized image is cached on disk, so that the (slow) resizing of the original image is only done once
+
+    Parameters
+    ----------
+    path (str):
+        path to the original image
+    size ((int, int))
+
+    Returns
+    -------
+    res (PIL.Image):
+        in RGBA mode
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(ASSETS_CACHE_FOLDER, f"{name}_{size[0]}x{size[1]}.png")
+    if os.path.exists(cache_path):
+        with Image.open(cache_path) as res:
+            res.load()  # Not lazy, the file should not be shared by the worker processes
+            return res
+
+    res = Image.open(path).convert("RGBA").resize(size, Image.LANCZOS)
+    try:
+        os.makedirs(ASSETS_CACHE_FOLDER, exist_ok=True)
+        res.save(cache_path)
+    except OSError:  # e.g. read-only folder, the image will be resized again next time
+        pass
+    return res
+
+
 class MatchesInterface:
 
     MATCH_INIT_SCALE = 75
+    IMG_SIZE = (960, 540)
+    RENDER_SCALE = IMG_SIZE[0] / 1920  # The positions below are given for a 1920x1080 image
 
     # segments used to draw each number
     # Xs is a small version of X, Xb is a big version of X
@@ -54,8 +92,9 @@ class MatchesInterface:
         (0.5, 1.5, 90),
     ]
 
-    IMG_BACKGROUND = Image.open("src/events/assets/framecool2.png").resize((1920, 1080), Image.LANCZOS)
-    IMG_MATCH = Image.open("src/events/assets/allu.png").resize((MATCH_INIT_SCALE, MATCH_INIT_SCALE), Image.LANCZOS)
+    IMG_BACKGROUND = load_resized_asset("src/events/assets/framecool2.png", IMG_SIZE)
+    # Matches are drawn with a scale of at most 2, the sprites of each size are resized from this one
+    IMG_MATCH = load_resized_asset("src/events/assets/allu.png", (round(2 * MATCH_INIT_SCALE * RENDER_SCALE), round(2 * MATCH_INIT_SCALE * RENDER_SCALE)))
 
     def __init__(self, riddle, main_sol, all_sols):
         self.riddle = riddle
@@ -75,7 +114,83 @@ class MatchesInterface:
         return MatchesInterface(riddle, main_sol, all_sols)
 
     @staticmethod
-    def draw_char(char, offset, scale, base, ax):
+    def generate(bank_riddle=None):
+        """
+        Generates a new riddle and its images
+        Meant to be run in a worker process (see `process_pool`)
+
+        Parameters
+        ----------
+        bank_riddle ((str, str, List[str])):
+            riddle, main solution and all the solutions of a riddle drawn from the riddle bank (see `match_riddle_bank.draw_riddle`)
+            If None, the riddle is generated from scratch
+
+        Returns
+        -------
+        res (Matches_Interface)
+        riddle_img (bytes):
+            image of the riddle, in PNG format
+        solution_img (bytes):
+            image of the riddle and its solution, in PNG format
+        """
+        if bank_riddle is None:
+            riddle, main_sol, all_sols = generate_game(gen_equality(2, 2), max_time=30)
+        else:
+            riddle_str, main_sol_str, all_sols = bank_riddle
+            riddle, main_sol = MatchesExpression(s=riddle_str), MatchesExpression(s=main_sol_str)
+        res = MatchesInterface(riddle, main_sol, all_sols)
+        return res, res.get_riddle_image(), res.get_solution_image()
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_match_sprite(angle, size):
+        """
+        Returns the image of a match, rotated and resized
+        The sprites are cached, there are only a few orientations (see `POS`) and sizes
+
+        Parameters
+        ----------
+        angle (int):
+            rotation in degrees, counter-clockwise
+        size (int):
+            size of the sprite in pixels
+
+        Returns
+        -------
+        res (PIL.Image)
+        """
+        return MatchesInterface.IMG_MATCH.resize((size, size), Image.LANCZOS).rotate(angle, resample=Image.BICUBIC)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def get_glyph(char, scale):
+        """
+        Returns the image of a character, with all its matches
+        The top-left corner of the glyph is 2 match lengths above the base position of the character
+        Glyphs are cached, so the small random tilt of the matches is the same for all the occurrences of a character
+
+        Parameters
+        ----------
+        char (str)
+        scale (float):
+            scale of the matches
+
+        Returns
+        -------
+        res (PIL.Image)
+        """
+        unit = scale * MatchesInterface.MATCH_INIT_SCALE * MatchesInterface.RENDER_SCALE  # Size of a match in the image
+        size = round(unit)
+        res = Image.new("RGBA", (round(2 * unit), round(3 * unit)))
+
+        for match in MatchesInterface.MATCHES[char]:
+            x, y, angle = MatchesInterface.POS[match]
+            sprite = MatchesInterface.get_match_sprite(angle + randint(-2, 2), size)
+            res.alpha_composite(sprite, (round(x * unit), round((2 - y) * unit)))
+        return res
+
+    @staticmethod
+    def draw_char(char, offset, scale, base, img):
         """
         Draws one character on the canvas
 
@@ -88,22 +203,16 @@ class MatchesInterface:
         scale (int):
             scale of the image
         base (tuple):
-            base position of the first character
-        ax (matplotlib axis)
+            base position of the first character, in a 1920x1080 image
+        img (PIL.Image):
+            canvas, modified in place
         """
-        matches_to_draw = MatchesInterface.MATCHES[char]
-
-        for match in matches_to_draw:
-            x, y, angle = MatchesInterface.POS[match]
-            x = base[0] + (offset + x) * scale * MatchesInterface.MATCH_INIT_SCALE
-            y = base[1] - y * scale * MatchesInterface.MATCH_INIT_SCALE
-            angle += randint(-2, 2)
-
-            tr = mpl.transforms.Affine2D().scale(scale).translate(x, y) + ax.transData
-            ax.imshow(MatchesInterface.IMG_MATCH.rotate(angle), transform=tr)
+        x = base[0] + offset * scale * MatchesInterface.MATCH_INIT_SCALE
+        y = base[1] - 2 * scale * MatchesInterface.MATCH_INIT_SCALE
+        img.alpha_composite(MatchesInterface.get_glyph(char, scale), (round(x * MatchesInterface.RENDER_SCALE), round(y * MatchesInterface.RENDER_SCALE)))
 
     @staticmethod
-    def draw_expr(expr, scale, base, ax):
+    def draw_expr(expr, scale, base, img):
         """
         Draws all the characters of the expression
 
@@ -114,75 +223,67 @@ class MatchesInterface:
         scale (float):
             scale multiplier of the image
         base (float, float):
-            base position of the first character
-        ax (plt axis)
+            base position of the first character, in a 1920x1080 image
+        img (PIL.Image):
+            canvas, modified in place
         """
         for i, char in enumerate(expr.chars):
-            MatchesInterface.draw_char(char, i * 1.5, scale, base, ax)
+            MatchesInterface.draw_char(char, i * 1.5, scale, base, img)
 
-    def save_riddle(self, folder):
+    @staticmethod
+    def to_png(img):
         """
-        Generates the image of the riddle, without the solution
+        Encodes an image in PNG format, in memory
 
         Parameters
         ----------
-        folder (str):
-            folder where to save the image
+        img (PIL.Image)
+
+        Returns
+        -------
+        res (bytes)
+        """
+        res = BytesIO()
+        img.convert("RGB").save(res, format="PNG", compress_level=1)  # Fast compression, the image is only uploaded once
+        return res.getvalue()
+
+    def get_riddle_image(self):
         """
-        fig, ax = plt.subplots()
-        ax.imshow(MatchesInterface.IMG_BACKGROUND)
+        Generates the image of the riddle, without the solution
 
-        plt.axis("off")
-        plt.xlim(0, 1920)
-        plt.ylim(0, 1080)
-        ax.invert_yaxis()
+        Returns
+        -------
+        res (bytes):
+            in PNG format
+        """
+        img = MatchesInterface.IMG_BACKGROUND.copy()
 
         scale = 1156 / (len(self.riddle.chars) * 1.5 * MatchesInterface.MATCH_INIT_SCALE)
         scale = min(scale, 2)  # to avoid too big images
 
-        MatchesInterface.draw_expr(self.riddle, scale, (241, 615 + MatchesInterface.MATCH_INIT_SCALE * scale / 2), ax)
+        MatchesInterface.draw_expr(self.riddle, scale, (241, 615 + MatchesInterface.MATCH_INIT_SCALE * scale / 2), img)
 
-        plt.savefig(folder + "riddle.png", bbox_inches="tight", pad_inches=0)
-        plt.close(fig)
+        return MatchesInterface.to_png(img)
 
-    def save_solution(self, folder):
+    def get_solution_image(self):
         """
         Generates the image of the riddle + solution together
 
-        Parameters
-        ----------
-        folder (str):
-            folder where to save the image
+        Returns
+        -------
+        res (bytes):
+            in PNG format
         """
-        fig, ax = plt.subplots()
-        ax.imshow(MatchesInterface.IMG_BACKGROUND)
-
-        plt.axis("off")
-        plt.xlim(0, 1920)
-        plt.ylim(0, 1080)
-        ax.invert_yaxis()
+        img = MatchesInterface.IMG_BACKGROUND.copy()
 
         scale = 1156 / (max(len(self.riddle.chars), len(self.main_sol.chars)) * 1.5 * MatchesInterface.MATCH_INIT_SCALE)
         scale = min(scale, 1)  # to avoid too big images
 
-        MatchesInterface.draw_expr(self.riddle, scale, (241, 615 - .7 * MatchesInterface.MATCH_INIT_SCALE * scale), ax)
+        MatchesInterface.draw_expr(self.riddle, scale, (241, 615 - .7 * MatchesInterface.MATCH_INIT_SCALE * scale), img)
 
-        MatchesInterface.draw_expr(self.main_sol, scale, (241, 615 + 1.8 * MatchesInterface.MATCH_INIT_SCALE * scale), ax)
+        MatchesInterface.draw_expr(self.main_sol, scale, (241, 615 + 1.8 * MatchesInterface.MATCH_INIT_SCALE * scale), img)
 
-        plt.savefig(folder + "solution.png", bbox_inches="tight", pad_inches=0)
-        plt.close(fig)
-
-    def save_all(self, folder):
-        """
-        Saves both images
-
-        Parameters
-        ----------
-        folder (str):
-            folder where to save the images
-        """
-        self.save_riddle(folder)
-        self.save_solution(folder)
+        return MatchesInterface.to_png(img)
 
 
 class MatchesExpression:
@@ -207,6 +308,7 @@ class MatchesExpression:
         "7": [("7b", 5)],
         "7b": [("9s", 6)],
         "8": [],
+        "8s": [],
         "9": [("8", 4)],
         "9s": [("9", 3)],
         "+": [("4s", 8)],
@@ -299,9 +401,7 @@ class MatchesExpression:
         self.remove_spaces()
 
         # check if the expression is an equation
-        m = re.match(r"^-?\d+([+-]{1}\d+)*=-?\d+([+-]{1}\d+)*$", self.str)
-
-        return m and m.group(0) == self.str
+        return check_equation(self.str)[0]
 
     def remove_spaces(self):
         """
@@ -330,7 +430,7 @@ class MatchesExpression:
 
         # check if the entry is correct
         e1, e2 = self.str.split("=")
-        return evaluate_term(list(e1)) == evaluate_term(list(e2))
+        return evaluate_term(e1) == evaluate_term(e2)
 
     def clean(self, prev_move=((-inf, -inf), (-inf, -inf))):
         """
@@ -405,58 +505,64 @@ class MatchesExpression:
         deleted (bool):
             whether the character from the moved match was deleted
         """
+        for move in MatchesExpression.iter_far_moves(self.chars, already_moved):
+            yield self._apply_move(*move)
+
+    @staticmethod
+    def iter_far_moves(chars, already_moved=((-1, -1), (-1, -1), False)):
+        """
+        Generator for the moves of `move_far`, without applying them
+
+        Parameters
+        ----------
+        chars (List[str]):
+            characters of the expression
+        already_moved (((int, int), (int, int), bool)):
+            see `move_far`
+
+        Returns
+        -------
+        i (int):
+            index of the character from which the match is taken
+        new_symbol (str):
+            new value of this character
+        j (int):
+            index of the character receiving the match, or where the new character is inserted
+        new_symbol2 (str):
+            new value of this character, or the inserted character
+        insert (bool):
+            whether a new character is inserted
+        dest (((int, int), (int, int))):
+            from/to coordinates of the moved match, before removing the deleted characters
+        """
         (from_char_i, from_match_i), (to_char_i, to_match_i), from_deleted = already_moved
-        for i, symbol in enumerate(self.chars):
+        for i, symbol in enumerate(chars):
             for new_symbol, i_from in MatchesExpression.REMOVE_MATCH[symbol]:
 
                 if to_char_i == i and to_match_i == i_from: continue  # Moving the same match
 
                 # Move the match on another digit
-                for j, symbol2 in enumerate(self.chars):
+                for j, symbol2 in enumerate(chars):
                     if i == j: continue  # It's the same digit -> handled by move_change
 
                     for new_symbol2, i_to in MatchesExpression.ADD_MATCH[symbol2]:
                         if from_char_i == j and from_match_i == i_to and not from_deleted: continue  # Move the match back to the original position of the previous match
 
-                        dest = (i, i_from), (j, i_to)  # Destination of the moved match
-
-                        new_expr_list = copy(self.chars)
-                        new_expr_list[i] = new_symbol
-                        new_expr_list[j] = new_symbol2
-
-                        new_expr = MatchesExpression(new_expr_list)
-                        dest, deleted = new_expr.clean(dest)
-
-                        yield new_expr, dest, deleted
+                        yield i, new_symbol, j, new_symbol2, False, ((i, i_from), (j, i_to))
 
                 # Add a one or a "-" somewhere
-                for j in range(len(self.chars) + 1):
+                for j in range(len(chars) + 1):
 
                     if from_deleted and j == from_char_i: continue  # Trying to put the match back where it initially was
                     if new_symbol == "nothing" and (j == i or j == i + 1): continue  # Removed a "-" or "1s" and put it exactly where it was
 
                     actual_i = i if i < j else i + 1
-
-                    new_expr_list = copy(self.chars)
-                    new_expr_list[i] = new_symbol
-                    new_expr_list.insert(j, "1s")
-
-                    dest = (actual_i, i_from), (j, MatchesInterface.MATCHES["1s"][0])  # Destination of the moved match
-                    new_expr = MatchesExpression(new_expr_list)
-                    dest, deleted = new_expr.clean(dest)
-                    yield new_expr, dest, deleted
+                    yield i, new_symbol, j, "1s", True, ((actual_i, i_from), (j, MatchesInterface.MATCHES["1s"][0]))
 
                     # Putting a "-" next to another "-" will require to remove one, but this would be equivalent to do a single move
-                    if (j - 1 < 0 or self.chars[j - 1] == "-") and (j + 1 >= len(self.chars) or self.chars[j + 1] == "-"): continue
-
-                    new_expr_list = copy(self.chars)
-                    new_expr_list[i] = new_symbol
-                    new_expr_list.insert(j, "-")
+                    if (j - 1 < 0 or chars[j - 1] == "-") and (j + 1 >= len(chars) or chars[j + 1] == "-"): continue
 
-                    dest = (actual_i, i_from), (j, MatchesInterface.MATCHES["-"][0])  # Destination of the moved match
-                    new_expr = MatchesExpression(new_expr_list)
-                    dest, deleted = new_expr.clean(dest)
-                    yield new_expr, dest, deleted
+                    yield i, new_symbol, j, "-", True, ((actual_i, i_from), (j, MatchesInterface.MATCHES["-"][0]))
 
     def move_change(self, already_moved=((-1, -1), (-1, -1), False)):
         """
@@ -476,19 +582,59 @@ class MatchesExpression:
         deleted (bool):
             whether the character from the moved match was deleted
         """
+        for move in MatchesExpression.iter_change_moves(self.chars, already_moved):
+            yield self._apply_move(*move)
+
+    @staticmethod
+    def iter_change_moves(chars, already_moved=((-1, -1), (-1, -1), False)):
+        """
+        Generator for the moves of `move_change`, without applying them
+
+        Parameters
+        ----------
+        chars (List[str]):
+            characters of the expression
+        already_moved (((int, int), (int, int), bool)):
+            see `move_change`
+
+        Returns
+        -------
+        see `iter_far_moves`, `j` and `new_symbol2` being None
+        """
         (from_char_i, from_match_i), (to_char_i, to_match_i), from_deleted = already_moved
-        for i, symbol in enumerate(self.chars):
+        for i, symbol in enumerate(chars):
             for (new_symbol, (i_from, i_to)) in MatchesExpression.MOVE_MATCH[symbol]:
                 if to_char_i == i and to_match_i == i_from: continue  # Move the same match twice
                 if from_char_i == i and from_match_i == i_to and not from_deleted: continue  # Move the match back to the original position of the previous match
 
-                dest = (i, i_from), (i, i_to)  # Destination of the moved match
-                final_expr_list = copy(self.chars)
-                final_expr_list[i] = new_symbol
+                yield i, new_symbol, None, None, False, ((i, i_from), (i, i_to))
+
+    def _apply_move(self, i, new_symbol, j, new_symbol2, insert, dest):
+        """
+        Returns the expression obtained with a move (see `iter_far_moves`)
+
+        Parameters
+        ----------
+        see the values returned by `iter_far_moves`
+
+        Returns
+        -------
+        new_expr (Matches_Expression)
+        dest ((int, int)):
+            destination indices of the moved match
+        deleted (bool):
+            whether the character from the moved match was deleted
+        """
+        new_expr_list = copy(self.chars)
+        new_expr_list[i] = new_symbol
+        if insert:
+            new_expr_list.insert(j, new_symbol2)
+        elif j is not None:
+            new_expr_list[j] = new_symbol2
 
-                final_expr = MatchesExpression(final_expr_list)
-                dest, deleted = final_expr.clean(dest)
-                yield final_expr, dest, deleted
+        new_expr = MatchesExpression(new_expr_list)
+        dest, deleted = new_expr.clean(dest)
+        return new_expr, dest, deleted
 
     def __str__(self):
         return self.str + " - " + str(self.chars)
@@ -547,27 +693,119 @@ def gen_number(max_size):
 
 def evaluate_term(chars):
     """
-    Evaluates one side of an equation (removes leading 0s then uses eval())
+    Evaluates one side of an equation, made of numbers (possibly with leading 0s) separated by "+" and "-"
+    Consecutive signs are combined, as in Python (e.g. "3--2" = 5)
 
     Parameters
     ----------
-    L (List[char])
+    chars (List[char] or str)
 
     Returns
     -------
     int
     """
-    new_chars = copy(chars)
-    to_remove = []
-    for i, char in enumerate(new_chars):
-        if char != "0" or i == len(new_chars) - 1: continue
+    res = 0
+    number = 0
+    sign = 1
+    after_sign = True  # Whether the previous character is a sign (or the beginning of the term)
+    for char in chars:
+        if char in "+-":
+            if not after_sign:
+                res += sign * number
+                number = 0
+                sign = 1
+            if char == "-":
+                sign = -sign
+            after_sign = True
+        else:
+            number = number * 10 + int(char)
+            after_sign = False
+    return res + sign * number
+
+
+EQUATION_PATTERN = re.compile(r"-?\d+([+-]\d+)*=-?\d+([+-]\d+)*")
+# Representation of each symbol in `MatchesExpression.str`
+STR_OF_SYMBOL = {symbol: symbol[0] for symbol in chain(MatchesExpression.ADD_MATCH, MatchesExpression.REMOVE_MATCH, MatchesExpression.MOVE_MATCH)} | {"nothing": ""}
+NO_MOVE = ((-1, -1), (-1, -1), False)  # Default value for the previous move of `MatchesExpression.move_far` and `MatchesExpression.move_change`
+
+
+@lru_cache(maxsize=1 << 16)
+def check_equation(s):
+    """
+    Checks whether a string is an equality, and whether it is correct
+    The result is cached since the same expressions are reached by many different moves
 
-        if i == 0 or ((i - 1 in to_remove or new_chars[i - 1] in "+-") and new_chars[i + 1] not in "+-"):
-            to_remove.append(i)
+    Parameters
+    ----------
+    s (str):
+        string representation of an expression, without spaces
 
-    for i, j in enumerate(to_remove):
-        del new_chars[j - i]
-    return eval("".join(new_chars))
+    Returns
+    -------
+    is_valid (bool)
+    is_correct (bool)
+    """
+    if EQUATION_PATTERN.fullmatch(s) is None: return False, False
+
+    e1, e2 = s.split("=")
+    return True, evaluate_term(e1) == evaluate_term(e2)
+
+
+@lru_cache(maxsize=1 << 12)
+def get_moves(chars, already_moved=NO_MOVE, far=True):
+    """
+    Returns the expressions obtained by moving one match, which are cached since the candidate riddles share many of them
+
+    Parameters
+    ----------
+    chars (Tuple[str]):
+        characters of the expression
+    already_moved (((int, int), (int, int), bool)):
+        see `MatchesExpression.move_far`
+    far (bool):
+        whether to move a match to another character (see `MatchesExpression.move_far`) or in the same character (see `MatchesExpression.move_change`)
+
+    Returns
+    -------
+    res (Tuple[(Tuple[str], ((int, int), (int, int)), bool)]):
+        characters of the new expression, destination indices of the moved match and whether the character from the moved match was deleted
+    """
+    expr = MatchesExpression(list(chars))
+    moves = expr.move_far(already_moved) if far else expr.move_change(already_moved)
+    return tuple((tuple(new_expr.chars), dest, deleted) for new_expr, dest, deleted in moves)
+
+
+def get_solutions_after_move(chars, already_moved):
+    """
+    Returns the correct equations obtained by moving one more match
+    Only the string representation of the new expressions is computed, directly from the moves
+
+    Parameters
+    ----------
+    chars (Tuple[str]):
+        characters of the expression, after the first move
+    already_moved (((int, int), (int, int), bool)):
+        the first move, see `MatchesExpression.move_far`
+
+    Returns
+    -------
+    res (List[str]):
+        the equations, without duplicates
+    """
+    base = [STR_OF_SYMBOL[char] for char in chars]
+    sols = dict()  # Used as an ordered set
+    for i, new_symbol, j, new_symbol2, insert, _ in chain(MatchesExpression.iter_far_moves(chars, already_moved), MatchesExpression.iter_change_moves(chars, already_moved)):
+        new_str = base.copy()
+        new_str[i] = STR_OF_SYMBOL[new_symbol]
+        if insert:
+            new_str.insert(j, STR_OF_SYMBOL[new_symbol2])
+        elif j is not None:
+            new_str[j] = STR_OF_SYMBOL[new_symbol2]
+
+        s = "".join(new_str)
+        if s not in sols and all(check_equation(s)):
+            sols[s] = None
+    return list(sols)
 
 
 def gen_equality(nb_num_left, nb_num_right):
@@ -639,7 +877,8 @@ def generate_game(eq, nb_try=300, max_time=inf):
     sols = []
     riddle = None
 
-    move_set1 = list(chain(eq.move_far(), eq.move_change()))
+    eq_chars = tuple(eq.chars)
+    move_set1 = get_moves(eq_chars, NO_MOVE, True) + get_moves(eq_chars, NO_MOVE, False)
     for i in range(nb_try):
         found = False
 
@@ -647,14 +886,16 @@ def generate_game(eq, nb_try=300, max_time=inf):
         while not found and (i == 0 or time.time() - t1 < max_time):
             cand, dest, deleted = choice(move_set1)
             dest = (dest[0], dest[1], deleted)
-            move_set2 = list(chain(cand.move_far(dest), cand.move_change(dest)))
-            candidate, _, _ = choice(move_set2)
-            found = candidate.is_valid() and not candidate.has_fancy_char() and not candidate.is_correct()
+            move_set2 = get_moves(cand, dest, True) + get_moves(cand, dest, False)
+            candidate_chars, _, _ = choice(move_set2)
+            is_valid, is_correct = check_equation("".join(char[0] for char in candidate_chars))
+            found = is_valid and not any(len(char) > 1 for char in candidate_chars) and not is_correct
 
         if not found:
             break
 
         # Counting its solutions
+        candidate = MatchesExpression(list(candidate_chars))
         new_sols = get_all_solutions(candidate)
 
         if len(new_sols) < min_sol:
@@ -670,23 +911,56 @@ def generate_game(eq, nb_try=300, max_time=inf):
     return riddle, eq, sols
 
 
-def get_all_solutions(riddle):
+def get_all_solutions(riddle, max_nb=inf):
     """
     Computes all the 2-moves solutions from the riddle (the intermediate state must be a valid solution)
 
+    Parameters
+    ----------
+    riddle (Matches_Expression)
+    max_nb (int):
+        the search stops as soon as more than `max_nb` solutions are found
+
     Returns
     -------
     sols (List[str]):
         equations that would be valid solutions for the given riddle
     """
-    sols = []
-    for access, dest, deleted in chain(riddle.move_change(), riddle.move_far()):
+    chars = tuple(riddle.chars)
+    sols = dict()  # Used as an ordered set
+    for access, dest, deleted in chain(get_moves(chars, NO_MOVE, False), get_moves(chars, NO_MOVE, True)):
+        for s in get_solutions_after_move(access, (dest[0], dest[1], deleted)):
+            sols[s] = None
+        if len(sols) > max_nb: break
+
+    return list(sols)
+
+
+def get_all_riddles(eq):
+    """
+    Computes all the riddles obtained by moving two matches of an equation
+    As in `generate_game`, the riddles are valid but incorrect equations, without small or big versions of numbers
+
+    Parameters
+    ----------
+    eq (Matches_Expression)
+
+    Returns
+    -------
+    riddles (List[Matches_Expression])
+    """
+    eq_chars = tuple(eq.chars)
+    riddles = dict()  # Used as an ordered set
+    for cand, dest, deleted in get_moves(eq_chars, NO_MOVE, True) + get_moves(eq_chars, NO_MOVE, False):
         dest = (dest[0], dest[1], deleted)
-        for accessible, destination, deleted2 in chain(access.move_far(dest), access.move_change(dest)):
-            if accessible.is_valid() and accessible.is_correct() and accessible.str not in sols:
-                sols.append(accessible.str)
+        for candidate_chars, _, _ in chain(get_moves(cand, dest, True), get_moves(cand, dest, False)):
+            if candidate_chars in riddles or any(len(char) > 1 for char in candidate_chars): continue
+
+            is_valid, is_correct = check_equation("".join(candidate_chars))
+            if is_valid and not is_correct:
+                riddles[candidate_chars] = None
 
-    return sols
+    return [MatchesExpression(list(chars)) for chars in riddles]
 
 
 async def get_riddle():
@@ -1,9 +1,80 @@
 import bisect
-import pandas as pd
+from functools import lru_cache
+import numpy as np
 from random import choice, sample
-import re
 from unidecode import unidecode
 
+from . import word_lists
+
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+class SubseqIndex:
+    """
+    Precomputed data about the list of all accepted words, to quickly find the words having a given subsequence
+    Only the words containing all the letters of a subsequence (as many times as in the subsequence) are checked letter by letter
+    """
+
+    def __init__(self, all_clean_words, all_words):
+        """
+        Parameters
+        ----------
+        all_clean_words (List[str]):
+            list of all (cleaned) words
+        all_words (List[str]):
+            list of all words, the i-th word corresponding to the i-th clean word
+        """
+        lengths = np.fromiter(map(len, all_clean_words), dtype=np.int64, count=len(all_clean_words))
+        letters = np.frombuffer("".join(all_clean_words).encode("ascii"), dtype=np.uint8).astype(np.int64) - ord("a")
+        word_ids = np.repeat(np.arange(len(lengths)), lengths)
+
+        self.counts = np.bincount(word_ids * len(ALPHABET) + letters, minlength=len(lengths) * len(ALPHABET)).reshape(-1, len(ALPHABET)).astype(np.uint8)
+        self.masks = (self.counts > 0).astype(np.int64) @ (1 << np.arange(len(ALPHABET), dtype=np.int64))  # Letters present in each word
+        self.unclean_lengths = np.fromiter(map(len, all_words), dtype=np.int64, count=len(all_words))
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def get(all_clean_words, all_words):
+        """
+        Returns the index of a list of words, which is only computed once
+
+        Parameters
+        ----------
+        all_clean_words (WordList)
+        all_words (WordList)
+
+        Returns
+        -------
+        SubseqIndex
+        """
+        return SubseqIndex(all_clean_words, all_words)
+
+    def get_candidates(self, subseq):
+        """
+        Returns the words which contain each letter of a subsequence at least as many times as the subsequence
+
+        Parameters
+        ----------
+        subseq (str)
+
+        Returns
+        -------
+        candidates (np.ndarray):
+            indices of the words, in increasing order
+        is_projection (np.ndarray):
+            for each candidate, whether it contains each letter of the subsequence exactly as many times as the subsequence (see `SubseqChallenge.check_projection`)
+        """
+        letters = sorted(set(subseq))
+        columns = [ALPHABET.index(c) for c in letters]
+        required = np.array([subseq.count(c) for c in letters], dtype=np.uint8)
+        mask = sum(1 << i for i in columns)
+
+        candidates = np.flatnonzero((self.masks & mask) == mask)
+        counts = self.counts[candidates][:, columns]
+        enough = np.all(counts >= required, axis=1)
+        return candidates[enough], np.all(counts[enough] == required, axis=1)
+
 
 class SubseqChallenge:
     """
@@ -21,7 +92,7 @@ class SubseqChallenge:
         ----------
         answer (str)
         all_clean_words (List[str]):
-            list of all accepted (clean) words
+            sorted list of all accepted (clean) words, the shared list of all clean words if None
         check_if_real_word (bool):
             whether to check if the answer is in the list of all accepted words
 
@@ -31,15 +102,14 @@ class SubseqChallenge:
         """
         answer = self._clean_word(answer)
         if all_clean_words is None:
-            all_clean_words = SubseqChallenge.get_word_list("src/events/assets/all_french_words_clean.txt")
+            all_clean_words = word_lists.get_word_list(word_lists.ALL_CLEAN_WORDS_PATH)
 
         if check_if_real_word:
             # Binary search to check if the answer is in the list of all accepted words (faster than using "in" since the list is sorted)
             i = bisect.bisect_left(all_clean_words, answer)
             if i == len(all_clean_words) or all_clean_words[i] != answer: return False
 
-        it = iter(answer)
-        return all(c in it for c in self.subseq)
+        return SubseqChallenge._has_subsequence(answer, self.subseq, 1)
 
     def check_projection(self, answer):
         """
@@ -73,8 +143,30 @@ class SubseqChallenge:
         bool
         """
         answer = self._clean_word(answer)
-        pattern = ".*" + ".+".join(self.subseq) + ".*"
-        return bool(re.match(pattern, answer))
+        return SubseqChallenge._has_subsequence(answer, self.subseq, 2)
+
+    @staticmethod
+    def _has_subsequence(word, subseq, min_gap):
+        """
+        Checks if a word has a given subsequence, with a minimum distance between the positions of consecutive letters of the subsequence
+        Each letter is matched as early as possible, which finds a match whenever there is one
+
+        Parameters
+        ----------
+        word (str)
+        subseq (str)
+        min_gap (int):
+            1 for a plain subsequence, 2 to require at least one letter between consecutive letters of the subsequence
+
+        Returns
+        -------
+        bool
+        """
+        pos = word.find(subseq[0]) if len(subseq) > 0 else 0
+        for c in subseq[1:]:
+            if pos < 0: return False
+            pos = word.find(c, pos + min_gap)
+        return pos >= 0
 
     @staticmethod
     def new(length):
@@ -89,9 +181,9 @@ class SubseqChallenge:
         str:
             example solution that solves all levels
         """
-        easy_words = SubseqChallenge.get_word_list("src/events/assets/easy_french_words.txt")
-        all_clean_words = SubseqChallenge.get_word_list("src/events/assets/all_french_words_clean.txt")
-        all_words = SubseqChallenge.get_word_list("src/events/assets/all_french_words.txt")
+        easy_words = word_lists.get_word_list(word_lists.EASY_WORDS_PATH)
+        all_clean_words = word_lists.get_word_list(word_lists.ALL_CLEAN_WORDS_PATH)
+        all_words = word_lists.get_word_list(word_lists.ALL_WORDS_PATH)
 
         i = 1
         res = SubseqChallenge.attempt_find_new(easy_words, all_words, all_clean_words, length)
@@ -140,23 +232,29 @@ class SubseqChallenge:
         subseq_indices = sample(range(len(solution_lvl1_clean)), length)
         subseq = "".join([solution_lvl1_clean[i] for i in sorted(subseq_indices)])
 
-        # Count how many solutions  match each level
+        # Only the words containing the letters of the subsequence can be solutions
         subseq = SubseqChallenge(subseq)
+        index = SubseqIndex.get(all_clean_words, all_words)
+        candidates, is_projection = index.get_candidates(subseq.subseq)
+
+        # Condition 2: there are no solutions obtained by adding less than 2 letters
+        # Checked first since it only concerns a few words, and discards the subsequence right away
+        short = index.unclean_lengths[candidates] < len(subseq.subseq) + 2
+        if any(SubseqChallenge._has_subsequence(all_clean_words[i], subseq.subseq, 1) for i in candidates[short].tolist()): return None
+
+        # Count how many solutions match each level
         all_sols = [[], [], [], []]
+        for i, b2 in zip(candidates[~short].tolist(), is_projection[~short].tolist()):
+            word_clean = all_clean_words[i]
+            if not SubseqChallenge._has_subsequence(word_clean, subseq.subseq, 1): continue
 
-        for i, word_clean in enumerate(all_clean_words):
             word = all_words[i]
-            b1 = subseq.check_default(word_clean, all_clean_words=easy_words, check_if_real_word=False)
-            b2 = subseq.check_projection(word_clean)
-            b3 = subseq.check_with_intermediate(word_clean)
-
-            # Condition 2: there are no solutions obtained by adding less than 2 letters
-            if b1 and len(word) < len(subseq.subseq) + 2: return None
+            b3 = SubseqChallenge._has_subsequence(word_clean, subseq.subseq, 2)
 
-            if b1: all_sols[0].append(word)
-            if b1 and b2: all_sols[1].append(word)
-            if b1 and b3: all_sols[2].append(word)
-            if b1 and b2 and b3: all_sols[3].append(word)
+            all_sols[0].append(word)
+            if b2: all_sols[1].append(word)
+            if b3: all_sols[2].append(word)
+            if b2 and b3: all_sols[3].append(word)
 
         # Condition 3: there exists a solution for each level
         if any(len(s) == 0 for s in all_sols): return None
@@ -177,12 +275,13 @@ class SubseqChallenge:
         str
         """
         res = unidecode(word.lower())
-        return "".join(filter(lambda c: c in "abcdefghijklmnopqrstuvwxyz", res))
+        return "".join(filter(lambda c: c in ALPHABET, res))
 
     @staticmethod
     def get_word_list(path):
         """
         Returns word list from a given path
+        The list is shared with all the other callers, see `word_lists.get_word_list`
 
         Parameters
         ----------
@@ -191,10 +290,9 @@ class SubseqChallenge:
 
         Returns
         -------
-        List[str]
+        WordList
         """
-        df = pd.read_csv(path, header=None, encoding="latin-1")
-        return df.astype(str)[0].tolist()
+        return word_lists.get_word_list(path)
 
     @staticmethod
     def get_unclean_equivalent(*words):
@@ -211,15 +309,4 @@ class SubseqChallenge:
         List[str]:
             list of unclean words
         """
-        all_clean_words = SubseqChallenge.get_word_list("src/events/assets/all_french_words_clean.txt")
-        all_words = SubseqChallenge.get_word_list("src/events/assets/all_french_words.txt")
-
-        res = []
-        for word in words:
-            i = bisect.bisect_left(all_clean_words, word)
-
-            if i == len(all_clean_words) or all_clean_words[i] != word:
-                raise ValueError(f"Word {word} not found in the list of all clean words")
-
-            res.append(all_words[i])
-        return res
+        return word_lists.get_unclean_equivalent(*words)
@@ -0,0 +1,127 @@
+from array import array
+from collections.abc import Sequence
+from functools import lru_cache
+import numpy as np
+
+
+ALL_WORDS_PATH = "src/events/assets/all_french_words.txt"
+ALL_CLEAN_WORDS_PATH = "src/events/assets/all_french_words_clean.txt"  # Sorted, the i-th word is the clean version of the i-th word of ALL_WORDS_PATH
+EASY_WORDS_PATH = "src/events/assets/easy_french_words.txt"
+
+
+class WordList(Sequence):
+    """
+    Read-only list of words, loaded from a file with one word per line
+    The words are kept as a single block of bytes with the offset of each of them, which is much more compact than a list of strings
+    Each word is followed by a line break, so the i-th word is between `offsets[i]` and `offsets[i + 1] - 1`
+    """
+
+    def __init__(self, path, encoding="latin-1"):
+        """
+        Parameters
+        ----------
+        path (str):
+            path to the file containing the word list. Each word should be on a separate line, with no header
+        encoding (str):
+            encoding of the file, each character should be encoded on one byte so that the byte order matches the order of the strings
+        """
+        with open(path, "rb") as f:
+            data = f.read().replace(b"\r\n", b"\n")
+        if not data.endswith(b"\n"):
+            data += b"\n"
+
+        self.encoding = encoding
+        self._data = data
+        line_breaks = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+        self._offsets = array("q", np.concatenate(([0], line_breaks + 1)).astype(np.int64).tobytes())
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("word list index out of range")
+        return self._data[self._offsets[i]:self._offsets[i + 1] - 1].decode(self.encoding)
+
+    def __iter__(self):
+        data = self._data
+        encoding = self.encoding
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            yield data[offsets[i]:offsets[i + 1] - 1].decode(encoding)
+
+    def find(self, word):
+        """
+        Returns the index of the first occurrence of a word, with a binary search
+        The list should be sorted
+
+        Parameters
+        ----------
+        word (str)
+
+        Returns
+        -------
+        int:
+            -1 if the word is not in the list
+        """
+        key = word.encode(self.encoding, errors="replace")
+        data = self._data
+        offsets = self._offsets
+
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if data[offsets[mid]:offsets[mid + 1] - 1] < key:
+                low = mid + 1
+            else:
+                high = mid
+
+        if low < len(self) and data[offsets[low]:offsets[low + 1] - 1] == key: return low
+        return -1
+
+
+@lru_cache(maxsize=None)
+def get_word_list(path):
+    """
+    Returns the word list stored in a file
+    Each file is only read once, and the same list is shared by all the callers
+
+    Parameters
+    ----------
+    path (str):
+        path to the file containing the word list. Each word should be on a separate line, with no header
+
+    Returns
+    -------
+    WordList
+    """
+    return WordList(path)
+
+
+def get_unclean_equivalent(*words):
+    """
+    Returns the unclean equivalent of the given clean words
+
+    Parameters
+    ----------
+    words (List[str]):
+        list of clean words
+
+    Returns
+    -------
+    List[str]:
+        list of unclean words
+    """
+    all_clean_words = get_word_list(ALL_CLEAN_WORDS_PATH)
+    all_words = get_word_list(ALL_WORDS_PATH)
+
+    res = []
+    for word in words:
+        i = all_clean_words.find(word)
+        if i == -1:
+            raise ValueError(f"Word {word} not found in the list of all clean words")
+
+        res.append(all_words[i])
+    return res
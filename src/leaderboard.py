@@ -0,0 +1,197 @@
+from sortedcontainers import SortedList
+
+from database import db
+
+
+class Leaderboard:
+    """
+    Ranking of the active users for one field of their profile, kept sorted as the profiles are modified
+    The ranking is updated with a write hook on the database (see `MyDatabase.add_write_hook`), and fully rebuilt after structural changes (e.g. a new season)
+    Users with the same score are ordered by user id
+    """
+
+    def __init__(self, key, score_function=None):
+        """
+        Parameters
+        ----------
+        key (str):
+            the field of the profiles used as a score
+        score_function (function):
+            converts the value of the field into a score (the value itself if None)
+        """
+        self.key = key
+        self.score_function = score_function if score_function is not None else lambda value: value
+        self.version = 0  # incremented every time the ranking changes
+
+        self._entries = SortedList()  # (-score, user id)
+        self._scores = dict()  # user id -> score
+        self._is_valid = False
+
+        db.add_write_hook(self._on_write)
+
+    def __len__(self):
+        self._check_valid()
+        return len(self._entries)
+
+    def top(self, k):
+        """
+        Returns the users with the best scores
+
+        Parameters
+        ----------
+        k (int):
+            maximum number of users returned
+
+        Returns
+        -------
+        res (List[(str, int)]):
+            (user id, score), by decreasing score
+        """
+        self._check_valid()
+        return [(user_id, -score) for score, user_id in self._entries.islice(0, k)]
+
+    def get_first(self):
+        """
+        Returns the users ranked first (several of them in case of ties)
+
+        Returns
+        -------
+        res (List[(str, int)]):
+            (user id, score)
+        """
+        self._check_valid()
+        if len(self._entries) == 0: return []
+
+        best = self._entries[0][0]
+        return [(user_id, -score) for score, user_id in self._entries.irange((best, ""), (best + 1, ""), inclusive=(True, False))]
+
+    def get_score(self, user_id):
+        """
+        Returns the score of a user, or None if the user is not active
+
+        Parameters
+        ----------
+        user_id (str)
+
+        Returns
+        -------
+        res (int)
+        """
+        self._check_valid()
+        return self._scores.get(user_id)
+
+    def get_rank(self, user_id):
+        """
+        Returns the rank of a user, users with the same score sharing the same rank
+
+        Parameters
+        ----------
+        user_id (str)
+
+        Returns
+        -------
+        res (int):
+            1 + the number of users with a strictly better score, or None if the user is not active
+        """
+        score = self.get_score(user_id)
+        if score is None: return None
+
+        return self._entries.bisect_left((-score, "")) + 1
+
+    def get_gap_to_first(self, user_id):
+        """
+        Returns the difference between the best score and the score of a user
+
+        Parameters
+        ----------
+        user_id (str)
+
+        Returns
+        -------
+        res (int):
+            None if the user is not active
+        """
+        score = self.get_score(user_id)
+        if score is None: return None
+
+        return -self._entries[0][0] - score
+
+    def _set_score(self, user_id, score):
+        """
+        Moves a user in the ranking
+
+        Parameters
+        ----------
+        user_id (str)
+        score (int):
+            the new score of the user, None to remove the user from the ranking
+        """
+        old_score = self._scores.get(user_id)
+        if old_score == score: return
+
+        if old_score is not None:
+            self._entries.remove((-old_score, user_id))
+            del self._scores[user_id]
+        if score is not None:
+            self._entries.add((-score, user_id))
+            self._scores[user_id] = score
+
+        self.version += 1
+
+    def _check_valid(self):
+        """
+        Rebuilds the ranking if the active profiles changed since it was last built
+        """
+        if self._is_valid: return
+
+        self._scores = {user_id: self.score_function(profile[self.key]) for user_id, profile in db.view("profiles", "active").items()}
+        self._entries = SortedList((-score, user_id) for user_id, score in self._scores.items())
+        self._is_valid = True
+        self.version += 1
+
+    def _on_write(self, path):
+        """
+        Updates the ranking after a change in the database
+
+        Parameters
+        ----------
+        path (tuple):
+            keys leading from the root of the database to the modified value
+        """
+        if not self._is_valid or path[0] != "profiles": return
+
+        if len(path) <= 2:  # All the profiles of a category were replaced
+            self._is_valid = False
+            self.version += 1
+            return
+
+        if path[1] != "active" or (len(path) > 3 and path[3] != self.key): return
+
+        user_id = str(path[2])
+        try:
+            score = self.score_function(db.view("profiles", "active", user_id)[self.key])
+        except KeyError:  # Profile removed
+            score = None
+        self._set_score(user_id, score)
+
+
+_leaderboards = dict()
+
+
+def get_leaderboard(key):
+    """
+    Returns the ranking of the active users for a field of their profile
+    The ranking of each field is created the first time it is needed
+
+    Parameters
+    ----------
+    key (str):
+        "piflouz_balance", "discovered_piflex" (ranked by number of images) or "donation_balance"
+
+    Returns
+    -------
+    res (Leaderboard)
+    """
+    if key not in _leaderboards:
+        _leaderboards[key] = Leaderboard(key, len if key == "discovered_piflex" else None)
+    return _leaderboards[key]
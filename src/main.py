@@ -12,6 +12,7 @@ from database import db
 import events
 import pibox
 import powerups
+from process_pool import process_pool
 import rank_handlers
 import seasons
 import socials
@@ -67,7 +68,8 @@ async def on_startup():
         "piflouz_generated",    # to keep track of the piflouz generated by the bot through the season
         "events",               # gathering all the data relative to the events
         "is_currently_live",    # to keep track of the live status of the streamers
-        "previous_live_message_time"  # to keep track of the last time a live message was sent for each streamer
+        "previous_live_message_time",  # to keep track of the last time a live message was sent for each streamer
+        "match_riddles_used"    # number of riddles of each group of the match riddle bank already used, and fingerprint of the bank
     ]:
         if key not in db.keys():
             db[key] = dict()
@@ -124,6 +126,7 @@ async def on_startup():
     socials.check_birthday.start(bot)
     socials.check_profile_picture_update.start(bot)
     utils.backup_db.start()
+    utils.render_piflouz_message.start(bot)
 
     await pibox.load_all_pibox(bot)
     await events.register_listeners(bot)
@@ -150,6 +153,11 @@ async def on_message_create(message_event):
 
 if __name__ == "__main__":
     Constants.load()  # Due to import circular import issues
+    process_pool.start(Constants.PROCESS_POOL_WORKERS)  # Before the other threads are started, since the workers are forked
+    db.enable_wal()
+    db.enable_delayed_flush(0.1)
+    db.enable_writer_thread()
+    db.prefetch(["profiles/active", "events", "pibox"])
 
     import achievements  # to register the listeners  # noqa: F401
 
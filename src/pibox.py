@@ -1,4 +1,3 @@
-import functools
 from interactions import Button, ButtonStyle, IntervalTrigger, auto_defer, component_callback, listen
 from random import random, randrange, shuffle
 import requests
@@ -24,20 +23,15 @@ async def pibox_task(bot):
     ----------
     bot (interactions.Client)
     """
-    event = events.get_event_object(events.EventType.PASSIVE)
-    drop_rate_multiplier = 1
+    drop_rate_multiplier = user_profile.get_event_modifiers().pibox_rate
 
-    if event is not None:
-        powerups_list = event.get_powerups()
-        drop_rate_multiplier = functools.reduce(lambda accu, powerup: accu * powerup.get_pibox_rate_multiplier_value(), powerups_list, drop_rate_multiplier)
+    table = RandomPoolTable.get_compiled_pibox_table()
 
-    table = RandomPoolTable.compute_pibox_table()
-
-    for pool, drop_rate in table.pools:
+    for pool, drop_rate in table:
         drop_rate = min(1, drop_rate * drop_rate_multiplier)
 
         if random() < drop_rate:
-            cls = eval(pool.get_random())
+            cls = globals()[pool.get_random()]
             pibox = await cls.new(bot)
             if pibox is not None:
                 add_box_to_db(pibox)
@@ -254,13 +248,7 @@ class QuickReactPibox(Pibox):
 
         if piflouz_quantity is None:
             # Compute the maximum amount of piflouz that can be given
-            max_size = Constants.MAX_PIBOX_AMOUNT
-            event = events.get_event_object(events.EventType.PASSIVE)
-
-            if event is not None:
-                powerups_list = event.get_powerups()
-                max_size = round(functools.reduce(lambda accu, powerup: accu * powerup.get_pibox_reward_multiplier_value(), powerups_list, max_size))
-
+            max_size = round(Constants.MAX_PIBOX_AMOUNT * user_profile.get_event_modifiers().pibox_reward)
             piflouz_quantity = randrange(max_size)
 
         if is_giveaway:
@@ -508,11 +496,7 @@ class TriviaPibox(Pibox):
         pibox_id = Pibox.get_new_id()
 
         # Computing the maximum amount of piflouz that can be given
-        max_size = Constants.MAX_PIBOX_AMOUNT
-        event = events.get_event_object(events.EventType.PASSIVE)
-        if event is not None:
-            powerups_list = event.get_powerups()
-            max_size = round(functools.reduce(lambda accu, powerup: accu * powerup.get_pibox_reward_multiplier_value(), powerups_list, max_size))
+        max_size = round(Constants.MAX_PIBOX_AMOUNT * user_profile.get_event_modifiers().pibox_reward)
 
         piflouz_quantity = randrange(max_size)
 
@@ -669,11 +653,7 @@ class HauntedPibox(QuickReactPibox):
         emoji_id, emoji = QuickReactPibox._select_emoji()
 
         # Compute the maximum amount of piflouz that can be given
-        max_size = Constants.MAX_PIBOX_AMOUNT
-        event = events.get_event_object(events.EventType.PASSIVE)
-        if event is not None:
-            powerups_list = event.get_powerups()
-            max_size = round(functools.reduce(lambda accu, powerup: accu * powerup.get_pibox_reward_multiplier_value(), powerups_list, max_size))
+        max_size = round(Constants.MAX_PIBOX_AMOUNT * user_profile.get_event_modifiers().pibox_reward)
         piflouz_quantity = randrange(max_size)
 
         role = await bot.guilds[0].fetch_role(Constants.PIBOX_NOTIF_ROLE_ID)
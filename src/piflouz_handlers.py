@@ -1,8 +1,6 @@
 from datetime import datetime
 
 from constant import Constants
-import events
-import powerups  # Used in eval()  # noqa: F401
 import user_profile
 
 
@@ -116,12 +114,7 @@ def get_max_rewardable_combo(user_id):
     -------
     res (int)
     """
-    current_event = events.get_event_object(events.EventType.PASSIVE)
-    profile = user_profile.get_profile(user_id)
-    powerups_user = [eval(p) for p in profile["powerups"]]
-    powerups_event = current_event.get_powerups() if current_event is not None else []
-    all_powerups = powerups_user + powerups_event
-    return round(Constants.MAX_MINING_COMBO + sum(p.get_max_combo_increase() for p in all_powerups))
+    return round(Constants.MAX_MINING_COMBO + user_profile.get_modifiers(user_id).max_combo_increase)
 
 
 def get_total_piflouz_earned(user_id, current_time):
@@ -140,18 +133,14 @@ def get_total_piflouz_earned(user_id, current_time):
     qty (the pilouz amount)
     """
     profile = user_profile.get_profile(user_id)
+    modifiers = user_profile.get_modifiers(user_id)
 
-    current_event = events.get_event_object(events.EventType.PASSIVE)
-    powerups_user = [eval(p) for p in profile["powerups"]]
-    powerups_event = current_event.get_powerups() if current_event is not None else []
-    all_powerups = powerups_user + powerups_event
-
-    qty = Constants.BASE_MINING_AMOUNT * (1 + sum(p.get_piflouz_multiplier_value() - 1 for p in all_powerups))
+    qty = Constants.BASE_MINING_AMOUNT * modifiers.piflouz
     qty = round(qty)
 
     max_combo = get_max_rewardable_combo(user_id)
 
-    combo_bonus = min(profile["mining_combo"], max_combo) * Constants.BASE_PIFLOUZ_PER_MINING_COMBO * (1 + sum(p.get_combo_reward_multiplier() - 1 for p in all_powerups))
+    combo_bonus = min(profile["mining_combo"], max_combo) * Constants.BASE_PIFLOUZ_PER_MINING_COMBO * modifiers.combo_reward
     combo_bonus = round(combo_bonus)
 
     return qty + combo_bonus + get_mining_accuracy_bonus(user_id, current_time)
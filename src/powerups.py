@@ -1,4 +1,9 @@
+import ast
+from functools import lru_cache, reduce
+from math import inf
+from operator import mul
 import time
+from typing import NamedTuple
 
 from constant import Constants
 from custom_task_triggers import TaskCustom as Task
@@ -19,11 +24,10 @@ async def handle_actions_every_hour(bot):
     """
     print("handling hourly powerups")
 
-    for user_id, profile in user_profile.get_active_profiles().items():
+    for user_id, profile in user_profile.view_active_profiles().items():
         powerups = profile["powerups"]
         for powerup_str in powerups:
-            # Removing the '__name__.' at the beginning
-            powerup = eval(powerup_str[len(__name__) + 1:])
+            powerup = parse_powerup(powerup_str)
             if powerup.has_action_every_hour:
                 powerup.actions_every_hour(user_id)
     await utils.update_piflouz_message(bot)
@@ -136,9 +140,20 @@ class Powerups:
         """
         return self.get_info_str()
 
+    def get_expiration_time(self):
+        """
+        Returns the time after which the modifiers of the powerup change because it expires
+
+        Returns
+        -------
+        res (float):
+            a timestamp, or `math.inf` if the powerup never expires
+        """
+        return inf
+
     def to_str(self):
         """
-        Returns the string used for recreating the object with eval()
+        Returns the string used for recreating the object with `parse_powerup`
 
         Returns
         -------
@@ -196,8 +211,7 @@ class PowerupsNonPermanent(Powerups):
                 i = current
                 break
 
-        # Remove the '__name__.' at the begining
-        if i is not None and eval(profile["powerups"][i][len(__name__) + 1:]).is_active():
+        if i is not None and parse_powerup(profile["powerups"][i]).is_active():
             return False  # User already has an active power of the same type
 
         self.buy_date = current_time
@@ -218,6 +232,13 @@ class PowerupsNonPermanent(Powerups):
     def is_active(self):
         return self.duration is None or time.time() - self.buy_date <= self.duration
 
+    def get_expiration_time(self):
+        if self.duration is None:  # Powerup of an event, which lasts as long as the event
+            return inf
+        if not self.is_active():  # Already expired, it will not change anymore
+            return inf
+        return self.buy_date + self.duration
+
 
 class CooldownReduction(PowerupsNonPermanent):
     """
@@ -306,11 +327,10 @@ class PowerupsPermanent(Powerups):
         for current, powerup_str in enumerate(profile["powerups"]):
             if powerup_str.startswith(f"{__name__}.{type(self).__name__}"):
                 i = current
-                self.qty = eval(profile["powerups"][i][len(__name__) + 1:]).qty
+                self.qty = parse_powerup(profile["powerups"][i]).qty
                 break
 
-        # Remove the '__name__.' at the begining
-        if i is not None and eval(profile["powerups"][i][len(__name__) + 1:]).qty == self.max_qty:
+        if i is not None and self.qty == self.max_qty:
             return False  # User already has the maximum number of this powerup
 
         self.qty += 1
@@ -458,3 +478,92 @@ class StorePriceMultiplier(PowerupsPermanent):
 
     def to_str(self):
         return f"{__name__}.{type(self).__name__}({self.value})"
+
+
+class Modifiers(NamedTuple):
+    """
+    Combined effect of a list of powerups
+    """
+
+    cooldown: float = 1
+    piflouz: float = 1
+    max_combo_increase: int = 0
+    combo_reward: float = 1
+    pibox_rate: float = 1
+    pibox_reward: float = 1
+    store_price: float = 1
+
+    @staticmethod
+    def from_powerups(powerups_list):
+        """
+        Combines the effect of several powerups
+        The cooldown, piflouz and combo reward multipliers are additive, the pibox and store multipliers are multiplicative
+
+        Parameters
+        ----------
+        powerups_list (List[Powerups])
+
+        Returns
+        -------
+        res (Modifiers)
+        """
+        return Modifiers(
+            cooldown=1 + sum(p.get_cooldown_multiplier_value() - 1 for p in powerups_list),
+            piflouz=1 + sum(p.get_piflouz_multiplier_value() - 1 for p in powerups_list),
+            max_combo_increase=sum(p.get_max_combo_increase() for p in powerups_list),
+            combo_reward=1 + sum(p.get_combo_reward_multiplier() - 1 for p in powerups_list),
+            pibox_rate=reduce(mul, (p.get_pibox_rate_multiplier_value() for p in powerups_list), 1),
+            pibox_reward=reduce(mul, (p.get_pibox_reward_multiplier_value() for p in powerups_list), 1),
+            store_price=reduce(mul, (p.get_store_price_multiplier() for p in powerups_list), 1)
+        )
+
+
+def _get_powerup_classes():
+    """
+    Returns all the powerup classes, which are the only classes that can be created by `parse_powerup`
+
+    Returns
+    -------
+    res (dict):
+        class name -> class
+    """
+    res = dict()
+    to_visit = [Powerups]
+    while len(to_visit) > 0:
+        cls = to_visit.pop()
+        res[cls.__name__] = cls
+        to_visit.extend(cls.__subclasses__())
+    return res
+
+
+@lru_cache(maxsize=1024)
+def parse_powerup(powerup_str):
+    """
+    Recreates a powerup from the string returned by its `to_str` method, without using eval()
+    The string has to be a call to a powerup class (optionally prefixed with the module name) with literal arguments
+    The results are cached, so the returned powerup is shared and should not be modified
+
+    Parameters
+    ----------
+    powerup_str (str)
+
+    Returns
+    -------
+    res (Powerups)
+    """
+    call = ast.parse(powerup_str, mode="eval").body
+    assert isinstance(call, ast.Call), f"Invalid powerup: {powerup_str}"
+
+    func = call.func
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == __name__:
+        name = func.attr
+    else:
+        assert isinstance(func, ast.Name), f"Invalid powerup: {powerup_str}"
+        name = func.id
+
+    classes = _get_powerup_classes()
+    assert name in classes, f"Unknown powerup: {powerup_str}"
+
+    args = [ast.literal_eval(arg) for arg in call.args]
+    kwargs = {keyword.arg: ast.literal_eval(keyword.value) for keyword in call.keywords}
+    return classes[name](*args, **kwargs)
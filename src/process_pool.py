@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import logging
+import multiprocessing
+
+
+logger = logging.getLogger("custom_log")
+
+
+class ProcessPool:
+    """
+    Pool of worker processes running the CPU-heavy jobs (event preparation, image generation), so that they do not compete with the bot for the interpreter
+    The workers are forked from the bot process when the pool starts, and preload the word lists they need (see `_init_worker`)
+    If the pool is not started, or broken (e.g. a worker was killed), the jobs are run in a thread instead
+    """
+
+    def __init__(self):
+        self._executor = None
+
+    def start(self, nb_workers):
+        """
+        Starts the worker processes
+        The workers are forked, which only copies the calling thread: the pool should be started before the other threads of the bot
+
+        Parameters
+        ----------
+        nb_workers (int)
+        """
+        if self._executor is not None: return
+
+        self._executor = ProcessPoolExecutor(nb_workers, mp_context=multiprocessing.get_context("fork"), initializer=_init_worker)
+        self._executor.submit(int).result()  # With fork, all the workers are created on the first job
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """
+        Runs a function in a worker process and returns its result
+        If the result is not ready in time, or if the calling task is cancelled, the job is cancelled if it did not start yet, and its result is ignored otherwise
+
+        Parameters
+        ----------
+        func (function):
+            the function to run, it should be picklable along with its arguments and its result (e.g. a module-level function, a static method or a method of a simple object)
+        *args, **kwargs:
+            the arguments of the function
+        timeout (float):
+            maximum time (in seconds) to wait for the result, None for no limit
+
+        Returns
+        -------
+        res (any):
+            the result of the function, an asyncio.TimeoutError is raised if it is not ready in time
+        """
+        job = partial(func, *args, **kwargs)
+
+        if self._executor is not None:
+            try:
+                future = self._executor.submit(job)
+            except BrokenProcessPool:
+                print("The process pool is broken, running the jobs in threads")
+                logger.error("The process pool is broken, running the jobs in threads")
+                self._executor = None
+
+        if self._executor is None:
+            return await asyncio.wait_for(asyncio.to_thread(job), timeout)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        finally:
+            future.cancel()  # Does nothing if the job is already running or done
+
+    def shutdown(self):
+        """
+        Stops the worker processes, once they finish their current job
+        """
+        if self._executor is None: return
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+def _init_worker():
+    """
+    Preloads the data used by the jobs, when a worker process starts
+    """
+    # Imported here since the events need the pool
+    from events import SubseqChallenge
+    from events.subsequence_challenge import SubseqIndex
+    from events.word_lists import ALL_CLEAN_WORDS_PATH, ALL_WORDS_PATH, EASY_WORDS_PATH
+
+    SubseqChallenge.get_word_list(EASY_WORDS_PATH)
+    SubseqIndex.get(SubseqChallenge.get_word_list(ALL_CLEAN_WORDS_PATH), SubseqChallenge.get_word_list(ALL_WORDS_PATH))
+
+
+process_pool = ProcessPool()
@@ -0,0 +1,185 @@
+import numpy as np
+
+from database import db
+
+
+# Numeric fields of the profiles, stored in columns
+COLUMNS = ["piflouz_balance", "turbo_piflouz_balance", "donation_balance", "mining_combo", "previous_get_time"]
+
+
+class ProfileStore:
+    """
+    Columnar copy of the numeric fields of the active profiles, with one array per field and one row per user
+    The profiles are still stored in the database, the columns are kept up to date with a write hook (see `MyDatabase.add_write_hook`)
+    This allows computations over all the users (rankings, season rewards, resets) to be done with array operations
+    """
+
+    def __init__(self):
+        self.user_ids = []  # row -> user id
+        self.rows = dict()  # user id -> row
+        self.columns = {name: np.zeros(0, dtype=np.int64) for name in COLUMNS}
+        self._is_valid = False  # the columns are rebuilt from the database when they are used after a structural change
+
+        db.add_write_hook(self._on_write)
+
+    def get_column(self, name):
+        """
+        Returns the values of a field for all the active users
+        The array should not be modified
+
+        Parameters
+        ----------
+        name (str):
+            one of `COLUMNS`
+
+        Returns
+        -------
+        user_ids (List[str]):
+            the user id corresponding to each row
+        values (np.ndarray)
+        """
+        self._check_valid()
+        return self.user_ids, self.columns[name]
+
+    def get_record(self, user_id):
+        """
+        Returns the typed record of an active user
+
+        Parameters
+        ----------
+        user_id (str)
+
+        Returns
+        -------
+        res (ProfileRecord)
+        """
+        return ProfileRecord(self, user_id)
+
+    def set_values(self, name, user_ids, values):
+        """
+        Sets the value of a field for several active users
+        Only the values which actually changed are written in the database
+
+        Parameters
+        ----------
+        name (str):
+            one of `COLUMNS`
+        user_ids (List[str]):
+            the users to modify, in the same order as `values`
+        values (np.ndarray or int):
+            the new values, or a single value for all the users
+        """
+        self._check_valid()
+        rows = np.array([self.rows[user_id] for user_id in user_ids], dtype=np.int64)
+        values = np.broadcast_to(np.asarray(values, dtype=np.int64), rows.shape)
+        changed = np.flatnonzero(self.columns[name][rows] != values)
+
+        profiles = db["profiles"]["active"]
+        with db.trusted_writes():
+            for i in changed.tolist():
+                profiles[user_ids[i]][name] = int(values[i])  # The column is updated by the write hook
+
+    def _check_valid(self):
+        """
+        Rebuilds the columns if the active profiles changed since they were last built
+        """
+        if self._is_valid: return
+
+        profiles = db.view("profiles", "active")
+        self.user_ids = list(profiles.keys())
+        self.rows = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        for name in COLUMNS:
+            self.columns[name] = np.array([profile.get(name, 0) for profile in profiles.values()], dtype=np.int64)
+
+        self._is_valid = True
+
+    def _on_write(self, path):
+        """
+        Updates the columns after a change in the database
+
+        Parameters
+        ----------
+        path (tuple):
+            keys leading from the root of the database to the modified value
+        """
+        if not self._is_valid or path[0] != "profiles": return
+
+        if len(path) <= 2:  # All the profiles of a category were replaced
+            self._is_valid = False
+            return
+
+        user_id = str(path[2])
+        if path[1] != "active" or (len(path) > 3 and path[3] not in self.columns): return
+
+        try:
+            profile = db.view("profiles", "active", user_id)
+        except KeyError:  # Profile removed
+            self._is_valid = False
+            return
+
+        if user_id not in self.rows:  # New profile
+            self._is_valid = False
+            return
+
+        row = self.rows[user_id]
+        names = COLUMNS if len(path) == 3 else [path[3]]
+        for name in names:
+            self.columns[name][row] = profile.get(name, 0)
+
+
+def _column_property(name):
+    """
+    Returns a property reading and writing a column of the store
+
+    Parameters
+    ----------
+    name (str):
+        one of `COLUMNS`
+
+    Returns
+    -------
+    res (property)
+    """
+    def getter(self):
+        return int(self.store.get_column(name)[1][self.store.rows[self.user_id]])
+
+    def setter(self, value):
+        db["profiles"]["active"][self.user_id][name] = int(value)  # The column is updated by the write hook
+
+    return property(getter, setter)
+
+
+class ProfileRecord:
+    """
+    Typed access to the profile of an active user
+    The numeric fields are read from the columns of the store, and written to the database
+    """
+
+    __slots__ = ("store", "user_id")
+
+    piflouz_balance = _column_property("piflouz_balance")
+    turbo_piflouz_balance = _column_property("turbo_piflouz_balance")
+    donation_balance = _column_property("donation_balance")
+    mining_combo = _column_property("mining_combo")
+    previous_get_time = _column_property("previous_get_time")
+
+    def __init__(self, store, user_id):
+        """
+        Parameters
+        ----------
+        store (ProfileStore)
+        user_id (str)
+        """
+        self.store = store
+        self.user_id = user_id
+
+    @property
+    def profile(self):
+        """
+        The whole profile, to access the other fields
+
+        Returns
+        -------
+        res (Element_dict)
+        """
+        return db["profiles"]["active"][self.user_id]
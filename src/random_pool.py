@@ -4,6 +4,92 @@ from constant import Constants
 import events
 
 
+class CompiledPool:
+    """
+    Sampling structure built from a RandomPool, to draw items in constant time
+    Nested pools are flattened: each final item gets the product of the probabilities along its path
+    The draws use Walker's alias method
+    """
+
+    def __init__(self, items, probabilities):
+        """
+        Parameters
+        ----------
+        items : list
+            The final items of the pool
+        probabilities : list
+            The probability of each item, summing to 1
+        """
+        n = len(items)
+        self.items = items
+        self.thresholds = [1.] * n
+        self.aliases = list(range(n))
+
+        scaled = [p * n for p in probabilities]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            i = small.pop()
+            j = large.pop()
+            self.thresholds[i] = scaled[i]
+            self.aliases[i] = j
+            scaled[j] -= 1 - scaled[i]
+            if scaled[j] < 1:
+                small.append(j)
+            else:
+                large.append(j)
+        # The remaining indices have a scaled probability of 1, up to rounding errors, and are kept with their default values
+
+    @staticmethod
+    def from_pool(pool):
+        """
+        Compiles a pool
+
+        Parameters
+        ----------
+        pool : RandomPool
+            The pool to compile
+
+        Returns
+        -------
+        CompiledPool
+            Corresponding sampling structure
+        """
+        items = []
+        probabilities = []
+
+        to_visit = [(pool, 1.)]
+        while to_visit:
+            current, proba = to_visit.pop()
+            total = sum(weight for _, weight in current.pool)
+            if total <= 0:  # An empty pool gives None
+                items.append(None)
+                probabilities.append(proba)
+                continue
+
+            for item, weight in current.pool:
+                if weight <= 0: continue
+                if RandomPool.represents_pool(item):
+                    to_visit.append((item if isinstance(item, RandomPool) else RandomPool.from_dict(item), proba * weight / total))
+                else:
+                    items.append(item)
+                    probabilities.append(proba * weight / total)
+
+        return CompiledPool(items, probabilities)
+
+    def get_random(self):
+        """
+        Selects a random item from the pool
+
+        Returns
+        -------
+        Any
+            Random final item from the pool
+        """
+        i = random.randrange(len(self.items))
+        return self.items[i] if random.random() < self.thresholds[i] else self.items[self.aliases[i]]
+
+
 class RandomPool:
     def __init__(self, name, pool=None):
         """
@@ -16,6 +102,7 @@ class RandomPool:
         """
         self.name = name
         self.pool = pool or []
+        self._compiled = None
 
     def to_dict(self):
         """
@@ -59,6 +146,20 @@ class RandomPool:
         """
         return isinstance(val, RandomPool) or (isinstance(val, dict) and "name" in val and "pool" in val)
 
+    def compile(self):
+        """
+        Returns the sampling structure of the pool, built the first time it is needed
+        The pool should not be modified afterwards
+
+        Returns
+        -------
+        CompiledPool
+            Sampling structure of the pool
+        """
+        if self._compiled is None:
+            self._compiled = CompiledPool.from_pool(self)
+        return self._compiled
+
     def get_random(self):
         """
         Selects a random item from the pool based on the weights of the items
@@ -68,16 +169,7 @@ class RandomPool:
         Any
             Random item from the pool. If the item is also a pool, it will return one of its items
         """
-        items = [val[0] for val in self.pool]
-        weights = [val[1] for val in self.pool]
-
-        if len(weights) == 0: return None
-        item = random.choices(items, weights)[0]
-
-        while RandomPool.represents_pool(item):
-            item = RandomPool.from_dict(item).get_random()
-
-        return item
+        return self.compile().get_random()
 
     def update(self, other_pool):
         """
@@ -93,24 +185,62 @@ class RandomPool:
         RandomPool
             Updated pool
         """
+        others = {RandomPool._get_key(item): (item, weight) for item, weight in other_pool.pool}
         new_pool = []
+        used = set()
 
         for item, weight in self.pool:
-            for other_item, other_weight in other_pool.pool:
-                if RandomPool.represents_pool(item) and RandomPool.represents_pool(other_item):
-                    if item["name"] == other_item["name"]:
-                        new_pool.append(RandomPool.from_dict(item).update(RandomPool.from_dict(other_item)), other_weight)
-                if item == other_item:
-                    new_pool.append((item, other_weight))
-            if item not in [val[0] for val in new_pool]:
+            key = RandomPool._get_key(item)
+            if key not in others:
                 new_pool.append((item, weight))
+                continue
+
+            other_item, other_weight = others[key]
+            if RandomPool.represents_pool(item):  # Nested pools with the same name are merged
+                other_item = RandomPool._as_pool(item).update(RandomPool._as_pool(other_item)).to_dict()
+            new_pool.append((other_item, other_weight))
+            used.add(key)
 
-        for other_item, other_weight in other_pool.pool:
-            if other_item not in [val[0] for val in new_pool]:
-                new_pool.append((other_item, other_weight))
+        new_pool += [(item, weight) for key, (item, weight) in others.items() if key not in used]
 
         return RandomPool(self.name, new_pool)
 
+    @staticmethod
+    def _get_key(item):
+        """
+        Returns the key used to match items when updating a pool
+
+        Parameters
+        ----------
+        item : Any
+            An item of a pool
+
+        Returns
+        -------
+        Any
+            The name of the pool for pools, the item itself otherwise
+        """
+        if RandomPool.represents_pool(item):
+            return ("pool", RandomPool._as_pool(item).name)
+        return item
+
+    @staticmethod
+    def _as_pool(val):
+        """
+        Returns a RandomPool from a value representing a pool
+
+        Parameters
+        ----------
+        val : RandomPool or dict
+            Value representing a pool
+
+        Returns
+        -------
+        RandomPool
+            Corresponding RandomPool object
+        """
+        return val if isinstance(val, RandomPool) else RandomPool.from_dict(val)
+
 
 class RandomPoolTable:
     def __init__(self, pools=None):
@@ -141,24 +271,30 @@ class RandomPoolTable:
         RandomPoolTable
             Updated table
         """
+        others = {pool.name: (pool, proba) for pool, proba in other_table.pools}
         new_pools = []
-        names = []
         for old_pool, old_proba in self.pools:
-            for other_pool, other_proba in other_table.pools:
-                if old_pool.name == other_pool.name:
-                    new_pool = old_pool.update(other_pool)
-                    new_pools.append((new_pool, other_proba))
-                    names.append(old_pool.name)
-                    break
-            if len(names) == 0 or old_pool.name != names[-1]:  # If the pool was not updated
+            if old_pool.name in others:
+                other_pool, other_proba = others.pop(old_pool.name)
+                new_pools.append((old_pool.update(other_pool), other_proba))
+            else:  # The pool was not updated
                 new_pools.append((old_pool, old_proba))
 
-        for other_pool, other_proba in other_table.pools:
-            if other_pool.name not in names:
-                new_pools.append((other_pool, other_proba))
+        new_pools += list(others.values())
 
         return RandomPoolTable(new_pools)
 
+    def compile(self):
+        """
+        Returns the sampling structures of the pools of the table
+
+        Returns
+        -------
+        list
+            A list of tuples (CompiledPool, probability)
+        """
+        return [(pool.compile(), proba) for pool, proba in self.pools]
+
     @staticmethod
     def from_dict(data):
         """
@@ -194,3 +330,30 @@ class RandomPoolTable:
             event_table = event.get_pibox_pool_table()
             return default.update(event_table)
         return default
+
+    @staticmethod
+    def get_compiled_pibox_table():
+        """
+        Returns the sampling structures of the pibox drop table
+        They are only rebuilt when the base table or the passive event changes
+
+        Returns
+        -------
+        list
+            A list of tuples (CompiledPool, probability), see `RandomPoolTable.compile`
+        """
+        global _compiled_pibox_table
+
+        # The current event object is kept as long as the event does not change (see `events.get_event_object`)
+        # Keeping references to the objects in the cache ensures that they cannot be replaced by other objects with the same id
+        default = Constants.PIBOX_POOL_TABLE
+        event = events.get_event_object(events.EventType.PASSIVE)
+        cached_default, cached_event, compiled = _compiled_pibox_table
+        if cached_default is default and cached_event is event and compiled is not None: return compiled
+
+        compiled = RandomPoolTable.compute_pibox_table().compile()
+        _compiled_pibox_table = (default, event, compiled)
+        return compiled
+
+
+_compiled_pibox_table = (None, None, None)  # (base table, passive event, compiled table)
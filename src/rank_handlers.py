@@ -5,7 +5,11 @@ import time
 from constant import Constants
 from custom_task_triggers import TaskCustom as Task
 from database import db
-import user_profile
+from leaderboard import get_leaderboard
+
+
+# Version of the leaderboard used by the last successful update of each rank, to skip the updates when nothing changed
+_last_versions = dict()
 
 
 @Task.create(IntervalTrigger(seconds=30))
@@ -33,15 +37,15 @@ async def update_rank_pilord(bot):
     ----------
     bot (interactions.Client)
     """
-    if len(user_profile.get_active_profiles()) == 0:
+    leaderboard = get_leaderboard("piflouz_balance")
+    if len(leaderboard) == 0 or _last_versions.get("pilord") == leaderboard.version:
         return
+    version = leaderboard.version
 
     guild = bot.guilds[0]
     role = Constants.PILORD_ROLE_ID
 
-    data = sorted(list(user_profile.get_inverted("piflouz_balance").items()), key=lambda key_val: -int(key_val[1]))
-    # in case of ties
-    data = list(filter(lambda key_val: key_val[1] == data[0][1], data))
+    data = leaderboard.get_first()  # several users in case of ties
     user_ids = [key_val[0] for key_val in data]
 
     # Remove old pilords
@@ -52,14 +56,13 @@ async def update_rank_pilord(bot):
 
     # Avoid creating pilords if there is no piflouz
     if len(data) == 0 or data[0][1] <= 0:
-        if len(db["current_pilords"]) == 0:
-            return
-        else:
+        if len(db["current_pilords"]) != 0:
             for user_id in db["current_pilords"]:
                 member = await guild.fetch_member(int(user_id))
                 await member.remove_role(role)
             db["current_pilords"] = []
-            return
+        _last_versions["pilord"] = version
+        return
 
     # Setup new pilords
     for user_id, amount in data:
@@ -69,6 +72,7 @@ async def update_rank_pilord(bot):
             bot.dispatch("become_pilord", user_id)
 
     db["current_pilords"] = user_ids
+    _last_versions["pilord"] = version
 
 
 async def update_rank_mega_piflexer(bot):
@@ -124,13 +128,15 @@ async def update_rank_piflex_master(bot):
     ----------
     bot (interactions.Client)
     """
+    leaderboard = get_leaderboard("discovered_piflex")
+    if _last_versions.get("piflex_master") == leaderboard.version:
+        return
+    version = leaderboard.version
+
     guild = bot.guilds[0]
     role = Constants.PIFLEX_MASTER_ROLE_ID
 
-    data = sorted(list(user_profile.get_inverted("discovered_piflex").items()), key=lambda key_val: -len(key_val[1]))
-
-    # in case of ties
-    data = list(filter(lambda key_val: len(key_val[1]) == len(data[0][1]), data))
+    data = leaderboard.get_first()  # several users in case of ties, with their number of discovered piflex
     user_ids = [key_val[0] for key_val in data]
 
     # Remove old piflex masters
@@ -140,15 +146,14 @@ async def update_rank_piflex_master(bot):
             await member.remove_role(role)
 
     # Avoid creating piflex masters if there is no piflex
-    if len(data) == 0 or len(data[0][1]) == 0:
-        if len(db["current_piflex_masters"]) == 0:
-            return
-        else:
+    if len(data) == 0 or data[0][1] == 0:
+        if len(db["current_piflex_masters"]) != 0:
             for user_id in db["current_piflex_masters"]:
                 member = await guild.fetch_member(int(user_id))
                 await member.remove_role(role)
             db["current_piflex_masters"] = []
-            return
+        _last_versions["piflex_master"] = version
+        return
 
     # Setup new piflex masters
     for user_id, amount in data:
@@ -157,3 +162,4 @@ async def update_rank_piflex_master(bot):
             await user.add_role(role)
 
     db["current_piflex_masters"] = user_ids
+    _last_versions["piflex_master"] = version
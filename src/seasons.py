@@ -3,7 +3,7 @@ import datetime
 from dateutil.relativedelta import relativedelta
 from interactions import File, IntervalTrigger
 import logging
-from math import sqrt
+import numpy as np
 
 from constant import Constants
 from custom_task_triggers import TaskCustom as Task
@@ -22,8 +22,9 @@ logger = logging.getLogger("custom_log")
 
 waiting_for_season = asyncio.Lock()  # To avoid multiple seasons starting at the same time
 
-reward_balance = lambda balance: int(sqrt(balance))
-reward_piflex = lambda count: int(0.5771 * count ** 3 - 9.8453 * count ** 2 + 80.152 * count)
+# Both rewards are computed on arrays of scores
+reward_balance = lambda balance: np.sqrt(balance).astype(np.int64)
+reward_piflex = lambda count: np.polyval([0.5771, -9.8453, 80.152, 0], count).astype(np.int64)
 bonus_ranking = [100, 50, 30]
 
 
@@ -60,7 +61,7 @@ async def end_current_season(bot):
     await events.end_event(bot, events.EventType.CHALLENGE)
 
     # Reseting the previous stats for the season results
-    profiles = user_profile.get_active_profiles()
+    profiles = user_profile.view_active_profiles()
     user_profile.reset_all("season_results")
     user_profile.reset_all_inactive("season_results")
 
@@ -76,26 +77,28 @@ async def end_current_season(bot):
         await thread.archive(reason="Season over")
 
     # Adding turbo piflouz based on the amount of piflouz collected
-    bank = list(user_profile.get_inverted("piflouz_balance").items())
-    reward_turbo_piflouz_based_on_scores(bank, reward_balance, "Balance")
+    # The columns are copied since the rewards modify the profiles
+    user_ids, bank = user_profile.get_column("piflouz_balance")
+    user_ids, bank = list(user_ids), bank.copy()
+    reward_turbo_piflouz_based_on_scores(user_ids, bank, reward_balance, "Balance")
 
     # Adding turbo piflouz based on the amount of piflex images discovered
-    piflex_count = [(user_id, len(profile["discovered_piflex"])) for user_id, profile in profiles.items()]
+    piflex_count = np.array([len(profiles[user_id]["discovered_piflex"]) for user_id in user_ids], dtype=np.int64)
     # so that there is at least an increase of 20 per image, and so that the whole 12 images give 550 turbo piflouz
     # the median of the required number of piflex is aroud 35, which lead to 35*8000 piflouz spent, which would lead to 530 turbo piflouz otherwhise
-    reward_turbo_piflouz_based_on_scores(piflex_count, reward_piflex, "Discovered piflex")
+    reward_turbo_piflouz_based_on_scores(user_ids, piflex_count, reward_piflex, "Discovered piflex")
 
     # Adding piflouz based on the ranking in piflouz
-    reward_turbo_piflouz_based_on_ranking(bank, bonus_ranking, "Balance ranking")
+    reward_turbo_piflouz_based_on_ranking(user_ids, bank, bonus_ranking, "Balance ranking")
 
     # Adding piflouz based on the ranking in piflex
-    reward_turbo_piflouz_based_on_ranking(piflex_count, bonus_ranking, "Piflex ranking")
+    reward_turbo_piflouz_based_on_ranking(user_ids, piflex_count, bonus_ranking, "Piflex ranking")
 
     # Adding piflouz based on the ranking in donations
-    donations = list(user_profile.get_inverted("donation_balance").items())
-    reward_turbo_piflouz_based_on_ranking(donations, bonus_ranking, "Donation ranking")
+    donations = user_profile.get_column("donation_balance")[1].copy()
+    reward_turbo_piflouz_based_on_ranking(user_ids, donations, bonus_ranking, "Donation ranking")
 
-    await utils.update_piflouz_message(bot)
+    await utils.update_piflouz_message(bot, now=True)  # Displaying the final rankings before the reset
 
     # Reseting the database
     user_profile.reset_all("piflouz_balance")
@@ -112,6 +115,9 @@ async def end_current_season(bot):
 
     reset_stats()
 
+    # Making sure the new season is on disk before announcing it
+    await db.flushed()
+
     # Sending the announcement message
     if "out_channel" in db.keys():
         embed = await embed_messages.get_embed_end_season(bot)
@@ -150,56 +156,63 @@ async def season_task(bot):
     await msg.pin()
     db["current_season_message_id"] = int(msg.id)
     db["piflouz_message_id"] = int(msg.id)
-    await utils.update_piflouz_message(bot)
+    await utils.update_piflouz_message(bot, now=True)
 
     waiting_for_season.release()
     logger.info("Season started")
 
 
-def reward_turbo_piflouz_based_on_ranking(scores, rewards, reward_type):
+def reward_turbo_piflouz_based_on_ranking(user_ids, scores, rewards, reward_type):
     """
     Give user rewards based on a given ranking
 
     Parameters
     ----------
-    scores (List[)
+    user_ids (List[str])
+    scores (np.ndarray):
+        the score of each user, in the same order as `user_ids`
     rewards (List[int]):
         bonus score for the users ranked less than len(rewards)
     reward_type (str)
     """
-    sorted_scores = sorted(scores, key=lambda key_val: -key_val[1])  # Sorting by decreasing score
+    order = np.argsort(-scores, kind="stable")  # Sorting by decreasing score
 
     previous_index, previous_val = 0, 0
-    for i, (user_id, score) in enumerate(sorted_scores):
+    for i, (user_id, score) in enumerate(zip((user_ids[j] for j in order.tolist()), scores[order].tolist())):
         index = i if score != previous_val else previous_index
         previous_val, previous_index = score, index
 
         if index < len(rewards):
-            profile = user_profile.get_profile(user_id)
-            profile["turbo_piflouz_balance"] += rewards[index]
-            profile["season_results"][reward_type] = [rewards[index], index]
+            record = user_profile.get_record(user_id)
+            record.turbo_piflouz_balance += rewards[index]
+            record.profile["season_results"][reward_type] = [rewards[index], index]
         else:  # The user has a ranking too low to earn rewards
             break
 
 
-def reward_turbo_piflouz_based_on_scores(scores, reward, reward_type):
+def reward_turbo_piflouz_based_on_scores(user_ids, scores, reward, reward_type):
     """
     Give user rewards based on a given score
 
     Parameters
     ----------
-    scores ()
-    reward (int):
-        int function -> transform the score into the rewarded turbo piflouz amount
+    user_ids (List[str])
+    scores (np.ndarray):
+        the score of each user, in the same order as `user_ids`
+    reward (function):
+        transforms the array of scores into the array of rewarded turbo piflouz amounts
     reward_type (str)
     """
-    for user_id, score in scores:
-        turbo_balance = reward(score)
+    turbo_balances = reward(scores)
 
-        profile = user_profile.get_profile(user_id)
+    _, current = user_profile.get_column("turbo_piflouz_balance")
+    rows = [user_profile.profile_store.rows[user_id] for user_id in user_ids]
+    user_profile.profile_store.set_values("turbo_piflouz_balance", user_ids, current[rows] + turbo_balances)
 
-        profile["season_results"][reward_type] = turbo_balance
-        profile["turbo_piflouz_balance"] += turbo_balance
+    profiles = user_profile.get_active_profiles()
+    with db.trusted_writes():
+        for user_id, turbo_balance in zip(user_ids, turbo_balances.tolist()):
+            profiles[user_id]["season_results"][reward_type] = turbo_balance
 
 
 def get_season_end_datetime():
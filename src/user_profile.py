@@ -1,10 +1,18 @@
 from copy import copy
 from itertools import chain
+from math import inf
+import time
 
 from constant import Constants
 from database import db
 import events
-import powerups  # Used in eval()  # noqa: F401
+import powerups
+from profile_store import COLUMNS, ProfileStore
+
+
+profile_store = ProfileStore()
+
+_modifiers_cache = dict()  # user id -> (powerups of the user, current passive event, expiration time, modifiers)
 
 
 def get_timer(user_id, current_time):
@@ -45,15 +53,77 @@ def get_total_cooldown(user_id):
     -------
     cooldown (the time in seconds)
     """
+    cooldown = Constants.REACT_TIME_INTERVAL * get_modifiers(user_id).cooldown
+    return cooldown
+
+
+def get_modifiers(user_id):
+    """
+    Returns the combined effect of the powerups of a user and of the current passive event
+    The result is cached until the powerups of the user or the event change, or until one of the powerups expires
+
+    Parameters
+    ----------
+    user_id (int/str)
+
+    Returns
+    -------
+    res (powerups.Modifiers)
+    """
     user_id = str(user_id)
-    profile = get_profile(user_id)
+    get_profile(user_id)
+
+    powerups_user = tuple(db.view("profiles", "active", user_id)["powerups"])
+    event_str = db.view("events", "passive")["current_event"]
+    now = time.time()
+
+    cached = _modifiers_cache.get(user_id)
+    if cached is not None and cached[0] == powerups_user and cached[1] == event_str and now <= cached[2]:
+        return cached[3]
 
     current_event = events.get_event_object(events.EventType.PASSIVE)
-    powerups_user = [eval(p) for p in profile["powerups"]]
+    modifiers, expiration_time = combine_powerups(powerups_user, current_event)
+    _modifiers_cache[user_id] = (powerups_user, event_str, expiration_time, modifiers)
+    return modifiers
+
+
+def combine_powerups(powerups_user, current_event):
+    """
+    Combines the powerups of a user with the ones of a passive event
+
+    Parameters
+    ----------
+    powerups_user (Iterable[str]):
+        powerups of the user, as stored in their profile
+    current_event (events.PassiveEvent):
+        None if there is no passive event
+
+    Returns
+    -------
+    modifiers (powerups.Modifiers)
+    expiration_time (float):
+        time after which the modifiers change because a powerup expires, `math.inf` if they never change
+    """
     powerups_event = current_event.get_powerups() if current_event is not None else []
+    all_powerups = [powerups.parse_powerup(p) for p in powerups_user] + powerups_event
 
-    cooldown = Constants.REACT_TIME_INTERVAL * (1 + sum(p.get_cooldown_multiplier_value() - 1 for p in powerups_user + powerups_event))
-    return cooldown
+    modifiers = powerups.Modifiers.from_powerups(all_powerups)
+    expiration_time = min((p.get_expiration_time() for p in all_powerups), default=inf)
+    return modifiers, expiration_time
+
+
+def get_event_modifiers():
+    """
+    Returns the combined effect of the powerups of the current passive event only
+    This is used for the effects which do not depend on a user (e.g. the pibox and store multipliers)
+
+    Returns
+    -------
+    res (powerups.Modifiers)
+    """
+    current_event = events.get_event_object(events.EventType.PASSIVE)
+    powerups_event = current_event.get_powerups() if current_event is not None else []
+    return powerups.Modifiers.from_powerups(powerups_event)
 
 
 def get_new_user_profile():
@@ -104,9 +174,46 @@ def get_profile(user_id):
     return db["profiles"]["active"][user_id]
 
 
+def get_record(user_id):
+    """
+    Returns the typed record of a user, with a fast access to the numeric fields
+    If the uses currently doesn't have a profile, it creates a new one
+
+    Parameters
+    ----------
+    user_id (int/str)
+
+    Returns
+    -------
+    record (ProfileRecord)
+    """
+    user_id = str(user_id)
+    get_profile(user_id)
+    return profile_store.get_record(user_id)
+
+
+def get_column(key):
+    """
+    Returns the values of a numeric field for all the active users, as an array
+    The array should not be modified
+
+    Parameters
+    ----------
+    key (str):
+        one of `profile_store.COLUMNS`
+
+    Returns
+    -------
+    user_ids (List[str])
+    values (np.ndarray)
+    """
+    return profile_store.get_column(key)
+
+
 def get_inverted(key):
     """
     Returns a dictionary with the value associated to each user_id (only for active users)
+    The values are read-only
 
     Parameters
     ----------
@@ -116,8 +223,12 @@ def get_inverted(key):
     -------
     dict
     """
+    if key in COLUMNS:
+        user_ids, values = profile_store.get_column(key)
+        return dict(zip(user_ids, values.tolist()))
+
     res = dict()
-    for user_id, profile in db["profiles"]["active"].items():
+    for user_id, profile in db.view("profiles", "active").items():
         res[user_id] = profile[key]
     return res
 
@@ -135,7 +246,7 @@ def get_inverted_all(key):
     dict
     """
     res = dict()
-    for user_id, profile in chain(db["profiles"]["active"].items(), db["profiles"]["inactive"].items()):
+    for user_id, profile in chain(db.view("profiles", "active").items(), db.view("profiles", "inactive").items()):
         res[user_id] = profile[key]
     return res
 
@@ -150,8 +261,14 @@ def reset_all(key):
     """
     blank_profile = get_new_user_profile()
     default_value = blank_profile[key]
-    for profile in db["profiles"]["active"].values():
-        profile[key] = copy(default_value)
+    if key in COLUMNS:  # Only the profiles with a different value are written
+        user_ids, _ = profile_store.get_column(key)
+        profile_store.set_values(key, user_ids, default_value)
+        return
+
+    with db.trusted_writes():
+        for profile in db["profiles"]["active"].values():
+            profile[key] = copy(default_value)
 
 
 def reset_all_inactive(key):
@@ -164,8 +281,9 @@ def reset_all_inactive(key):
     """
     blank_profile = get_new_user_profile()
     default_value = blank_profile[key]
-    for profile in db["profiles"]["inactive"].values():
-        profile[key] = copy(default_value)
+    with db.trusted_writes():
+        for profile in db["profiles"]["inactive"].values():
+            profile[key] = copy(default_value)
 
 
 def update_profiles():
@@ -173,10 +291,11 @@ def update_profiles():
     Check if all profiles actually contain all the necessary keys
     """
     blank_profile = get_new_user_profile()
-    for user_id, profile in chain(db["profiles"]["active"].items(), db["profiles"]["inactive"].items()):
-        for key, value in blank_profile.items():
-            if key not in profile.keys():
-                profile[key] = copy(value)
+    with db.trusted_writes():
+        for user_id, profile in chain(db["profiles"]["active"].items(), db["profiles"]["inactive"].items()):
+            for key, value in blank_profile.items():
+                if key not in profile.keys():
+                    profile[key] = copy(value)
 
 
 def get_active_profiles():
@@ -190,6 +309,17 @@ def get_active_profiles():
     return db["profiles"]["active"]
 
 
+def view_active_profiles():
+    """
+    Returns a read-only view of the active profiles, faster to iterate over than `get_active_profiles`
+
+    Returns
+    -------
+    dict (DictView)
+    """
+    return db.view("profiles", "active")
+
+
 def set_all_inactive():
     """
     Moves all profiles to the inactive profiles
@@ -209,3 +339,23 @@ def get_all_birthdays():
         user_id -> birthday_date
     """
     return get_inverted_all("birthday_date")
+
+
+if __name__ == "__main__":
+    now = int(time.time())
+    bought = powerups.CooldownReduction(100, 10, 3600, now).to_str()
+
+    # Event powerups have no duration, they last as long as the event
+    modifiers, expiration_time = combine_powerups([], events.IncreasedPiflouzAndCooldownEvent(50, 20))
+    assert modifiers.piflouz == 1.5 and modifiers.cooldown == 0.8
+    assert expiration_time == inf
+
+    # The bought powerups expire, the event ones do not
+    modifiers, expiration_time = combine_powerups([bought], events.IncreasedPiflouzEvent(50))
+    assert modifiers.piflouz == 1.5 and modifiers.cooldown == 0.9
+    assert expiration_time == now + 3600
+
+    # Every kind of event powerup can be combined
+    for event in [events.CooldownReductionEvent(20), events.ComboEvent(5, 10), events.PiboxDropRateAndRewardEvent(20, 20), None]:
+        combine_powerups([bought], event)
+    print("All checks passed")
@@ -1,8 +1,9 @@
 import asyncio
+import base64
 import datetime
 from functools import wraps
-from interactions import Button, SectionComponent
-import pickle
+from interactions import Button, IntervalTrigger, SectionComponent
+import json
 from pyimgur import Imgur
 import requests
 
@@ -10,6 +11,7 @@ from constant import Constants
 from custom_exceptions import CustomAssertError
 from custom_task_triggers import TaskCustom as Task, TimeTriggerDT
 from database import db
+from database.backups import BackupStore
 import embed_messages
 
 
@@ -30,18 +32,93 @@ def get_new_joke():
     return joke
 
 
-async def update_piflouz_message(bot):
+class PiflouzMessageRenderer:
     """
-    Updates the piflouz message with the rankings
+    Keeps the piflouz message up to date with the rankings
+    Updates are only requested by marking the message as dirty, and done at most once every `Constants.PIFLOUZ_MESSAGE_RENDER_INTERVAL` seconds by `render_piflouz_message`
+    The message is not edited if its content did not change, and it is only fetched when its id changes
+    """
+
+    def __init__(self):
+        self.is_dirty = True  # So that the message is updated when the bot starts
+        self._message = None
+        self._payload_hash = None
+        self._lock = asyncio.Lock()
+
+    async def render(self, bot):
+        """
+        Edits the piflouz message if its content changed
+
+        Parameters
+        ----------
+        bot (interactions.Client)
+        """
+        async with self._lock:
+            self.is_dirty = False  # Changes made while rendering will be rendered next time
+            try:
+                await self._render(bot)
+            except Exception:
+                self.is_dirty = True  # The update is retried by the next call of `render_piflouz_message`
+                raise
+
+    async def _render(self, bot):
+        """
+        Edits the piflouz message if its content changed, without handling the dirty flag
+
+        Parameters
+        ----------
+        bot (interactions.Client)
+        """
+        container = embed_messages.get_container_piflouz()
+        payload_hash = hash(json.dumps(container.to_dict(), sort_keys=True, default=str))
+        message_id = db["piflouz_message_id"]
+
+        if self._message is None or int(self._message.id) != message_id:
+            channel = await bot.fetch_channel(db["out_channel"])
+            self._message = await channel.fetch_message(message_id)
+            self._payload_hash = None
+        elif payload_hash == self._payload_hash:
+            return
+
+        try:
+            await self._message.edit(components=container)
+        except Exception:
+            self._message = None  # e.g. the message was deleted, it will be fetched again next time
+            raise
+        self._payload_hash = payload_hash
+
+
+piflouz_message_renderer = PiflouzMessageRenderer()
+
+
+async def update_piflouz_message(bot, now=False):
+    """
+    Requests an update of the piflouz message with the rankings
+    The update is done by `render_piflouz_message`, along with the other requests made in the meantime
 
     Parameters
     ----------
     bot (interactions.Client)
+    now (bool):
+        if True, the message is updated before returning (e.g. when the rankings are about to be reset)
     """
-    channel = await bot.fetch_channel(db["out_channel"])
-    container = embed_messages.get_container_piflouz()
-    piflouz_message = await channel.fetch_message(db["piflouz_message_id"])
-    await piflouz_message.edit(components=container)
+    if now:
+        await piflouz_message_renderer.render(bot)
+    else:
+        piflouz_message_renderer.is_dirty = True
+
+
+@Task.create(IntervalTrigger(seconds=Constants.PIFLOUZ_MESSAGE_RENDER_INTERVAL))
+async def render_piflouz_message(bot):
+    """
+    Updates the piflouz message if an update was requested
+
+    Parameters
+    ----------
+    bot (interactions.Client)
+    """
+    if piflouz_message_renderer.is_dirty and "out_channel" in db.keys() and "piflouz_message_id" in db.keys():
+        await piflouz_message_renderer.render(bot)
 
 
 async def wait_until(then):
@@ -98,29 +175,30 @@ async def backup_db(folder=None):
         now = datetime.datetime.now()
         folder = now.strftime("%Y_%m_%d_%Hh%Mmin%Ss")
     db.make_backup(parent_folder, folder)
+    await db.flushed()
 
     print("Made a backup of the database in file: ", folder)
 
 
-async def recover_db(filename):
+async def recover_db(name):
     """
-    Overrides the current database with one from a backed up file
+    Overrides the current database with a backup made by `backup_db`
 
     Parameters
     ----------
-    filename (str):
-        the path to the file
+    name (str):
+        the name of the backup, as given to `backup_db`
     """
-    new_db = pickle.load(open(filename, "rb"))
-    print("loaded the database from file: ", filename)
+    new_db = BackupStore("backups_db").load(name)
+    print("loaded the database from backup: ", name)
 
     # Backing up the current database just in case
     now = datetime.datetime.now()
-    tmp_filename = now.strftime("backups_db/tmp_%Y_%m_%d_%H:%M:%S.dump")
-    await backup_db(tmp_filename)
+    tmp_name = now.strftime("tmp_%Y_%m_%d_%Hh%Mmin%Ss")
+    await backup_db(tmp_name)
 
     print("Overriding the current database")
-    for key in db.keys():
+    for key in list(db.keys()):
         del db[key]
 
     for key in new_db.keys():
@@ -184,6 +262,24 @@ def upload_image_to_imgur(path):
     return img.link
 
 
+def upload_image_data_to_imgur(data):
+    """
+    Uploads an image to imgur and returns the link, without writing it to a file
+
+    Parameters
+    ----------
+    data (bytes):
+        content of the image file
+
+    Returns
+    -------
+    res (str)
+    """
+    imgur = Imgur(Constants.IMGUR_CLIENT_ID)
+    img = imgur.upload_image(url=base64.b64encode(data))  # The imgur API accepts base64 data instead of a url
+    return img.link
+
+
 def update_db():
     """
     Upgrades the database when going from v1.12 to v1.13
@@ -1,6 +1,6 @@
-from matplotlib.patches import Rectangle
-import matplotlib.pyplot as plt
-from PIL import Image
+from functools import lru_cache
+import io
+from PIL import Image, ImageDraw, ImageFont
 import random
 
 
@@ -11,6 +11,16 @@ class Wordle:
     WORD_SIZE = 5
     NB_ATTEMPTS = 6
 
+    # The image is drawn on a grid of units, the positions are given in units with the y axis going up (as in the previous matplotlib version)
+    UNIT = 4  # pixels
+    IMG_LEFT = -10
+    IMG_TOP = 124
+    IMG_SIZE = (116 * UNIT, 170 * UNIT)
+    KEYBOARD_LAYOUT = ["azertyuiop", "qsdfghjklm", "wxcvbn"]
+    FILL_COLORS = {"🟩": (0, 128, 0), "🟨": (191, 191, 0), "⬛": (0, 0, 0), "": (128, 128, 128)}  # "" for the keys not used yet
+    OUTLINE_COLOR = (128, 128, 128)
+    OUTLINE_WIDTH = 4  # pixels
+
     def __init__(self, solution=None, debug=False):
         self.debug = debug
         if solution is None:
@@ -181,71 +191,171 @@ class Wordle:
             print("This was determined to be a hard solution!")
         return True
 
-    def generate_image(self, words, path="wordle.png"):
+    @staticmethod
+    def to_pixels(x, y):
+        """
+        Returns the position in the image of a point given in units
+
+        Parameters
+        ----------
+        x (float)
+        y (float)
+
+        Returns
+        -------
+        res ((int, int))
+        """
+        return round((x - Wordle.IMG_LEFT) * Wordle.UNIT), round((Wordle.IMG_TOP - y) * Wordle.UNIT)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_font(size):
+        """
+        Returns the font used for the letters
+        DejaVu Sans (the font used by matplotlib) if it is installed, the default font of Pillow otherwise
+
+        Parameters
+        ----------
+        size (int):
+            in pixels
+
+        Returns
+        -------
+        res (PIL.ImageFont.FreeTypeFont)
+        """
+        try:
+            return ImageFont.truetype("DejaVuSans.ttf", size)
+        except OSError:
+            return ImageFont.load_default(size)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_letter_tile(letter, status):
+        """
+        Returns the image of a letter of a guess, with the outline of its cell
+
+        Parameters
+        ----------
+        letter (str)
+        status (str):
+            "🟩", "🟨" or "⬛"
+
+        Returns
+        -------
+        res (PIL.Image)
+        """
+        size = 17 * Wordle.UNIT + Wordle.OUTLINE_WIDTH
+        half_width = Wordle.OUTLINE_WIDTH // 2
+        res = Image.new("RGBA", (size, size))
+        draw = ImageDraw.Draw(res)
+        draw.rectangle((half_width, half_width, size - half_width - 1, size - half_width - 1), fill=Wordle.FILL_COLORS[status])
+        draw.rectangle((0, 0, size - 1, size - 1), outline=Wordle.OUTLINE_COLOR, width=Wordle.OUTLINE_WIDTH)
+        draw.text((size / 2, size / 2 + Wordle.UNIT), letter.upper(), fill="white", font=Wordle.get_font(42), anchor="mm")
+        return res
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_key_tile(letter, status):
+        """
+        Returns the image of a key of the keyboard
+
+        Parameters
+        ----------
+        letter (str)
+        status (str):
+            best result of the letter in the guesses, "" if it was not used yet
+
+        Returns
+        -------
+        res (PIL.Image)
+        """
+        size = 8 * Wordle.UNIT
+        res = Image.new("RGBA", (size, size), Wordle.FILL_COLORS[status])
+        color = "black" if status == "⬛" else "white"  # The letters which are not in the word are hidden
+        ImageDraw.Draw(res).text((3.8 * Wordle.UNIT, 4.5 * Wordle.UNIT), letter.upper(), fill=color, font=Wordle.get_font(16), anchor="mm")
+        return res
+
+    @staticmethod
+    def get_key_position(letter):
+        """
+        Returns the position of the top-left corner of a key in the image
+
+        Parameters
+        ----------
+        letter (str)
+
+        Returns
+        -------
+        res ((int, int))
+        """
+        for i, row in enumerate(Wordle.KEYBOARD_LAYOUT):
+            if letter in row:
+                return Wordle.to_pixels(10 * row.index(letter) + 5 * (i - .5), -10 * i - 12)
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_template():
+        """
+        Returns the image of an empty game: the outline of the grid and the keyboard with no letter used
+        The image should be copied before being modified
+
+        Returns
+        -------
+        res (PIL.Image)
+        """
+        res = Image.new("RGBA", Wordle.IMG_SIZE)
+        draw = ImageDraw.Draw(res)
+        half_width = Wordle.OUTLINE_WIDTH // 2
+        for i in range(Wordle.NB_ATTEMPTS):
+            for j in range(Wordle.WORD_SIZE):
+                x, y = Wordle.to_pixels(20 * j, 20 * i + 17)
+                size = 17 * Wordle.UNIT
+                draw.rectangle((x - half_width, y - half_width, x + size + half_width - 1, y + size + half_width - 1), outline=Wordle.OUTLINE_COLOR, width=Wordle.OUTLINE_WIDTH)
+
+        for letter in "".join(Wordle.KEYBOARD_LAYOUT):
+            res.paste(Wordle.get_key_tile(letter, ""), Wordle.get_key_position(letter))
+        return res
+
+    def generate_image(self, words):
         """
         Creates an image representing the current state of a wordle game
+        The image is composited from cached tiles, and encoded in memory
 
         Parameters
         ----------
         words (str list):
             the different guesses
-        path (str):
-            where the image will be generated
-        """
-        fig, ax = plt.subplots(figsize=(10, 10))
-        ax.set_aspect("equal")
-        plt.xlim(-10, 110)
-        plt.ylim(-50, 130)
-        plt.axis("off")
 
-        fill_colors = {"🟩": "green", "🟨": "y", "⬛": "black"}
-        outline_color = "gray"
-        key_status = {letter: "gray" for letter in "abcdefghijklmnopqrstuvwxyz"}
+        Returns
+        -------
+        res (bytes):
+            the image, in PNG format
+        """
+        img = Wordle.get_template().copy()
+        key_status = dict()
+        priority = {"⬛": 0, "🟨": 1, "🟩": 2}
+        half_width = Wordle.OUTLINE_WIDTH // 2
 
         # Drawing the guesses
         for i_word, word in enumerate(words):
             res = self.guess(word)
-            for j, result_status in enumerate(res):
-                i = self.WORD_SIZE - i_word  # in order to draw the words from the top
-                letter = word[j]
-                color = fill_colors[result_status]
-                position = (20 * j, 20 * i)
-                rect = Rectangle(position, 17, 17, edgecolor="none", facecolor=color)
-                ax.add_patch(rect)
-                plt.text(position[0] + 8.5, position[1] + 7.5, letter.upper(), color="white", fontsize=32, ha="center", va="center")
-
-                if color == "green":
-                    key_status[letter] = "green"
-                elif color == "y" and key_status[letter] != "green":
-                    key_status[letter] = "y"
-                elif color == "black" and key_status[letter] == "gray":
-                    key_status[letter] = "black"
-
-        # Drawing the grid outline
-        for i in range(self.NB_ATTEMPTS):
-            for j in range(self.WORD_SIZE):
-                rect = Rectangle((20 * j, 20 * i), 17, 17, edgecolor=outline_color, facecolor="none", linewidth=3)
-                ax.add_patch(rect)
+            i = self.WORD_SIZE - i_word  # in order to draw the words from the top
+            for j, (letter, result_status) in enumerate(zip(word, res)):
+                x, y = Wordle.to_pixels(20 * j, 20 * i + 17)
+                img.paste(Wordle.get_letter_tile(letter, result_status), (x - half_width, y - half_width))
+
+                if letter not in key_status or priority[result_status] > priority[key_status[letter]]:
+                    key_status[letter] = result_status
 
         # Drawing the keyboard
-                keyboard_layout = ["azertyuiop", "qsdfghjklm", "wxcvbn"]
-        for i, row in enumerate(keyboard_layout):
-            shift = 5 * (i - .5)
-            for j, letter in enumerate(row):
-                position = (10 * j + shift, -10 * i - 20)
-                rect = Rectangle(position, 8, 8, edgecolor="none", facecolor=key_status[letter])
-                ax.add_patch(rect)
-
-                color = "white" if key_status[letter] != "black" else "black"
-                plt.text(position[0] + 3.8, position[1] + 3.5, letter.upper(), color=color, fontsize=12, ha="center", va="center")
-
-        plt.savefig(path, transparent=True)
-        plt.close(fig)
-        # Cropping the white outline
-        img = Image.open(path)
-        img.load()
-        cropped = img.crop((250, 150, img.size[0] - 250, img.size[1] - 130))
-        cropped.save(path)
+        for letter, status in key_status.items():
+            position = Wordle.get_key_position(letter)
+            if position is not None:
+                img.paste(Wordle.get_key_tile(letter, status), position)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
 
 
 if __name__ == "__main__":